@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# 命令行造数入口：python -m apps.data_generator --help
+import sys
+from apps.data_generator.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
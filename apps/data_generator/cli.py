@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 造数命令行入口（不依赖PyQt，可在Linux测试机和定时任务中运行）
+# 用法：
+#   python -m apps.data_generator apps/data_generator/plans/hcb_truck.json
+#   python -m apps.data_generator spec.yaml --workers 4 --bulk-load
+#   python -m apps.data_generator spec.yaml --format csv --output-dir out
+#   python -m apps.data_generator --database hcb --table hcb_userinfo --count 100000
+#   python -m apps.data_generator --profile --database hcb --table hcb_userinfo   # 采集数据画像
+# 规则文件格式与多表造数计划相同（见 services/gen_plan.py），未写规则的字段按“自动识别”生成
+# 连接信息默认取 config/connections.json，可用 --host/--port/--user/--password 覆盖
+# 进度和吞吐按行输出到标准输出；Ctrl+C 提交已写入的部分后停止，再按一次强制退出
+# 退出码：0 完成，1 出错，130 已取消
+# -------------------------------------------------------------
+import argparse
+import signal
+import sys
+import threading
+import time
+from common.mysql_util import format_phase_timings
+from apps.data_generator.services.batch_tuner import format_throughput
+from apps.data_generator.services.data_profile import SAMPLE_ROWS, TableProfiler
+from apps.data_generator.services.db_config import get_mysql_config
+from apps.data_generator.services.file_sinks import SINK_FORMATS
+from apps.data_generator.services.gen_plan import GenPlan
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_CANCELLED = 130
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m apps.data_generator', description='批量造数（命令行）')
+    parser.add_argument('spec', nargs='?', help='规则文件（JSON/YAML），与 --table 二选一')
+    parser.add_argument('--table', help='不使用规则文件时，按自动识别规则生成单张表')
+    parser.add_argument('--count', type=int, help='每张表的条数，覆盖规则文件中的count')
+    parser.add_argument('--database', help='数据库名，覆盖规则文件中的database')
+    parser.add_argument('--workers', type=int, default=1, help='并行数，大于1时多进程造数+多连接写入（仅无关联的表）')
+    parser.add_argument('--bulk-load', action='store_true', help='批量导入模式：关闭唯一/外键检查，合并提交')
+    parser.add_argument('--no-server-side', action='store_true', help='不在数据库端生成，全部由客户端造数')
+    parser.add_argument('--seed', type=int, help='随机种子，相同种子和规则生成相同数据')
+    parser.add_argument('--format', choices=sorted(SINK_FORMATS), help='导出文件格式，不写入数据库')
+    parser.add_argument('--output-dir', default='.', help='导出文件目录，默认当前目录')
+    parser.add_argument('--profile', action='store_true', help='采集 --table 的数据画像（需同时指定 --database）')
+    parser.add_argument('--sample', type=int, default=SAMPLE_ROWS, help=f'采集画像的抽样行数，默认{SAMPLE_ROWS}')
+    parser.add_argument('--dry-run', action='store_true', help='只解析规则和表间关联，打印执行顺序')
+    parser.add_argument('--config', help='连接配置文件，默认 apps/data_generator/config/connections.json')
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--user')
+    parser.add_argument('--password')
+    return parser
+
+
+def _connection_config(args):
+    """连接配置：命令行参数都给出时不读配置文件，否则以配置文件为底再覆盖"""
+    overrides = {'host': args.host, 'port': args.port, 'user': args.user, 'password': args.password}
+    if all(v is not None for v in overrides.values()):
+        config = {}
+    else:
+        config = get_mysql_config(args.config) if args.config else get_mysql_config()
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    return config
+
+
+def _load_spec(args):
+    if args.spec:
+        spec = GenPlan.load_spec(args.spec)
+    elif args.table:
+        spec = {'tables': {args.table: {}}}
+    else:
+        raise Exception('请指定规则文件或 --table')
+    if args.database:
+        spec['database'] = args.database
+    if args.count is not None:
+        for conf in spec.get('tables', {}).values():
+            conf['count'] = args.count
+    return spec
+
+
+def run_profile(args):
+    """采集并保存数据画像"""
+    if not args.table or not args.database:
+        raise Exception('采集数据画像需要指定 --database 和 --table')
+    profiler = TableProfiler(_connection_config(args), args.database, args.table, sample_rows=args.sample)
+    profile = profiler.profile(on_progress=lambda done, total: print(f'[INFO] 已读取 {done:,} 行', flush=True))
+    path = TableProfiler.save(profile)
+    print(TableProfiler.summary(profile))
+    print(f'[INFO] 画像已保存：{path}，规则文件中设置 "profile": true 即可按画像造数')
+
+
+class ProgressPrinter:
+    """
+    把造数回调转成逐行输出：吞吐统计到达时打印一行当前进度和速度
+    """
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.done = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def on_progress(self, done, total):
+        self.done, self.total = done, total
+
+    def on_stats(self, stats):
+        percent = self.done * 100 / self.total if self.total else 100
+        self._print(f'[INFO] 进度 {self.done:,}/{self.total:,} ({percent:.1f}%)  {format_throughput(stats)}')
+
+    def on_table_done(self, table, inserted):
+        self._print(f'[INFO] {table} 完成：{inserted:,}条')
+
+    def _print(self, line):
+        with self._lock:
+            print(line, file=self.out, flush=True)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cancel = threading.Event()
+
+    def on_sigint(signum, frame):
+        print('[WARNING] 收到中断，提交已写入的部分后停止（再按一次强制退出）', flush=True)
+        cancel.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    try:
+        if args.profile:
+            run_profile(args)
+            return EXIT_OK
+        spec = _load_spec(args)
+        plan = GenPlan(_connection_config(args), spec, bulk_load=args.bulk_load,
+                       server_side=not args.no_server_side, seed=args.seed, workers=args.workers,
+                       output_format=args.format, output_dir=args.output_dir)
+        levels = plan.build()
+        print(f'[INFO] 数据库 {plan.database}，执行顺序：{" -> ".join("/".join(level) for level in levels)}')
+        for link in plan.links:
+            print(f"[INFO] 关联 {link['child']}.{link['child_column']} -> "
+                  f"{link['parent']}.{link['parent_column']}（{link['mode']}）")
+        if args.dry_run:
+            for table, info in plan.tables.items():
+                print(f"[INFO] {table}: {info['count']:,}条，{len(info['fields'])}个字段")
+            return EXIT_OK
+        signal.signal(signal.SIGINT, on_sigint)
+        printer = ProgressPrinter()
+        start = time.perf_counter()
+        results = plan.run(on_progress=printer.on_progress, is_cancelled=cancel.is_set, on_stats=printer.on_stats,
+                           on_table_done=printer.on_table_done)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        print(f'[ERROR] {e}', file=sys.stderr, flush=True)
+        return EXIT_ERROR
+    finally:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+    total = sum(results.values())
+    print(f'[INFO] 合计 {total:,}条，用时 {elapsed:.2f}s（{total / max(elapsed, 1e-6):,.0f} 行/秒），种子 {plan.seed}')
+    for table, timings in plan.timings.items():
+        if timings:
+            print(f'[INFO] {table} 耗时：{format_phase_timings(timings)}')
+    if cancel.is_set():
+        print('[WARNING] 已取消，以上为取消前已完成的部分')
+        return EXIT_CANCELLED
+    return EXIT_OK
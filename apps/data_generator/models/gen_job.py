@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 造数任务模型
+# 记录一次造数的规则说明和进度检查点（已提交行数、随机数状态），每次提交后落盘，
+# 程序退出或连接中断后可从检查点继续，不必从头再来
+# 检查点目录按项目根目录定位，界面和命令行从不同工作目录启动也能看到同一批任务
+# 检查点不保存数据库密码，继续任务时由调用方重新提供连接配置
+# -------------------------------------------------------------
+import json
+import os
+import random
+import time
+import uuid
+from common.path_util import resource_path
+
+JOB_DIR = resource_path(os.path.join('temp', 'data_gen_jobs'))  # 检查点目录
+JOB_FINISHED = 'finished'
+JOB_RESUMABLE = ('running', 'cancelled', 'failed')  # 可继续的状态
+
+
+class GenJob:
+    """
+    单表造数任务
+    """
+
+    def __init__(self, dbname, table, fields, types, rules, count, extras=None, options=None, seed=None,
+                 job_id=None):
+        self.job_id = job_id or time.strftime('%Y%m%d_%H%M%S_') + uuid.uuid4().hex[:6]
+        self.dbname = dbname          # 数据库名
+        self.table = table            # 表名
+        self.fields = list(fields)    # 字段名列表
+        self.types = list(types)      # 字段类型列表
+        self.rules = list(rules)      # 造数规则列表
+        self.extras = list(extras or [None] * len(fields))  # 规则额外参数
+        self.count = count            # 总条数
+        self.options = dict(options or {})  # 执行选项：workers / server_side / bulk_load
+        self.seed = seed if seed is not None else random.getrandbits(63)  # 随机种子
+        self.committed = 0            # 已提交条数
+        self.rng_state = None         # 最近一次提交时的随机数状态（串行模式）
+        self.status = 'running'
+        self.error = None
+        self.created_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.updated_at = self.created_at
+
+    @property
+    def path(self):
+        return os.path.join(JOB_DIR, f'{self.job_id}.json')
+
+    @property
+    def remaining(self):
+        return max(0, self.count - self.committed)
+
+    def to_dict(self):
+        data = dict(self.__dict__)
+        if self.rng_state is not None:
+            version, internal, gauss_next = self.rng_state
+            data['rng_state'] = [version, list(internal), gauss_next]
+        return data
+
+    @staticmethod
+    def from_dict(data):
+        job = GenJob(data['dbname'], data['table'], data['fields'], data['types'], data['rules'], data['count'],
+                     data.get('extras'), data.get('options'), data.get('seed'), data['job_id'])
+        job.committed = data.get('committed', 0)
+        job.status = data.get('status', 'running')
+        job.error = data.get('error')
+        job.created_at = data.get('created_at', job.created_at)
+        job.updated_at = data.get('updated_at', job.updated_at)
+        state = data.get('rng_state')
+        if state:
+            job.rng_state = (state[0], tuple(state[1]), state[2])
+        return job
+
+    def save(self):
+        """原子写入：先写临时文件再替换，中途退出不会留下半个文件；紧凑格式，每批提交都写也不重"""
+        os.makedirs(JOB_DIR, exist_ok=True)
+        self.updated_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def restore_rng(self):
+        """按检查点恢复随机数发生器：有保存状态时接着该状态继续，否则从种子开始"""
+        rng = random.Random(self.seed)
+        if self.rng_state is not None:
+            rng.setstate(self.rng_state)
+        return rng
+
+    def resume_seed(self):
+        """并行模式的续跑种子：由原种子和已提交条数决定，同一检查点多次续跑结果一致"""
+        return random.Random(f'{self.seed}-{self.committed}').getrandbits(63)
+
+    def checkpoint(self, committed, rng_state=None):
+        """提交一批后调用，记录进度并落盘，续跑从最后一次提交处继续"""
+        self.committed = committed
+        if rng_state is not None:
+            self.rng_state = rng_state
+        self.save()
+
+    def finish(self, status, error=None):
+        """
+        结束任务：完成时删除检查点文件，取消/失败时保留以便继续
+        """
+        self.status = status
+        self.error = error
+        if status == JOB_FINISHED:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        else:
+            self.save()
+
+    @staticmethod
+    def load(job_id):
+        with open(os.path.join(JOB_DIR, f'{job_id}.json'), 'r', encoding='utf-8') as f:
+            return GenJob.from_dict(json.load(f))
+
+    @staticmethod
+    def list_resumable(dbname=None, table=None):
+        """列出可继续的任务，按更新时间倒序"""
+        if not os.path.isdir(JOB_DIR):
+            return []
+        jobs = []
+        for name in os.listdir(JOB_DIR):
+            if not name.endswith('.json'):
+                continue
+            try:
+                job = GenJob.load(name[:-len('.json')])
+            except Exception as e:
+                print(f"[WARNING] 读取造数任务检查点失败 {name}: {e}")
+                continue
+            if job.status not in JOB_RESUMABLE or job.remaining == 0:
+                continue
+            if (dbname is None or job.dbname == dbname) and (table is None or job.table == table):
+                jobs.append(job)
+        jobs.sort(key=lambda j: j.updated_at, reverse=True)
+        return jobs
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 造数写入调优
+# AdaptiveBatchSizer：运行时调整每批行数——每行耗时持续下降就放大，变慢则退回一步；
+#                     遇到包过大、锁等待/死锁错误时缩小；上限受单行字节数和max_allowed_packet约束
+# ThroughputMeter：滑动窗口统计行/秒、字节/秒，估算剩余时间；format_throughput 格式化为一行文字
+# -------------------------------------------------------------
+import time
+from collections import deque
+
+# 可通过缩小批次后重试的MySQL错误码
+PACKET_ERRORS = (1153, 1301, 2006, 2013)  # 包过大 / 结果超过max_allowed_packet / 连接被服务端断开
+LOCK_ERRORS = (1205, 1213)                # 锁等待超时 / 死锁
+MAX_RETRIES = 5                           # 同一批连续重试次数上限
+
+
+def mysql_error_code(exc):
+    """取pymysql异常的错误码，非MySQL错误返回None"""
+    code = exc.args[0] if getattr(exc, 'args', None) else None
+    return code if isinstance(code, int) else None
+
+
+def estimate_row_bytes(rows, sample=20):
+    """按前几行估算单行在INSERT语句里的字节数（含引号、逗号和括号）"""
+    rows = rows[:sample]
+    if not rows:
+        return 0
+    total = 0
+    for row in rows:
+        total += 2 + sum(len(str(v).encode('utf-8')) + 3 for v in row)
+    return total // len(rows)
+
+
+class AdaptiveBatchSizer:
+    """
+    批大小自适应：以每行写入耗时为指标做爬山
+    - 比历史最好值快 tolerance 以上：记为新最好值，批大小乘以 growth
+    - 比历史最好值慢 tolerance 以上：批大小退回一步，并略微放宽最好值，避免偶发抖动后一直缩小
+    - 包过大/锁冲突：批大小减半
+    """
+
+    def __init__(self, initial=1000, min_size=100, max_size=50000, growth=1.5, tolerance=0.05):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.growth = growth
+        self.tolerance = tolerance
+        self.size = max(min_size, min(initial, max_size))
+        self._cap = max_size
+        self._best_latency = None
+
+    def cap_by_row_bytes(self, row_bytes, max_packet):
+        """单批数据不超过一条SQL的包大小上限"""
+        if row_bytes > 0:
+            self._cap = max(self.min_size, min(self.max_size, int(max_packet // row_bytes)))
+            self.size = min(self.size, self._cap)
+
+    def record(self, rows, seconds):
+        """登记一批的行数和写入耗时，返回调整后的批大小"""
+        # 尾批行数太少，耗时没有代表性
+        if rows < self.size // 2 or seconds <= 0:
+            return self.size
+        latency = seconds / rows
+        if self._best_latency is None or latency < self._best_latency * (1 - self.tolerance):
+            self._best_latency = latency
+            self.size = min(self._cap, int(self.size * self.growth))
+        elif latency > self._best_latency * (1 + self.tolerance):
+            self.size = max(self.min_size, int(self.size / self.growth))
+            self._best_latency *= 1 + self.tolerance
+        return self.size
+
+    def on_error(self, exc):
+        """
+        写入出错时调用：可通过缩小批次重试的错误返回类型（'packet' / 'lock'）并减半批大小，否则返回None
+        """
+        code = mysql_error_code(exc)
+        if code in PACKET_ERRORS:
+            kind = 'packet'
+            self._cap = max(self.min_size, self._cap // 2)
+        elif code in LOCK_ERRORS:
+            kind = 'lock'
+        else:
+            return None
+        self.size = max(self.min_size, self.size // 2)
+        self._best_latency = None
+        return kind
+
+
+class ThroughputMeter:
+    """
+    吞吐统计：最近 window 秒内的行/秒、字节/秒，按剩余行数估算ETA
+    """
+
+    def __init__(self, total, window=5.0, min_interval=0.5):
+        self.total = total
+        self.window = window              # 滑动窗口长度（秒）
+        self.min_interval = min_interval  # due() 的最小上报间隔（秒）
+        self.rows = 0
+        self.bytes = 0
+        self._samples = deque([(time.monotonic(), 0, 0)])
+        self._last_report = 0.0
+
+    def add(self, rows, nbytes=0):
+        self.rows += rows
+        self.bytes += nbytes
+        now = time.monotonic()
+        self._samples.append((now, self.rows, self.bytes))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+    def due(self):
+        """距上次上报超过 min_interval 时返回True，用于限制信号频率"""
+        now = time.monotonic()
+        if now - self._last_report >= self.min_interval:
+            self._last_report = now
+            return True
+        return False
+
+    def snapshot(self, done, batch_size=None):
+        """
+        :param done: 已完成行数（扣除回滚的部分），用于估算剩余时间
+        :return: {'rows_per_sec', 'bytes_per_sec', 'eta'(秒，无法估算时为None), 'batch_size'}
+        """
+        t0, r0, b0 = self._samples[0]
+        t1, r1, b1 = self._samples[-1]
+        elapsed = max(t1 - t0, 1e-6)
+        rows_per_sec = (r1 - r0) / elapsed
+        return {
+            'rows_per_sec': rows_per_sec,
+            'bytes_per_sec': (b1 - b0) / elapsed,
+            'eta': (self.total - done) / rows_per_sec if rows_per_sec > 0 else None,
+            'batch_size': batch_size,
+        }
+
+
+def format_throughput(stats):
+    """把 ThroughputMeter.snapshot 的结果格式化为 '速度: 12,345 行/秒  1.20 MB/秒  剩余: 00:01:05  批大小: 2000'"""
+    eta = stats.get('eta')
+    eta_text = '--:--:--' if eta is None else '%02d:%02d:%02d' % (eta // 3600, eta % 3600 // 60, eta % 60)
+    text = f"速度: {stats['rows_per_sec']:,.0f} 行/秒"
+    if stats.get('bytes_per_sec'):
+        text += f"  {stats['bytes_per_sec'] / 1024 / 1024:.2f} MB/秒"
+    text += f"  剩余: {eta_text}"
+    if stats.get('batch_size'):
+        text += f"  批大小: {stats['batch_size']}"
+    return text
@@ -2,19 +2,21 @@
 # -------------------------------------------------------------
 # 数据库批量造数插入线程（QThread）
 # 支持进度条、取消、规则驱动造数，详细中文注释
+# 实际造数由 DataGenEngine 执行，本线程只负责把进度/结果转成Qt信号
+# 每次提交后把进度写入任务检查点（GenJob），中断后可用 DataGenInsertWorker.resume 继续
+# output 指定文件格式和路径时改为写文件（CSV/SQL/Parquet），不连接数据库写入，也不记录检查点
+# DataProfileWorker 在后台采集表的数据画像（TableProfiler）
+# DataGenPlanWorker 执行多表造数计划（GenPlan），外键列取自父表已写入的键值
 # -------------------------------------------------------------
 from PyQt5.QtCore import QThread, pyqtSignal
-from common.mysql_util import MySQLUtil
-from common.data_factory import DataFactory
-import random
-from datetime import datetime, timedelta
-
-# 用户自定义日期格式转strftime格式
-# 如 YYYYMMDD -> %Y%m%d
-#    YYYY-MM-DD -> %Y-%m-%d
-def user_date_format_to_strftime(fmt):
-    fmt = fmt.replace('YYYY', '%Y').replace('MM', '%m').replace('DD', '%d')
-    return fmt
+from common.mysql_util import format_phase_timings
+from common.schema_cache import schema_cache
+from apps.data_generator.models.gen_job import GenJob, JOB_FINISHED
+from apps.data_generator.services.data_profile import TableProfiler
+from apps.data_generator.services.file_sinks import create_sink
+from apps.data_generator.services.gen_engine import DataGenEngine
+from apps.data_generator.services.gen_plan import GenPlan
+from apps.data_generator.services.rule_compiler import gen_value
 
 class DataGenInsertWorker(QThread):
     """
@@ -23,9 +25,10 @@ class DataGenInsertWorker(QThread):
     progress = pyqtSignal(int)    # 进度百分比信号
     finished = pyqtSignal(str)    # 完成信号
     error = pyqtSignal(str)       # 错误信号
-    batch_size = 100              # 每批插入条数
+    stats = pyqtSignal(dict)      # 吞吐信号：rows_per_sec / bytes_per_sec / eta / batch_size
 
-    def __init__(self, config, dbname, table, fields, types, rules, count, extras=None):
+    def __init__(self, config, dbname, table, fields, types, rules, count, extras=None, workers=1,
+                 server_side=True, bulk_load=False, job=None, output=None):
         super().__init__()
         self.config = config      # 数据库连接配置
         self.dbname = dbname      # 数据库名
@@ -36,124 +39,196 @@ class DataGenInsertWorker(QThread):
         self.count = count        # 总插入条数
         self._is_running = True   # 线程运行标志
         self.extras = extras or [None] * len(fields)  # 规则额外参数
+        self.workers = workers    # 并行数：1为串行，大于1时启用多进程造数+多连接写入
+        self.server_side = server_side  # 规则全部可用SQL表达时在数据库端生成
+        self.bulk_load = bulk_load      # 批量导入模式：关闭唯一/外键检查，合并提交
+        self._base = 0            # 续跑前已提交的条数
+        self.output = output      # 写文件：{'format': 'csv'/'sql'/'parquet', 'path': 路径, 其余为格式参数}；None为写库
+        # 任务检查点：新任务按当前参数创建，续跑时传入已有任务
+        self.job = job or GenJob(dbname, table, fields, types, rules, count, self.extras,
+                                 {'workers': workers, 'server_side': server_side, 'bulk_load': bulk_load})
+
+    @staticmethod
+    def resume(config, job):
+        """
+        从检查点继续任务，只生成剩余的条数
+        :param config: 数据库连接配置（检查点不保存密码）
+        :param job: GenJob.load / GenJob.list_resumable 得到的任务
+        """
+        options = job.options
+        return DataGenInsertWorker(config, job.dbname, job.table, job.fields, job.types, job.rules, job.count,
+                                   job.extras, options.get('workers', 1), options.get('server_side', True),
+                                   options.get('bulk_load', False), job)
 
     def run(self):
         """
         线程主函数，批量生成并插入数据，支持进度条和取消
         """
+        if self.output:
+            self.run_to_file()
+            return
+        job = self.job
+        base = job.committed      # 续跑前已提交的条数
         try:
             config = self.config.copy()
             config['database'] = self.dbname
-            db = MySQLUtil(**config)
-            db.connect()
-            total = self.count
-            inserted = 0
-            while inserted < total and self._is_running:
-                batch = []
-                for _ in range(min(self.batch_size, total - inserted)):
-                    row = []
-                    for i, field in enumerate(self.fields):
-                        rule = self.rules[i]
-                        ftype = self.types[i]
-                        extra = self.extras[i] if self.extras else None
-                        val = self.gen_value(rule, field, ftype, extra)
-                        row.append(val)
-                    batch.append(tuple(row))
-                placeholders = ','.join(['%s'] * len(self.fields))
-                sql = f"INSERT INTO `{self.table}` ({','.join(self.fields)}) VALUES ({placeholders})"
-                db.cursor.executemany(sql, batch)
-                db.conn.commit()
-                inserted += len(batch)
-                self.progress.emit(int(inserted * 100 / total))
-            db.close()
+            job.status = 'running'
+            job.save()
+
+            def on_commit(committed, rng_state):
+                job.checkpoint(base + committed, rng_state)
+
+            engine = DataGenEngine(config, self.table, self.fields, self.types, self.rules, job.remaining,
+                                   self.extras, self.get_field_max_lengths(), self.bulk_load,
+                                   job.restore_rng(), on_commit)
+            self._base = base
+            inserted = engine.run_auto(self.server_side, self.workers, job.resume_seed(),
+                                       on_progress=self._emit_progress, is_cancelled=self._cancelled,
+                                       on_stats=self.stats.emit)
+            report = f'\n耗时：{format_phase_timings(engine.timings)}' if engine.timings else ''
+            resumed = f'（续跑，此前已完成{base}条）' if base else ''
             if self._is_running:
-                self.finished.emit(f'成功插入{inserted}条数据')
+                job.finish(JOB_FINISHED)
+                self.finished.emit(f'成功插入{inserted}条数据{resumed}{report}')
             else:
-                self.finished.emit(f'已取消，实际插入{inserted}条数据')
+                job.finish('cancelled')
+                self.finished.emit(f'已取消，实际插入{inserted}条数据{resumed}，可稍后继续{report}')
         except Exception as e:
-            self.error.emit(str(e))
+            try:
+                job.finish('failed', str(e))
+            except Exception as save_error:
+                print(f"[WARNING] 保存造数任务检查点失败: {save_error}")
+            self.error.emit(f'{e}\n已提交{job.committed}/{job.count}条，可稍后继续')
+
+    def run_to_file(self):
+        """
+        造数写文件：规则编译和写库相同，只是输出换成文件
+        """
+        try:
+            options = dict(self.output)
+            fmt = options.pop('format')
+            path = options.pop('path')
+            sink = create_sink(fmt, path, self.table, self.fields, self.types, **options)
+            engine = DataGenEngine(self.config, self.table, self.fields, self.types, self.rules, self.count,
+                                   self.extras, self.get_field_max_lengths(), rng=self.job.restore_rng())
+            written = engine.run_to_sink(sink, on_progress=self._emit_progress, is_cancelled=self._cancelled,
+                                         on_stats=self.stats.emit)
+            files = '\n'.join(sink.paths)
+            report = f'\n耗时：{format_phase_timings(engine.timings)}'
+            if self._is_running:
+                self.finished.emit(f'成功导出{written}条数据到：\n{files}{report}')
+            else:
+                self.finished.emit(f'已取消，已导出{written}条数据到：\n{files}{report}')
+        except Exception as e:
+            self.error.emit(f'导出文件失败：{e}')
+
+    def _emit_progress(self, inserted, total):
+        # 进度按整个任务计算，续跑时包含之前已完成的部分
+        done = self._base + inserted
+        self.progress.emit(int(done * 100 / self.job.count) if self.job.count else 100)
+
+    def _cancelled(self):
+        return not self._is_running
+
+    def get_field_max_lengths(self):
+        """
+        从表结构缓存读取各字段的字符最大长度，与 self.fields 一一对应，非字符类型为None
+        """
+        try:
+            meta = schema_cache.get_table_fields(self.config, self.dbname, self.table)
+        except Exception:
+            return [None] * len(self.fields)
+        lengths = {f['Field']: f.get('MaxLength') for f in meta}
+        return [lengths.get(field) for field in self.fields]
 
     def gen_value(self, rule, field, ftype, extra=None):
         """
         按规则生成单字段数据
         """
-        if rule == '随机姓名':
-            return DataFactory.random_name()
-        elif rule == '随机手机号':
-            return DataFactory.random_phone()
-        elif rule == '随机身份证':
-            return DataFactory.random_id_number()
-        elif rule == '随机车牌':
-            return DataFactory.random_plate_number()['plate_number']
-        elif rule == '随机ETC号':
-            return DataFactory.random_etc_number()
-        elif rule == '随机OBN号':
-            return DataFactory.random_obn_number()
-        elif rule == '随机设备号':
-            return DataFactory.random_device_id()
-        elif rule == '随机订单号':
-            return DataFactory.random_order_id()
-        elif rule == '随机银行卡号':
-            return DataFactory.random_bank_card()
-        elif rule == '随机银行地址':
-            return DataFactory.random_bank_address()
-        elif rule == '固定值':
-            return extra if extra is not None else 'test'
-        elif rule == '枚举值':
-            if extra:
-                enums = [v.strip() for v in extra.split(',') if v.strip()]
-                return random.choice(enums) if enums else '0'
-            return '0'
-        elif rule == '随机日期':
-            fmt = extra if extra else 'YYYY-MM-DD'
-            strftime_fmt = user_date_format_to_strftime(fmt)
-            dt = datetime.now() - timedelta(days=random.randint(0, 3650))
-            try:
-                return dt.strftime(strftime_fmt)
-            except Exception:
-                return dt.strftime('%Y%m%d')
-        elif rule == '自增主键（自动生成）':
-            return None
-        else:
-            # 自动识别类型
-            ftype_low = ftype.lower()
-            fname = field.lower()
-            if 'int' in ftype_low:
-                if 'bigint' in ftype_low:
-                    return random.randint(1000000000, 9999999999)
-                return random.randint(1, 100000)
-            if 'decimal' in ftype_low or 'float' in ftype_low or 'double' in ftype_low:
-                return round(random.uniform(1, 10000), 2)
-            if 'date' in ftype_low and 'time' not in ftype_low:
-                return (datetime.now() - timedelta(days=random.randint(0, 3650))).strftime('%Y-%m-%d')
-            if 'datetime' in ftype_low or 'timestamp' in ftype_low:
-                return (datetime.now() - timedelta(days=random.randint(0, 3650))).strftime('%Y-%m-%d %H:%M:%S')
-            if 'char' in ftype_low or 'text' in ftype_low:
-                if 'name' in fname:
-                    return DataFactory.random_name()
-                if 'phone' in fname:
-                    return DataFactory.random_phone()
-                if 'id' in fname and 'card' not in fname:
-                    return DataFactory.random_id_number()
-                if 'plate' in fname:
-                    return DataFactory.random_plate_number()['plate_number']
-                if 'etc' in fname:
-                    return DataFactory.random_etc_number()
-                if 'obn' in fname:
-                    return DataFactory.random_obn_number()
-                if 'device' in fname:
-                    return DataFactory.random_device_id()
-                if 'order' in fname:
-                    return DataFactory.random_order_id()
-                if 'card' in fname:
-                    return DataFactory.random_bank_card()
-                if 'bank' in fname:
-                    return DataFactory.random_bank_address()
-                return 'teststr'
-            return 'test'
+        return gen_value(rule, field, ftype, extra)
 
     def stop(self):
         """
         停止线程，安全取消插入
         """
         self._is_running = False
+
+
+class DataGenPlanWorker(QThread):
+    """
+    多表造数线程：按造数计划（GenPlan）依次/并行生成有关联的多张表
+    """
+    progress = pyqtSignal(int)    # 进度百分比信号（所有表合计）
+    finished = pyqtSignal(str)    # 完成信号
+    error = pyqtSignal(str)       # 错误信号
+    stats = pyqtSignal(dict)      # 吞吐信号（所有表合计）
+
+    def __init__(self, config, spec, bulk_load=False, server_side=True):
+        super().__init__()
+        self.config = config      # 数据库连接配置，计划中指定database时以计划为准
+        self.spec = spec          # 造数计划，格式见 services/gen_plan.py
+        self.bulk_load = bulk_load
+        self.server_side = server_side
+        self._is_running = True   # 线程运行标志
+
+    def run(self):
+        """
+        线程主函数：解析计划后按拓扑层级执行
+        """
+        done_tables = []
+        try:
+            plan = GenPlan(self.config, self.spec, self.bulk_load, self.server_side)
+            plan.build()
+            results = plan.run(on_progress=self._emit_progress, is_cancelled=lambda: not self._is_running,
+                               on_stats=self.stats.emit,
+                               on_table_done=lambda table, n: done_tables.append(f'{table}: {n}条'))
+            lines = [f'{table}: {n}条' for table, n in results.items()]
+            report = [f'{table}: {format_phase_timings(t)}' for table, t in plan.timings.items() if t]
+            title = '多表造数完成' if self._is_running else '已取消多表造数'
+            msg = f'{title}（执行顺序：{" -> ".join("/".join(level) for level in plan.levels)}）\n' + '\n'.join(lines)
+            if report:
+                msg += '\n耗时：\n' + '\n'.join(report)
+            self.finished.emit(msg)
+        except Exception as e:
+            done = '\n已完成：' + '，'.join(done_tables) if done_tables else ''
+            self.error.emit(f'{e}{done}')
+
+    def _emit_progress(self, inserted, total):
+        self.progress.emit(int(inserted * 100 / total) if total else 100)
+
+    def stop(self):
+        """
+        停止线程，当前各表提交已写入的部分后停止，后续层级不再执行
+        """
+        self._is_running = False
+
+
+class DataProfileWorker(QThread):
+    """
+    数据画像采集线程：抽样读取表数据并统计各列分布，完成后保存画像文件
+    """
+    progress = pyqtSignal(int)    # 进度百分比信号
+    finished = pyqtSignal(dict)   # 完成信号，参数为画像
+    error = pyqtSignal(str)       # 错误信号
+
+    def __init__(self, config, dbname, table):
+        super().__init__()
+        self.config = config      # 数据库连接配置
+        self.dbname = dbname      # 数据库名
+        self.table = table        # 表名
+        self._is_running = True   # 线程运行标志
+
+    def run(self):
+        try:
+            profiler = TableProfiler(self.config, self.dbname, self.table)
+            profile = profiler.profile(
+                on_progress=lambda done, total: self.progress.emit(min(99, int(done * 100 / total))),
+                is_cancelled=lambda: not self._is_running
+            )
+            TableProfiler.save(profile)
+            self.finished.emit(profile)
+        except Exception as e:
+            self.error.emit(f'采集数据画像失败：{e}')
+
+    def stop(self):
+        self._is_running = False
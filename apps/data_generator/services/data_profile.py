@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 数据画像：从已有表学习各列的取值分布，再按分布造数
+# TableProfiler 用流式查询抽样读取表数据，逐列统计：
+#   空值比例、不同值个数（基数）、Top-K高频值及占比、
+#   数值/日期的等频直方图（分位点）、字符串长度分布和字符分布
+# 画像保存为项目根目录下 temp/data_gen_profiles/库名.表名.json，界面和命令行共用
+# compile_profile_column 把单列画像编译成生成函数（规则名“数据画像”），用NumPy整批抽样：
+#   先按空值比例置空，再按Top-K占比取高频值，其余按直方图/长度+字符分布生成
+#   （直方图、长度和字符分布只统计Top-K以外的值，高频值不会被重复抽到）；
+#   低基数列从固定大小的值池中取，保持与原表相近的不同值个数；接近唯一的整数列从原最大值之后递增
+# -------------------------------------------------------------
+import json
+import os
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from common.mysql_util import MySQLUtil
+from common.path_util import resource_path
+from common.schema_cache import schema_cache
+
+PROFILE_DIR = resource_path(os.path.join('temp', 'data_gen_profiles'))  # 画像保存目录
+PROFILE_RULE = '数据画像'         # 使用画像造数的规则名
+SAMPLE_ROWS = 100000              # 默认抽样行数
+TOP_K = 50                        # 保存的高频值个数
+HISTOGRAM_BINS = 50               # 数值/日期直方图的桶数（等频分桶，偏态分布也能还原）
+MAX_TRACKED_DISTINCT = 200000     # 每列最多精确统计的不同值个数，超过后基数按下限估计
+MAX_CHAR_SAMPLES = 20000          # 每列统计字符分布时最多取的值个数
+MAX_ALPHABET = 500                # 保存的字符种类上限
+LOW_CARDINALITY_RATIO = 0.5       # 不同值个数/非空行数低于该比例时视为低基数列，从值池取值
+UNIQUE_RATIO = 0.99               # 高于该比例视为唯一列：不抽高频值，整数列递增生成
+MAX_POOL_SIZE = 1000000           # 低基数列值池上限
+PROFILE_CHUNK = 10000             # 每次整批抽样的数量
+EPOCH = datetime(1970, 1, 1)
+
+
+def column_kind(ftype):
+    """按MySQL类型归类：int / float / date / datetime / string"""
+    ftype_low = ftype.lower()
+    if 'int' in ftype_low:
+        return 'int'
+    if 'decimal' in ftype_low or 'float' in ftype_low or 'double' in ftype_low:
+        return 'float'
+    if 'datetime' in ftype_low or 'timestamp' in ftype_low:
+        return 'datetime'
+    if 'date' in ftype_low:
+        return 'date'
+    return 'string'
+
+
+def _to_number(kind, value):
+    """数值/日期统一转为数字做直方图：日期按天，日期时间按秒"""
+    if kind == 'date':
+        if isinstance(value, datetime):
+            value = value.date()
+        return value.toordinal() if isinstance(value, date) else None
+    if kind == 'datetime':
+        return (value - EPOCH).total_seconds() if isinstance(value, datetime) else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _from_numbers(kind, numbers, scale=2):
+    """_to_number 的逆转换，numbers 为NumPy数组，返回Python值列表"""
+    if kind == 'int':
+        return numbers.astype('int64').tolist()
+    if kind == 'float':
+        return numbers.round(scale).tolist()
+    if kind == 'date':
+        return [date.fromordinal(int(n)).strftime('%Y-%m-%d') for n in numbers]
+    return [(EPOCH + timedelta(seconds=int(n))).strftime('%Y-%m-%d %H:%M:%S') for n in numbers]
+
+
+def _format_time(value):
+    """TIME列的值（timedelta）按MySQL格式转字符串，如 -01:30:00、838:59:59"""
+    micros = value.days * 86400000000 + value.seconds * 1000000 + value.microseconds
+    sign = '-' if micros < 0 else ''
+    seconds, micros = divmod(abs(micros), 1000000)
+    text = f'{sign}{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}'
+    return f'{text}.{micros:06d}' if micros else text
+
+
+def _json_value(value):
+    """画像中保存的值：日期/时间转字符串，Decimal转float，bytes按utf-8解码，其他非JSON类型转字符串"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, timedelta):
+        return _format_time(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class _ColumnStats:
+    """单列统计累加器"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.nulls = 0
+        self.values = Counter()
+        self.capped = False
+        self.numbers = []
+        self.lengths = Counter()
+        self.chars = Counter()
+        self.char_samples = 0
+        self.char_sampled_values = Counter()  # 参与字符统计的值及次数，画像时扣除高频值
+        self.value_numbers = {}               # 已统计的值 -> 数字，画像时据此剔除高频值
+        self.scale = 0
+
+    def add(self, value):
+        self.rows += 1
+        if value is None:
+            self.nulls += 1
+            return
+        key = _json_value(value)
+        tracked = key in self.values or len(self.values) < MAX_TRACKED_DISTINCT
+        if tracked:
+            self.values[key] += 1
+        else:
+            self.capped = True
+        if self.kind == 'string':
+            text = str(key)
+            self.lengths[len(text)] += 1
+            if self.char_samples < MAX_CHAR_SAMPLES:
+                self.chars.update(text)
+                self.char_samples += 1
+                if tracked:
+                    self.char_sampled_values[key] += 1
+        else:
+            number = _to_number(self.kind, value)
+            if number is not None:
+                self.numbers.append(number)
+                if tracked:
+                    self.value_numbers[key] = number
+            if self.kind == 'float' and isinstance(value, Decimal):
+                self.scale = max(self.scale, -value.as_tuple().exponent)
+
+    def to_profile(self, top_k, bins):
+        import numpy
+        non_null = self.rows - self.nulls
+        distinct = len(self.values)
+        top = self.values.most_common(top_k) if non_null else []
+        cardinality_ratio = distinct / non_null if non_null else 0.0
+        profile = {
+            'kind': self.kind,
+            'rows': self.rows,
+            'null_ratio': self.nulls / self.rows if self.rows else 0.0,
+            'distinct': distinct,
+            'distinct_capped': self.capped,
+            'cardinality_ratio': cardinality_ratio,
+            'top': [[value, count / non_null] for value, count in top],
+        }
+        # 生成时先按占比取高频值，其余部分的分布要扣除高频值，否则高频值会被再抽一次
+        # （接近唯一的列生成时不单独抽高频值，按全部值统计）
+        if cardinality_ratio >= UNIQUE_RATIO:
+            top = []
+        if self.kind == 'string':
+            lengths = Counter(self.lengths)
+            chars = Counter(self.chars)
+            for value, count in top:
+                text = str(value)
+                lengths[len(text)] -= count
+                sampled = self.char_sampled_values.get(value, 0)
+                if sampled:
+                    for c, n in Counter(text).items():
+                        chars[c] -= n * sampled
+            lengths = +lengths
+            chars = +chars
+            # 全部是高频值时保留原分布，避免其余部分没有可用的分布
+            profile['lengths'] = sorted([length, count] for length, count in (lengths or self.lengths).items())
+            profile['chars'] = [[c, n] for c, n in (chars or self.chars).most_common(MAX_ALPHABET)]
+        elif self.numbers:
+            all_numbers = numpy.asarray(self.numbers, dtype='float64')
+            numbers = all_numbers
+            top_numbers = [self.value_numbers[value] for value, _ in top if value in self.value_numbers]
+            if top_numbers:
+                rest = all_numbers[~numpy.isin(all_numbers, numpy.asarray(top_numbers, dtype='float64'))]
+                if len(rest):
+                    numbers = rest
+            # 等频分桶：边界取分位点，每桶行数相同；大量重复值时相邻边界相等，生成时即取该值
+            edges = numpy.quantile(numbers, numpy.linspace(0, 1, bins + 1))
+            counts = [len(numbers) / bins] * bins
+            profile['min'] = float(all_numbers.min())
+            profile['max'] = float(all_numbers.max())
+            profile['histogram'] = {'edges': edges.tolist(), 'counts': counts}
+            if self.kind == 'float':
+                profile['scale'] = self.scale or 2
+        return profile
+
+
+class TableProfiler:
+    """
+    表数据画像采集
+    """
+
+    def __init__(self, config, database, table, sample_rows=SAMPLE_ROWS, top_k=TOP_K, bins=HISTOGRAM_BINS):
+        self.config = dict(config, database=database)
+        self.database = database
+        self.table = table
+        self.sample_rows = sample_rows
+        self.top_k = top_k
+        self.bins = bins
+
+    def _sample_sql(self, db, fields):
+        """表行数（估计值）超过抽样行数时按比例随机抽样，否则全表读取"""
+        columns = ','.join(f'`{f}`' for f in fields)
+        rows = db.query(
+            "SELECT TABLE_ROWS AS table_rows FROM information_schema.TABLES WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s",
+            (self.database, self.table)
+        )
+        table_rows = int(rows[0]['table_rows'] or 0) if rows else 0
+        sql = f"SELECT {columns} FROM `{self.table}`"
+        if table_rows > self.sample_rows:
+            # 多取一些再LIMIT，避免抽样不足
+            sql += f" WHERE RAND() < {min(1.0, self.sample_rows * 1.2 / table_rows):.6f}"
+        return sql + f" LIMIT {int(self.sample_rows)}", table_rows
+
+    def profile(self, on_progress=None, is_cancelled=None):
+        """
+        流式抽样并统计
+        :param on_progress: 回调 on_progress(已读取行数, 抽样行数)
+        :return: 画像dict：{'database', 'table', 'table_rows', 'sampled', 'created_at', 'columns': {字段: 列画像}}
+        """
+        is_cancelled = is_cancelled or (lambda: False)
+        meta = schema_cache.get_table_fields(self.config, self.database, self.table)
+        if not meta:
+            raise Exception(f'表 {self.database}.{self.table} 不存在')
+        fields = [f['Field'] for f in meta]
+        stats = [_ColumnStats(column_kind(f['Type'])) for f in meta]
+        db = MySQLUtil(**self.config)
+        db.connect()
+        sampled = 0
+        try:
+            sql, table_rows = self._sample_sql(db, fields)
+            for row in db.iter_query(sql, as_dict=False, fetch_size=5000):
+                for i, value in enumerate(row):
+                    stats[i].add(value)
+                sampled += 1
+                if sampled % 10000 == 0:
+                    if on_progress:
+                        on_progress(sampled, self.sample_rows)
+                    if is_cancelled():
+                        break
+        finally:
+            db.close()
+        if not sampled:
+            raise Exception(f'表 {self.database}.{self.table} 没有数据，无法采集画像')
+        return {
+            'database': self.database,
+            'table': self.table,
+            'table_rows': table_rows,
+            'sampled': sampled,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'columns': {
+                field: dict(stats[i].to_profile(self.top_k, self.bins), type=meta[i]['Type'])
+                for i, field in enumerate(fields)
+            },
+        }
+
+    @staticmethod
+    def path(database, table):
+        return os.path.join(PROFILE_DIR, f'{database}.{table}.json')
+
+    @staticmethod
+    def save(profile):
+        """原子写入画像文件，返回路径"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = TableProfiler.path(profile['database'], profile['table'])
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def load(database, table):
+        """读取已保存的画像，不存在时返回None"""
+        path = TableProfiler.path(database, table)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def summary(profile):
+        """画像摘要，每列一行"""
+        lines = [f"{profile['database']}.{profile['table']}：抽样{profile['sampled']}行（表约{profile['table_rows']}行）"]
+        for field, col in profile['columns'].items():
+            distinct = f"{col['distinct']}{'+' if col['distinct_capped'] else ''}"
+            top = col['top'][0] if col['top'] else None
+            top_text = f"，最高频 {top[0]}（{top[1]:.1%}）" if top else ''
+            lines.append(f"{field}: 空值{col['null_ratio']:.1%}，不同值{distinct}{top_text}")
+        return '\n'.join(lines)
+
+
+def _tail_sampler(col, np_rng):
+    """非高频部分的整批生成函数 batch(n) -> list"""
+    import numpy
+    kind = col['kind']
+    if kind == 'string':
+        lengths = col.get('lengths') or [[8, 1]]
+        length_values = numpy.array([length for length, _ in lengths])
+        length_p = numpy.array([count for _, count in lengths], dtype='float64')
+        length_p /= length_p.sum()
+        chars = col.get('chars') or [[c, 1] for c in '0123456789abcdef']
+        alphabet = numpy.array([c for c, _ in chars])
+        char_p = numpy.array([count for _, count in chars], dtype='float64')
+        char_p /= char_p.sum()
+
+        def batch(n):
+            sizes = np_rng.choice(length_values, size=n, p=length_p)
+            picked = np_rng.choice(alphabet, size=int(sizes.sum()), p=char_p).tolist()
+            result = []
+            pos = 0
+            for size in sizes.tolist():
+                result.append(''.join(picked[pos:pos + size]))
+                pos += size
+            return result
+        return batch
+    histogram = col.get('histogram')
+    if not histogram:
+        return lambda n: [None] * n
+    edges = numpy.asarray(histogram['edges'], dtype='float64')
+    counts = numpy.asarray(histogram['counts'], dtype='float64')
+    bin_p = counts / counts.sum()
+    if kind == 'int' and col['cardinality_ratio'] >= UNIQUE_RATIO:
+        # 接近唯一的整数列（如ID）：从原最大值之后递增，避免重复
+        state = {'next': int(col['max']) + 1}
+
+        def batch(n):
+            start = state['next']
+            state['next'] += n
+            return list(range(start, start + n))
+        return batch
+    scale = col.get('scale', 2)
+
+    def batch(n):
+        bins = np_rng.choice(len(bin_p), size=n, p=bin_p)
+        numbers = edges[bins] + np_rng.random(n) * (edges[bins + 1] - edges[bins])
+        if kind == 'int':
+            numbers = numpy.floor(numbers)
+        return _from_numbers(kind, numbers, scale)
+    return batch
+
+
+def compile_profile_column(col, rng):
+    """
+    把单列画像编译成无参生成函数（内部按 PROFILE_CHUNK 整批抽样）
+    :param col: 列画像（TableProfiler.profile 结果中的 columns[字段]）
+    :param rng: random.Random，NumPy随机流的种子取自它，同一种子结果可复现
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise Exception('按数据画像造数需要安装numpy')
+    np_rng = numpy.random.default_rng(rng.getrandbits(64))
+    # 接近唯一的列高频值都只出现一次，不再单独抽取
+    top = (col.get('top') or []) if col.get('cardinality_ratio', 0.0) < UNIQUE_RATIO else []
+    top_values = [value for value, _ in top]
+    top_p = numpy.array([share for _, share in top], dtype='float64')
+    top_share = float(min(1.0, top_p.sum())) if top else 0.0
+    if top:
+        top_p /= top_p.sum()
+    null_ratio = col.get('null_ratio', 0.0)
+    tail = _tail_sampler(col, np_rng)
+    if top and top_share < 1.0 and col['cardinality_ratio'] < LOW_CARDINALITY_RATIO and not col['distinct_capped']:
+        # 低基数列：其余值也从固定大小的值池中取，不同值个数与原表相当
+        size = max(1, min(MAX_POOL_SIZE, col['distinct'] - len(top)))
+        pool = tail(size)
+        if col['kind'] == 'string':
+            # 随机拼出的字符串会有重复，去重后补足几轮，尽量接近原表的不同值个数
+            # （数值列不去重，否则密集区间的值被去掉，分布会变平）
+            pool = list(dict.fromkeys(pool))
+            for _ in range(3):
+                if len(pool) >= size:
+                    break
+                pool = list(dict.fromkeys(pool + tail(size - len(pool))))
+        tail = lambda n: [pool[i] for i in np_rng.integers(0, len(pool), size=n).tolist()]
+
+    def batch(n):
+        result = [None] * n
+        filled = (np_rng.random(n) >= null_ratio).nonzero()[0].tolist()
+        if not filled:
+            return result
+        use_top = np_rng.random(len(filled)) < top_share
+        top_idx = [i for i, flag in zip(filled, use_top.tolist()) if flag]
+        tail_idx = [i for i, flag in zip(filled, use_top.tolist()) if not flag]
+        if top_idx:
+            picks = np_rng.choice(len(top_values), size=len(top_idx), p=top_p).tolist()
+            for i, pick in zip(top_idx, picks):
+                result[i] = top_values[pick]
+        if tail_idx:
+            for i, value in zip(tail_idx, tail(len(tail_idx))):
+                result[i] = value
+        return result
+
+    buffer = []
+
+    def next_value():
+        if not buffer:
+            buffer.extend(reversed(batch(PROFILE_CHUNK)))
+        return buffer.pop()
+    return next_value
+
+
+def apply_profile(profile, fields, rules, extras):
+    """
+    把画像套用到规则列表：rules 中为“数据画像”的列填入对应列画像作为 extra
+    :return: 新的 extras 列表
+    """
+    columns = profile['columns'] if profile else {}
+    result = list(extras)
+    for i, field in enumerate(fields):
+        if rules[i] == PROFILE_RULE:
+            if field not in columns:
+                raise Exception(f'字段 {field} 没有数据画像，请先采集')
+            result[i] = columns[field]
+    return result
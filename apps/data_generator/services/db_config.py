@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 造数数据库连接配置
+# 读取 apps/data_generator/config/connections.json 中的第一个MySQL连接，桌面端和命令行共用
+# -------------------------------------------------------------
+import json
+import os
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'connections.json')
+
+
+def get_mysql_config(config_path=CONFIG_PATH):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    for item in configs:
+        if item['type'] == 'mysql':
+            host, port = item['address'].split(':')
+            return {
+                'host': host,
+                'port': int(port),
+                'user': item['username'],
+                'password': item['password'],
+                'database': 'test'  # 默认库，后续可切换
+            }
+    raise Exception('未找到MySQL连接信息')
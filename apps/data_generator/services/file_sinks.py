@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 造数文件输出
+# 造好的数据不写库而是写文件：CSV（可按行数分片）、多行INSERT的SQL脚本、Parquet（需安装pyarrow）
+# 每批生成后立即写出，内存占用只与批大小有关；与写库共用同一套编译好的规则
+# CSV 中 NULL 写为 \N，行尾为 \n，首行为字段名，可直接用
+#   LOAD DATA INFILE ... FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' LINES TERMINATED BY '\n' IGNORE 1 LINES
+# 导入
+# -------------------------------------------------------------
+import csv
+import os
+from common.mysql_util import MySQLUtil
+
+SQL_DUMP_PACKET = 4 * 1024 * 1024  # SQL脚本中单条INSERT的最大字节数，需不超过目标库的max_allowed_packet
+
+
+class FileSink:
+    """
+    文件输出基类：open() -> write(rows) ... -> close()，也可用 with 语句
+    """
+    suffix = ''
+
+    def __init__(self, path, table, fields, types):
+        self.path = path        # 输出文件路径（分片时为第一个文件的命名基准）
+        self.table = table      # 表名
+        self.fields = fields    # 字段名列表
+        self.types = types      # 字段类型列表
+        self.rows = 0           # 已写出行数
+        self.bytes = 0          # 已写出字节数（估算）
+        self.paths = []         # 实际生成的文件
+
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, rows):
+        """写出一批行，返回本批字节数"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class CsvSink(FileSink):
+    """
+    CSV输出，首行为字段名；rows_per_file 大于0时按行数切分为 xxx_0001.csv、xxx_0002.csv ...
+    """
+    suffix = '.csv'
+
+    def __init__(self, path, table, fields, types, rows_per_file=0, encoding='utf-8'):
+        super().__init__(path, table, fields, types)
+        self.rows_per_file = rows_per_file
+        self.encoding = encoding
+        self._file = None
+        self._writer = None
+        self._file_rows = 0
+
+    def _next_file(self):
+        self.close()
+        if self.rows_per_file:
+            base, ext = os.path.splitext(self.path)
+            path = f'{base}_{len(self.paths) + 1:04d}{ext or self.suffix}'
+        else:
+            path = self.path
+        self._file = open(path, 'w', encoding=self.encoding, newline='')
+        # csv默认行尾为\r\n，LOAD DATA 按\n分行时最后一列会带上\r
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._writer.writerow(self.fields)
+        self._file_rows = 0
+        self.paths.append(path)
+
+    def open(self):
+        super().open()
+        self._next_file()
+
+    def write(self, rows):
+        start = self._file.tell()
+        written = 0
+        nbytes = 0      # 本批跨文件切分时累计各文件写出的字节数
+        while written < len(rows):
+            if self.rows_per_file and self._file_rows >= self.rows_per_file:
+                nbytes += self._file.tell() - start
+                self._next_file()
+                start = self._file.tell()
+            n = len(rows) - written
+            if self.rows_per_file:
+                n = min(n, self.rows_per_file - self._file_rows)
+            self._writer.writerows(
+                ['\\N' if v is None else v for v in row] for row in rows[written:written + n]
+            )
+            self._file_rows += n
+            written += n
+        nbytes += self._file.tell() - start
+        self.bytes += nbytes
+        self.rows += written
+        return nbytes
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class SqlDumpSink(FileSink):
+    """
+    SQL脚本输出：多行INSERT语句，单条不超过 max_packet 字节，可用 mysql 客户端或 source 导入
+    """
+    suffix = '.sql'
+
+    def __init__(self, path, table, fields, types, max_packet=SQL_DUMP_PACKET, mode='insert'):
+        super().__init__(path, table, fields, types)
+        self.max_packet = max_packet
+        self.mode = mode
+        self._file = None
+
+    def open(self):
+        super().open()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write('SET NAMES utf8mb4;\n')
+        self.paths.append(self.path)
+
+    def write(self, rows):
+        nbytes = 0
+        for sql in MySQLUtil.render_insert_sqls(self.table, self.fields, rows, self.max_packet, self.mode):
+            self._file.write(sql)
+            self._file.write(';\n')
+            nbytes += len(sql) + 2
+        self.bytes += nbytes
+        self.rows += len(rows)
+        return nbytes
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class ParquetSink(FileSink):
+    """
+    Parquet输出（需安装pyarrow），每批写成一个row group
+    列类型按MySQL类型映射：整数 -> int64，小数/浮点 -> float64，其余 -> string
+    """
+    suffix = '.parquet'
+
+    def __init__(self, path, table, fields, types, compression='snappy'):
+        super().__init__(path, table, fields, types)
+        self.compression = compression
+        self._writer = None
+
+    def open(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise Exception('导出Parquet需要安装pyarrow：pip install pyarrow')
+        super().open()
+        self._pa = pyarrow
+        columns = []
+        self._converters = []
+        for field, ftype in zip(self.fields, self.types):
+            ftype_low = ftype.lower()
+            if 'int' in ftype_low:
+                columns.append(pyarrow.field(field, pyarrow.int64()))
+                self._converters.append(int)
+            elif 'decimal' in ftype_low or 'float' in ftype_low or 'double' in ftype_low:
+                columns.append(pyarrow.field(field, pyarrow.float64()))
+                self._converters.append(float)
+            else:
+                columns.append(pyarrow.field(field, pyarrow.string()))
+                self._converters.append(str)
+        self._schema = pyarrow.schema(columns)
+        self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema, compression=self.compression)
+        self.paths.append(self.path)
+
+    def write(self, rows):
+        pa = self._pa
+        arrays = []
+        for i, convert in enumerate(self._converters):
+            arrays.append(pa.array([None if row[i] is None else convert(row[i]) for row in rows],
+                                   type=self._schema.field(i).type))
+        batch = pa.Table.from_arrays(arrays, schema=self._schema)
+        self._writer.write_table(batch)
+        self.rows += len(rows)
+        self.bytes += batch.nbytes
+        return batch.nbytes
+
+    def close(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+
+SINK_FORMATS = {
+    'csv': CsvSink,
+    'sql': SqlDumpSink,
+    'parquet': ParquetSink,
+}
+
+
+def create_sink(fmt, path, table, fields, types, **options):
+    """
+    按格式名创建文件输出
+    :param fmt: csv / sql / parquet
+    :param options: 各格式的额外参数，如 CSV 的 rows_per_file、SQL 的 max_packet
+    """
+    sink_cls = SINK_FORMATS.get(fmt)
+    if sink_cls is None:
+        raise Exception(f'不支持的输出格式：{fmt}，可选 {", ".join(SINK_FORMATS)}')
+    return sink_cls(path, table, fields, types, **options)
@@ -0,0 +1,514 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 造数执行引擎（不依赖PyQt）
+# run()          串行：单连接边生成边插入
+# run_parallel() 并行：多个造数子进程各自用独立种子的随机流生成行并拼好INSERT语句，
+#                放入有界队列；多个写入线程各持一个连接并发执行
+# run_auto()     按条件选择：数据库端 -> 并行 -> 串行，桌面端和命令行共用
+# run_to_sink()  写文件：逐批生成后交给 FileSink（CSV/SQL/Parquet），不连接数据库
+# run_server_side() 数据库端：规则全部可用SQL表达时，用 INSERT ... SELECT 在MySQL内部分段生成
+# 进度、吞吐统计和取消通过回调传入，桌面端线程和命令行都可复用
+# 客户端写入时批大小由 AdaptiveBatchSizer 在运行中调整
+# bulk_load=True 时写入连接进入批量导入模式（见 BulkLoadSession），各阶段耗时记录在 timings
+# on_commit 在每次提交后回调，用于落盘检查点（见 models/gen_job.py）
+# overrides/captures 供多表造数使用（见 gen_plan.py）：外键列从父表键池取值，被引用的键列写入后存入键池
+# -------------------------------------------------------------
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import threading
+import time
+from common.mysql_util import BulkLoadSession, MySQLUtil, merge_phase_timings
+from common.snowflake import MAX_WORKER_ID, default_worker_id, set_default_worker_id
+from apps.data_generator.services.batch_tuner import (
+    MAX_RETRIES, AdaptiveBatchSizer, ThroughputMeter, estimate_row_bytes, mysql_error_code
+)
+from apps.data_generator.services.rule_compiler import compile_rules, make_row_factory
+from apps.data_generator.services.sql_rule_compiler import SQL_CHUNK_ROWS, build_insert_select, compile_sql_rules
+
+QUEUE_BATCHES_PER_PROCESS = 4  # 每个造数进程在队列里最多积压的批数，防止内存无限增长
+POLL_INTERVAL = 0.2            # 主循环检查取消和子进程状态的间隔（秒）
+FILE_BATCH_ROWS = 10000        # 写文件时每批生成条数
+# 数据库端造数不可用时的错误码，只有这些才回退到客户端造数：语法错误 / 未知系统变量（MySQL 5.7无递归CTE）/ 不支持的功能
+SERVER_SIDE_UNSUPPORTED_ERRORS = (1064, 1193, 1235)
+
+
+def _put_until_stopped(q, item, stop_event):
+    """队列满时阻塞等待，收到停止信号立即放弃，返回是否放入成功"""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _generate_process(job, worker_no, snowflake_worker_id, seed, rows, max_packet, batch_size, out_queue,
+                      stop_event):
+    """
+    造数子进程入口：按独立种子编译规则，分批生成行并渲染成INSERT语句放入队列
+    每批行数取自共享的 batch_size（由主进程按写入耗时调整）
+    队列消息：('batch', [sql, ...], 行数, 字节数) / ('done', worker_no) / ('error', 错误信息)
+    """
+    # 忽略Ctrl+C：终端的SIGINT会发给整个进程组，子进程由主进程通过 stop_event 停止，
+    # 否则子进程先于主进程退出，取消会被当成“造数进程异常退出”
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        set_default_worker_id(snowflake_worker_id)
+        generators = compile_rules(job['fields'], job['types'], job['rules'], job['extras'], random.Random(seed))
+        make_row = make_row_factory(generators, job['max_lengths'])
+        remaining = rows
+        while remaining > 0 and not stop_event.is_set():
+            n = min(batch_size.value, remaining)
+            batch = [make_row() for _ in range(n)]
+            sqls = list(MySQLUtil.render_insert_sqls(job['table'], job['fields'], batch, max_packet))
+            nbytes = sum(len(sql) for sql in sqls)
+            if not _put_until_stopped(out_queue, ('batch', sqls, n, nbytes), stop_event):
+                return
+            remaining -= n
+        _put_until_stopped(out_queue, ('done', worker_no), stop_event)
+    except Exception as e:
+        _put_until_stopped(out_queue, ('error', f'造数进程{worker_no}出错: {e}'), stop_event)
+
+
+class DataGenEngine:
+    """
+    单表造数执行引擎
+    """
+    batch_size = 1000  # 初始每批生成条数，运行中自适应调整（单批内按包大小拆分SQL）
+
+    def __init__(self, config, table, fields, types, rules, count, extras=None, max_lengths=None, bulk_load=False,
+                 rng=None, on_commit=None, overrides=None, captures=None):
+        self.config = config              # 数据库连接配置（含database）
+        self.table = table                # 表名
+        self.fields = fields              # 字段名列表
+        self.types = types                # 字段类型列表
+        self.rules = rules                # 造数规则列表
+        self.count = count                # 总插入条数
+        self.extras = extras or [None] * len(fields)  # 规则额外参数
+        self.max_lengths = max_lengths    # 各列字符最大长度，超长截断
+        self.bulk_load = bulk_load        # 是否使用批量导入模式
+        self.rng = rng                    # 串行模式的随机数发生器（random.Random），续跑时传入恢复后的状态
+        self.on_commit = on_commit        # 提交回调 on_commit(本次执行累计提交条数, 随机数状态或None)
+        self.overrides = overrides or {}  # 覆盖规则的列 {字段名: factory(rng) -> 无参生成函数}
+        self.captures = captures or {}    # 写入后收集取值的列 {字段名: KeyPool}
+        self.timings = {}                 # 最近一次执行的各阶段耗时（秒）
+
+    def _session(self, db, table=None):
+        """
+        写入会话：批量导入模式下关闭检查并合并提交；普通模式每批提交一次，不改会话变量
+        """
+        if self.bulk_load:
+            return BulkLoadSession(db, table)
+        return BulkLoadSession(db, commit_rows=1, session_vars={})
+
+    def _compile_generators(self, rng):
+        """编译各列生成函数，overrides 中的列替换为指定生成函数"""
+        generators = list(compile_rules(self.fields, self.types, self.rules, self.extras, rng))
+        for i, field in enumerate(self.fields):
+            if field in self.overrides:
+                generators[i] = self.overrides[field](rng)
+        return generators
+
+    def _report(self, on_progress, on_stats, meter, done, batch_size=None, force=False):
+        if on_progress:
+            on_progress(done, self.count)
+        if on_stats and (force or meter.due()):
+            on_stats(meter.snapshot(done, batch_size))
+
+    def run(self, on_progress=None, is_cancelled=None, on_stats=None):
+        """
+        串行造数：单连接逐批生成并插入
+        :param on_progress: 回调 on_progress(已插入, 总数)
+        :param is_cancelled: 无参回调，返回True时尽快停止
+        :param on_stats: 回调 on_stats(dict)，内容见 ThroughputMeter.snapshot
+        :return: 实际插入条数
+        """
+        is_cancelled = is_cancelled or (lambda: False)
+        db = MySQLUtil(**self.config)
+        db.connect()
+        inserted = 0
+        sizer = AdaptiveBatchSizer(self.batch_size)
+        meter = ThroughputMeter(self.count)
+        rng = self.rng or random.Random()
+        session = self._session(db, self.table)
+        if self.on_commit:
+            session.on_commit = lambda rows: self.on_commit(session.committed_rows, rng.getstate())
+        try:
+            with session:
+                # 规则在循环外一次性编译，逐行只调用生成函数
+                make_row = make_row_factory(self._compile_generators(rng), self.max_lengths)
+                captures = [(self.fields.index(f), pool) for f, pool in self.captures.items()]
+                retries = 0
+                while inserted < self.count and not is_cancelled():
+                    n = min(sizer.size, self.count - inserted)
+                    with session.phase('generate'):
+                        batch = [make_row() for _ in range(n)]
+                    row_bytes = estimate_row_bytes(batch)
+                    sizer.cap_by_row_bytes(row_bytes, db.get_max_packet())
+                    start = time.perf_counter()
+                    try:
+                        with session.phase('insert'):
+                            # 多行INSERT，按max_allowed_packet自动切分
+                            db.bulk_insert(self.table, self.fields, batch, commit=False)
+                        # 先收集键值再计数：提交失败回滚时按丢失行数从键池尾部撤回
+                        for idx, pool in captures:
+                            pool.extend([row[idx] for row in batch])
+                        session.add_rows(n)
+                    except Exception as e:
+                        kind = sizer.on_error(e)
+                        if kind is None or retries >= MAX_RETRIES:
+                            raise
+                        retries += 1
+                        lost = session.recover()
+                        for _, pool in captures:
+                            pool.truncate(lost)
+                        if kind == 'packet':
+                            db.shrink_max_packet()
+                        inserted = session.written_rows
+                        print(f"[WARNING] 写入失败（{e}），批大小调整为{sizer.size}后重试")
+                        continue
+                    retries = 0
+                    sizer.record(n, time.perf_counter() - start)
+                    inserted = session.written_rows
+                    meter.add(n, n * row_bytes)
+                    self._report(on_progress, on_stats, meter, inserted, sizer.size)
+                self._report(None, on_stats, meter, inserted, sizer.size, force=True)
+        finally:
+            self.timings = session.timings
+            db.close()
+        return inserted
+
+    def run_auto(self, server_side=True, workers=1, seed=None, on_progress=None, is_cancelled=None, on_stats=None):
+        """
+        按条件选择执行方式：规则全部可用SQL表达时在数据库端生成（不支持时回退），
+        否则 workers 大于1时并行，其余串行
+        :return: 实际插入条数
+        """
+        inserted = None
+        exprs = self.server_side_exprs() if server_side else None
+        if exprs:
+            inserted = self.run_server_side(exprs, on_progress=on_progress, is_cancelled=is_cancelled,
+                                            on_stats=on_stats)
+        if inserted is None and workers > 1 and not (self.overrides or self.captures):
+            inserted = self.run_parallel(processes=workers, insert_workers=workers, seed=seed,
+                                         on_progress=on_progress, is_cancelled=is_cancelled, on_stats=on_stats)
+        elif inserted is None:
+            inserted = self.run(on_progress=on_progress, is_cancelled=is_cancelled, on_stats=on_stats)
+        return inserted
+
+    def run_to_sink(self, sink, on_progress=None, is_cancelled=None, on_stats=None, batch_rows=FILE_BATCH_ROWS):
+        """
+        造数写文件：逐批生成并写出，内存只保留一批
+        :param sink: file_sinks 中的输出对象，由本方法负责打开和关闭
+        :return: 实际写出条数
+        """
+        is_cancelled = is_cancelled or (lambda: False)
+        rng = self.rng or random.Random()
+        make_row = make_row_factory(self._compile_generators(rng), self.max_lengths)
+        captures = [(self.fields.index(f), pool) for f, pool in self.captures.items()]
+        meter = ThroughputMeter(self.count)
+        timings = {'generate': 0.0, 'insert': 0.0}
+        written = 0
+        try:
+            with sink:
+                while written < self.count and not is_cancelled():
+                    n = min(batch_rows, self.count - written)
+                    start = time.perf_counter()
+                    batch = [make_row() for _ in range(n)]
+                    generated = time.perf_counter()
+                    nbytes = sink.write(batch)
+                    for idx, pool in captures:
+                        pool.extend([row[idx] for row in batch])
+                    timings['generate'] += generated - start
+                    timings['insert'] += time.perf_counter() - generated
+                    written += n
+                    meter.add(n, nbytes)
+                    self._report(on_progress, on_stats, meter, written, batch_rows)
+                self._report(None, on_stats, meter, written, batch_rows, force=True)
+        finally:
+            self.timings = timings
+        return written
+
+    def server_side_exprs(self):
+        """规则全部可用SQL表达时返回各列表达式，否则返回None"""
+        if self.overrides or self.captures:
+            # 外键取值和键值收集都要经过客户端
+            return None
+        return compile_sql_rules(self.fields, self.types, self.rules, self.extras, self.max_lengths)
+
+    def run_server_side(self, exprs, on_progress=None, is_cancelled=None, chunk_rows=SQL_CHUNK_ROWS, on_stats=None):
+        """
+        数据库端造数：每段执行一条 INSERT ... WITH RECURSIVE ... SELECT，数据不经过客户端
+        :param exprs: server_side_exprs() 的结果
+        :return: 实际插入条数；数据库不支持（如MySQL 5.7无递归CTE）时返回None，由调用方回退到客户端造数，
+                 其他错误（主键冲突、锁等待超时等）照常抛出
+        """
+        is_cancelled = is_cancelled or (lambda: False)
+        db = MySQLUtil(**self.config)
+        db.connect()
+        try:
+            # 连接可能来自连接池，结束时恢复原值
+            old_depth = db.query("SELECT @@SESSION.cte_max_recursion_depth AS depth")[0]['depth']
+            db.execute_sql(f"SET SESSION cte_max_recursion_depth = {max(chunk_rows, 1000)}", commit=False)
+        except Exception as e:
+            db.close()
+            if mysql_error_code(e) not in SERVER_SIDE_UNSUPPORTED_ERRORS:
+                raise
+            print(f"[WARNING] 数据库端造数不可用，回退到客户端造数: {e}")
+            return None
+        inserted = 0
+        meter = ThroughputMeter(self.count)
+        session = self._session(db, self.table)
+        if self.on_commit:
+            session.on_commit = lambda rows: self.on_commit(session.committed_rows, None)
+        try:
+            with session:
+                while inserted < self.count and not is_cancelled():
+                    n = min(chunk_rows, self.count - inserted)
+                    sql = build_insert_select(self.table, self.fields, exprs, n)
+                    with session.phase('insert'):
+                        try:
+                            db.execute_sql(sql, commit=False)
+                        except Exception as e:
+                            if inserted or mysql_error_code(e) not in SERVER_SIDE_UNSUPPORTED_ERRORS:
+                                raise
+                            # 首段报语法/不支持错误说明服务端不支持该语法，交给调用方回退
+                            print(f"[WARNING] 数据库端造数不可用，回退到客户端造数: {e}")
+                            return None
+                    session.add_rows(n)
+                    inserted += n
+                    meter.add(n)
+                    self._report(on_progress, on_stats, meter, inserted, n)
+                self._report(None, on_stats, meter, inserted, chunk_rows, force=True)
+        finally:
+            self.timings = session.timings
+            try:
+                db.execute_sql(f"SET SESSION cte_max_recursion_depth = {int(old_depth)}", commit=False)
+            except Exception:
+                # 恢复失败时连接状态不可信，不归还连接池
+                db.close(discard=True)
+            else:
+                db.close()
+        return inserted
+
+    def _job_spec(self):
+        """传给子进程的任务描述（只含可序列化的数据，规则在子进程内编译）"""
+        return {
+            'table': self.table,
+            'fields': list(self.fields),
+            'types': list(self.types),
+            'rules': list(self.rules),
+            'extras': list(self.extras),
+            'max_lengths': self.max_lengths,
+        }
+
+    def run_parallel(self, processes=None, insert_workers=4, seed=None, on_progress=None, is_cancelled=None,
+                     on_stats=None):
+        """
+        并行造数：processes 个造数子进程 -> 有界队列 -> insert_workers 个写入线程（各自独立连接）
+        :param processes: 造数进程数，默认 CPU核数-1
+        :param insert_workers: 写入线程数（即并发连接数）
+        :param seed: 随机种子，相同种子、进程数下各进程的随机流可复现；为None时随机
+        :return: 实际插入条数
+        """
+        if self.overrides or self.captures:
+            raise Exception('外键关联的表只支持串行造数')
+        is_cancelled = is_cancelled or (lambda: False)
+        cpu_count = os.cpu_count() or 2
+        processes = max(1, min(processes or cpu_count - 1, cpu_count, self.count))
+        insert_workers = max(1, insert_workers)
+
+        # probe连接贯穿整个过程：取包大小，批量导入模式下负责暂停/恢复MyISAM表的索引维护
+        probe = MySQLUtil(**self.config)
+        probe.connect()
+        try:
+            max_packet = probe.get_max_packet()
+            keys_disabled = self.bulk_load and probe.disable_keys(self.table)
+        except Exception:
+            probe.close()
+            raise
+        try:
+            return self._run_pipeline(processes, insert_workers, seed, max_packet, on_progress, is_cancelled,
+                                      on_stats)
+        finally:
+            try:
+                if keys_disabled:
+                    probe.enable_keys(self.table)
+            finally:
+                probe.close()
+
+    def _run_pipeline(self, processes, insert_workers, seed, max_packet, on_progress, is_cancelled, on_stats):
+        """启动造数子进程和写入线程，主循环转发批次、汇报进度、处理取消和错误"""
+        # Windows和打包后的EXE只支持spawn，统一使用spawn保证行为一致
+        ctx = multiprocessing.get_context('spawn')
+        gen_queue = ctx.Queue(maxsize=processes * QUEUE_BATCHES_PER_PROCESS)
+        stop_event = ctx.Event()
+        sizer = AdaptiveBatchSizer(self.batch_size)
+        shared_batch_size = ctx.Value('i', sizer.size, lock=False)
+        seeder = random.Random(seed)
+        base_worker_id = default_worker_id()
+        job = self._job_spec()
+        share, extra = divmod(self.count, processes)
+        procs = []
+        for i in range(processes):
+            rows = share + (1 if i < extra else 0)
+            # 每个子进程使用不同的雪花机器号，避免并发生成的ID冲突
+            worker_id = (base_worker_id + i + 1) & MAX_WORKER_ID
+            p = ctx.Process(
+                target=_generate_process,
+                args=(job, i, worker_id, seeder.getrandbits(64), rows, max_packet, shared_batch_size, gen_queue,
+                      stop_event),
+                daemon=True,
+            )
+            p.start()
+            procs.append(p)
+
+        sql_queue = queue.Queue(maxsize=insert_workers * 2)
+        local_stop = threading.Event()
+        meter = ThroughputMeter(self.count)
+        state = {'inserted': 0, 'error': None}
+        state_lock = threading.Lock()
+        sessions = []
+        committed = {'rows': 0}
+        commit_lock = threading.Lock()
+
+        def add_committed(rows):
+            with commit_lock:
+                committed['rows'] += rows
+                self.on_commit(committed['rows'], None)
+
+        def write_item(db, session, item):
+            start = time.perf_counter()
+            with session.phase('insert'):
+                for sql in item[0]:
+                    db.execute_sql(sql, commit=False)
+            return time.perf_counter() - start
+
+        def insert_loop():
+            db = MySQLUtil(**self.config, pooled=False)
+            session = self._session(db)
+            if self.on_commit:
+                session.on_commit = add_committed
+            sessions.append(session)
+            uncommitted = []   # 已写入未提交的批次，锁冲突回滚后重放
+            counted_rows = 0   # 已计入插入条数但尚未提交的行数
+            retries = 0
+            try:
+                db.connect()
+                with session:
+                    while True:
+                        item = sql_queue.get()
+                        if item is None:
+                            return
+                        _, n, nbytes = item
+                        uncommitted.append(item)
+                        try:
+                            elapsed = write_item(db, session, item)
+                            session.add_rows(n)
+                        except Exception as e:
+                            with state_lock:
+                                kind = sizer.on_error(e)
+                                shared_batch_size.value = sizer.size
+                            # 子进程已按原包大小拼好SQL，包过大无法重放，只有锁冲突可以重试
+                            if kind != 'lock' or retries >= MAX_RETRIES:
+                                raise
+                            retries += 1
+                            print(f"[WARNING] 写入失败（{e}），回滚后重放{len(uncommitted)}批")
+                            session.recover()
+                            for pending in uncommitted:
+                                write_item(db, session, pending)
+                            session.add_rows(sum(pending[1] for pending in uncommitted))
+                            elapsed = None
+                        retries = 0
+                        with state_lock:
+                            state['inserted'] += n
+                            meter.add(n, nbytes)
+                            sizer.cap_by_row_bytes(nbytes / n, max_packet)
+                            if elapsed is not None:
+                                shared_batch_size.value = sizer.record(n, elapsed)
+                        if session.written_rows == session.committed_rows:
+                            uncommitted.clear()
+                            counted_rows = 0
+                        else:
+                            counted_rows += n
+            except Exception as e:
+                with state_lock:
+                    # 未提交的部分已回滚，不计入插入条数
+                    state['inserted'] -= counted_rows
+                    state['error'] = state['error'] or f'写入线程出错: {e}'
+                local_stop.set()
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=insert_loop, daemon=True) for _ in range(insert_workers)]
+        for t in threads:
+            t.start()
+
+        done = 0
+        error = None
+        last_reported = -1
+        try:
+            while done < processes:
+                if is_cancelled() or local_stop.is_set():
+                    break
+                try:
+                    msg = gen_queue.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if not any(p.is_alive() for p in procs) and gen_queue.empty():
+                        error = '造数进程异常退出'
+                        break
+                    msg = None
+                if msg is not None:
+                    if msg[0] == 'batch':
+                        if not _put_until_stopped(sql_queue, msg[1:], local_stop):
+                            break
+                    elif msg[0] == 'done':
+                        done += 1
+                    elif msg[0] == 'error':
+                        error = msg[1]
+                        break
+                with state_lock:
+                    inserted = state['inserted']
+                    stats = meter.snapshot(inserted, sizer.size) if on_stats and meter.due() else None
+                if on_progress and inserted != last_reported:
+                    on_progress(inserted, self.count)
+                    last_reported = inserted
+                if stats:
+                    on_stats(stats)
+        finally:
+            stopping = done < processes or local_stop.is_set()
+            if stopping:
+                stop_event.set()
+                local_stop.set()
+                # 取消或出错时丢弃尚未写入的批次
+                while True:
+                    try:
+                        sql_queue.get_nowait()
+                    except queue.Empty:
+                        break
+            for _ in threads:
+                sql_queue.put(None)
+            for t in threads:
+                t.join()
+            if stopping:
+                # 清空进程队列，让阻塞在put上的子进程能退出
+                while True:
+                    try:
+                        gen_queue.get_nowait()
+                    except queue.Empty:
+                        break
+            for p in procs:
+                p.join(timeout=5)
+                if p.is_alive():
+                    p.terminate()
+            gen_queue.close()
+            self.timings = merge_phase_timings(*[session.timings for session in sessions])
+
+        if error or state['error']:
+            raise Exception(error or state['error'])
+        self._report(on_progress, on_stats, meter, state['inserted'], sizer.size, force=True)
+        return state['inserted']
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 多表造数计划
+# 按外键（information_schema）或计划中声明的关联，把多张表排成拓扑层级：
+# 父表先生成，写入的键值收集到 KeyPool，子表的外键列直接从键池取值，保证各表数据能关联上
+# 同一层的表互不依赖，用多线程同时写入
+# 计划格式（JSON或YAML，YAML需安装PyYAML；示例见 plans/hcb_truck.json）：
+# {
+#   "database": "hcb",
+#   "tables": {"表名": {"count": 1000, "rules": {"字段": "规则" 或 {"rule": "枚举值", "extra": "0,1"}},
+#                       "profile": false}},
+#   "links": [{"child": "子表.字段", "parent": "父表.字段", "mode": "random" | "unique"}],
+#   "use_foreign_keys": true
+# }
+# mode=random 子表随机引用父表键值；mode=unique 按顺序一一对应（子表条数不超过父表时不重复）
+# 父表不在计划中时，从库中已有数据读取键值
+# profile=true 时未写规则的字段按已采集的数据画像生成（见 data_profile.py）
+# output_format 指定时各表导出为 output_dir 下的 表名.csv/.sql/.parquet，关联关系同样保持
+# -------------------------------------------------------------
+import json
+import os
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from common.mysql_util import MySQLUtil
+from common.schema_cache import schema_cache
+from apps.data_generator.services.batch_tuner import ThroughputMeter
+from apps.data_generator.services.data_profile import PROFILE_RULE, TableProfiler
+from apps.data_generator.services.file_sinks import SINK_FORMATS, create_sink
+from apps.data_generator.services.gen_engine import DataGenEngine
+
+LINK_RANDOM = 'random'
+LINK_UNIQUE = 'unique'
+EXISTING_KEY_LIMIT = 1000000  # 父表不在计划中时最多读取的已有键值条数
+
+
+class KeyPool:
+    """
+    父表已写入的键值，子表外键列从这里取值
+    """
+
+    def __init__(self):
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def extend(self, values):
+        self.values.extend(values)
+
+    def truncate(self, n):
+        """撤回最后 n 个键值（对应回滚的行）"""
+        if n > 0:
+            del self.values[-n:]
+
+    def sampler(self, rng, unique=False):
+        """
+        返回无参取值函数
+        :param unique: True时按写入顺序依次取值（取完从头循环），否则随机取
+        """
+        values = self.values
+        if not values:
+            raise Exception('父表没有可引用的键值')
+        if unique:
+            state = {'i': -1}
+            n = len(values)
+
+            def next_value():
+                state['i'] = (state['i'] + 1) % n
+                return values[state['i']]
+            return next_value
+        rand = rng.random
+        n = len(values)
+        return lambda: values[int(rand() * n)]
+
+
+def _split_column(ref):
+    """'表.字段' -> (表, 字段)"""
+    table, _, column = ref.partition('.')
+    if not table or not column:
+        raise Exception(f'关联字段格式应为 表.字段：{ref}')
+    return table, column
+
+
+def _is_int_type(ftype):
+    return 'int' in ftype.lower()
+
+
+def _sequence_factory(start):
+    """父表整数键：从 start 开始递增"""
+    def factory(rng):
+        state = {'next': start}
+
+        def next_value():
+            value = state['next']
+            state['next'] += 1
+            return value
+        return next_value
+    return factory
+
+
+def _uuid_hex_factory(rng):
+    """父表字符键：由rng生成的32位UUID，同一种子可复现"""
+    getrandbits = rng.getrandbits
+    return lambda: uuid.UUID(int=getrandbits(128), version=4).hex
+
+
+class GenPlan:
+    """
+    多表造数计划：build() 解析表结构和关联并排好层级，run() 按层执行
+    """
+
+    def __init__(self, config, spec, bulk_load=False, server_side=True, seed=None, workers=1, output_format=None,
+                 output_dir='.'):
+        self.spec = spec
+        self.database = spec.get('database') or config.get('database')
+        self.config = dict(config, database=self.database)
+        self.bulk_load = bulk_load        # 各表写入连接是否使用批量导入模式
+        self.server_side = server_side    # 无关联的表规则支持时在数据库端生成
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.workers = workers            # 无关联的表的并行数，大于1时多进程造数+多连接写入
+        self.output_format = output_format  # 导出文件格式 csv/sql/parquet，None为写库
+        self.output_dir = output_dir      # 导出文件目录
+        self.tables = {}   # {表名: {'count', 'fields', 'types', 'rules', 'extras', 'max_lengths', 'auto_inc'}}
+        self.links = []    # [{'child', 'child_column', 'parent', 'parent_column', 'mode'}]
+        self.levels = []   # 拓扑层级 [[表名, ...], ...]
+        self.timings = {}  # {表名: 各阶段耗时}
+
+    @staticmethod
+    def load_spec(path):
+        """读取计划文件，.yaml/.yml 按YAML解析，其余按JSON解析"""
+        with open(path, 'r', encoding='utf-8') as f:
+            if os.path.splitext(path)[1].lower() not in ('.yaml', '.yml'):
+                return json.load(f)
+            try:
+                import yaml
+            except ImportError:
+                raise Exception('读取YAML造数计划需要安装PyYAML：pip install pyyaml')
+            return yaml.safe_load(f)
+
+    def build(self):
+        """读取表结构、解析关联并排序，返回拓扑层级"""
+        tables = self.spec.get('tables') or {}
+        if not tables:
+            raise Exception('造数计划中没有表')
+        if self.output_format and self.output_format not in SINK_FORMATS:
+            raise Exception(f'不支持的输出格式：{self.output_format}，可选 {", ".join(SINK_FORMATS)}')
+        for table, conf in tables.items():
+            meta = schema_cache.get_table_fields(self.config, self.database, table)
+            if not meta:
+                raise Exception(f'表 {self.database}.{table} 不存在')
+            rules = conf.get('rules') or {}
+            profile = TableProfiler.load(self.database, table) if conf.get('profile') else None
+            if conf.get('profile') and profile is None:
+                raise Exception(f'表 {table} 没有数据画像，请先采集：'
+                                f'python -m apps.data_generator --profile --database {self.database} --table {table}')
+            info = {'count': int(conf.get('count', 1000)), 'fields': [], 'types': [], 'rules': [], 'extras': [],
+                    'max_lengths': [], 'auto_inc': set(), 'explicit': set(rules)}
+            for field in meta:
+                default_rule = PROFILE_RULE if profile and field['Field'] in profile['columns'] else '自动识别'
+                rule = rules.get(field['Field'], default_rule)
+                extra = None
+                if isinstance(rule, dict):
+                    rule, extra = rule.get('rule', '自动识别'), rule.get('extra')
+                if rule == PROFILE_RULE:
+                    if profile is None:
+                        profile = TableProfiler.load(self.database, table)
+                    if profile is None or field['Field'] not in profile['columns']:
+                        raise Exception(f'字段 {table}.{field["Field"]} 没有数据画像，请先采集')
+                    extra = profile['columns'][field['Field']]
+                if 'auto_increment' in field.get('Extra', '').lower():
+                    info['auto_inc'].add(field['Field'])
+                    rule = '自增主键（自动生成）'
+                info['fields'].append(field['Field'])
+                info['types'].append(field['Type'])
+                info['rules'].append(rule)
+                info['extras'].append(extra)
+                info['max_lengths'].append(field.get('MaxLength'))
+            self.tables[table] = info
+        self.links = self._resolve_links()
+        self.levels = self._order()
+        return self.levels
+
+    def _resolve_links(self):
+        """合并计划中声明的关联和库里的外键，声明优先"""
+        links = {}
+        for link in self.spec.get('links') or []:
+            child, child_column = _split_column(link['child'])
+            parent, parent_column = _split_column(link['parent'])
+            mode = link.get('mode', LINK_RANDOM)
+            if mode not in (LINK_RANDOM, LINK_UNIQUE):
+                raise Exception(f'不支持的关联方式 {mode}：{link["child"]}')
+            links[(child, child_column)] = {'child': child, 'child_column': child_column, 'parent': parent,
+                                            'parent_column': parent_column, 'mode': mode}
+        if self.spec.get('use_foreign_keys', True):
+            for table in self.tables:
+                for fk in schema_cache.get_table_foreign_keys(self.config, self.database, table):
+                    links.setdefault((table, fk['column']), {
+                        'child': table, 'child_column': fk['column'], 'parent': fk['ref_table'],
+                        'parent_column': fk['ref_column'], 'mode': LINK_RANDOM,
+                    })
+        result = []
+        for link in links.values():
+            if link['child'] not in self.tables:
+                continue
+            if link['child_column'] not in self.tables[link['child']]['fields']:
+                raise Exception(f'表 {link["child"]} 没有字段 {link["child_column"]}')
+            if link['parent'] == link['child']:
+                print(f"[WARNING] 忽略自关联 {link['child']}.{link['child_column']}，按原规则生成")
+                continue
+            parent = self.tables.get(link['parent'])
+            if parent is not None:
+                if link['parent_column'] not in parent['fields']:
+                    raise Exception(f'表 {link["parent"]} 没有字段 {link["parent_column"]}')
+                if link['mode'] == LINK_UNIQUE and self.tables[link['child']]['count'] > parent['count']:
+                    print(f"[WARNING] {link['child']} 条数多于 {link['parent']}，"
+                          f"{link['child_column']} 的一一对应关联会出现重复")
+            result.append(link)
+        return result
+
+    def _order(self):
+        """按关联做拓扑分层（Kahn算法），存在循环依赖时报错"""
+        deps = {table: set() for table in self.tables}
+        for link in self.links:
+            if link['parent'] in self.tables:
+                deps[link['child']].add(link['parent'])
+        levels = []
+        remaining = dict(deps)
+        while remaining:
+            level = sorted(t for t, parents in remaining.items() if not parents & set(remaining))
+            if not level:
+                raise Exception(f'表之间存在循环依赖：{", ".join(sorted(remaining))}')
+            levels.append(level)
+            for table in level:
+                del remaining[table]
+        return levels
+
+    def _load_existing_keys(self, db, table, column):
+        """父表不在计划中时读取库中已有键值"""
+        pool = KeyPool()
+        sql = f"SELECT DISTINCT `{column}` FROM `{table}` WHERE `{column}` IS NOT NULL LIMIT {EXISTING_KEY_LIMIT}"
+        for row in db.iter_query(sql, as_dict=False):
+            pool.extend([row[0]])
+        if not len(pool):
+            raise Exception(f'父表 {table}.{column} 中没有可引用的数据')
+        return pool
+
+    def _prepare(self):
+        """
+        为各表准备引擎参数：被引用的键列写入键池，外键列从键池取值
+        :return: ({表名: {'overrides', 'captures'}}, {(表, 字段): KeyPool})
+        """
+        setup = {table: {'overrides': {}, 'captures': {}} for table in self.tables}
+        pools = {}
+        db = MySQLUtil(**self.config)
+        db.connect()
+        try:
+            for link in self.links:
+                key = (link['parent'], link['parent_column'])
+                if key in pools:
+                    continue
+                parent = self.tables.get(link['parent'])
+                if parent is None:
+                    pools[key] = self._load_existing_keys(db, *key)
+                    continue
+                pools[key] = KeyPool()
+                column = link['parent_column']
+                setup[link['parent']]['captures'][column] = pools[key]
+                ftype = parent['types'][parent['fields'].index(column)]
+                if column in parent['auto_inc'] or (column not in parent['explicit'] and _is_int_type(ftype)):
+                    # 整数键（含自增）显式写入，从当前最大值之后递增，子表才能提前知道键值
+                    rows = db.query(f"SELECT COALESCE(MAX(`{column}`), 0) AS max_id FROM `{link['parent']}`")
+                    setup[link['parent']]['overrides'][column] = _sequence_factory(int(rows[0]['max_id']) + 1)
+                elif column not in parent['explicit']:
+                    setup[link['parent']]['overrides'][column] = _uuid_hex_factory
+        finally:
+            db.close()
+        for link in self.links:
+            pool = pools[(link['parent'], link['parent_column'])]
+            unique = link['mode'] == LINK_UNIQUE
+            setup[link['child']]['overrides'][link['child_column']] = (
+                lambda rng, pool=pool, unique=unique: pool.sampler(rng, unique)
+            )
+        return setup, pools
+
+    def _engine(self, table, setup):
+        info = self.tables[table]
+        overrides = setup['overrides']
+        # 自增列只有作为被引用的键时才显式写入
+        keep = [i for i, f in enumerate(info['fields']) if f not in info['auto_inc'] or f in overrides]
+        return DataGenEngine(
+            self.config, table,
+            [info['fields'][i] for i in keep], [info['types'][i] for i in keep],
+            [info['rules'][i] for i in keep], info['count'], [info['extras'][i] for i in keep],
+            [info['max_lengths'][i] for i in keep], self.bulk_load,
+            random.Random(f'{self.seed}-{table}'), overrides=overrides, captures=setup['captures'],
+        )
+
+    def run(self, on_progress=None, is_cancelled=None, on_stats=None, on_table_done=None):
+        """
+        按拓扑层级执行，同一层的表并行写入
+        :param on_progress: 回调 on_progress(所有表已插入合计, 所有表总条数)
+        :param on_stats: 回调 on_stats(dict)，所有表合计的吞吐，内容见 ThroughputMeter.snapshot
+        :param on_table_done: 回调 on_table_done(表名, 插入条数)
+        :return: {表名: 插入条数}
+        """
+        if not self.levels:
+            self.build()
+        setup, _ = self._prepare()
+        total = sum(info['count'] for info in self.tables.values())
+        meter = ThroughputMeter(total)
+        lock = threading.Lock()
+        done = {table: 0 for table in self.tables}
+        failed = threading.Event()
+
+        def cancelled():
+            return failed.is_set() or (is_cancelled is not None and is_cancelled())
+
+        def run_table(table):
+            engine = self._engine(table, setup[table])
+
+            def table_progress(inserted, _count):
+                with lock:
+                    meter.add(max(0, inserted - done[table]))
+                    done[table] = inserted
+                    current = sum(done.values())
+                    stats = meter.snapshot(current) if on_stats and meter.due() else None
+                if on_progress:
+                    on_progress(current, total)
+                if stats:
+                    on_stats(stats)
+
+            try:
+                if self.output_format:
+                    path = os.path.join(self.output_dir, table + SINK_FORMATS[self.output_format].suffix)
+                    sink = create_sink(self.output_format, path, table, engine.fields, engine.types)
+                    inserted = engine.run_to_sink(sink, table_progress, cancelled)
+                else:
+                    inserted = engine.run_auto(self.server_side, self.workers, self.seed, table_progress, cancelled)
+            except Exception:
+                failed.set()
+                raise
+            finally:
+                self.timings[table] = engine.timings
+            if on_table_done:
+                on_table_done(table, inserted)
+            return inserted
+
+        results = {}
+        for level in self.levels:
+            if cancelled():
+                break
+            with ThreadPoolExecutor(max_workers=len(level)) as pool:
+                futures = {table: pool.submit(run_table, table) for table in level}
+            errors = []
+            for table, future in futures.items():
+                try:
+                    results[table] = future.result()
+                except Exception as e:
+                    errors.append(f'{table}: {e}')
+            if errors:
+                raise Exception('多表造数失败：' + '；'.join(errors))
+            if any(results[t] < self.tables[t]['count'] for t in level):
+                # 父表未写满（已取消），子表不再继续
+                break
+        return results
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 造数规则编译器
+# 把 (规则, 字段名, 类型, 额外参数) 在造数前一次性编译成无参生成函数，
+# 逐行造数时只调用这些函数，不再重复做规则名匹配、大小写转换和枚举拆分
+# 本模块不依赖PyQt，桌面端线程和命令行都可复用
+# 车牌/ETC号/OBN号默认不对照任何库查重，需要时由调用方通过 value_indexes 显式传入已存在值索引
+# -------------------------------------------------------------
+import random
+import uuid
+from functools import partial
+from datetime import datetime, timedelta
+from common.data_factory import DataFactory
+from common.value_index import CAR_NUM_INDEX, DEVICE_NO_INDEX
+from common.identity_factory import IdentityFactory
+from apps.data_generator.services.data_profile import PROFILE_RULE, compile_profile_column
+
+DATE_RANGE_DAYS = 3650  # 随机日期范围：当前时间往前10年
+BATCH_CHUNK = 10000     # 批量生成器每次预生成的数量
+
+
+# 用户自定义日期格式转strftime格式
+# 如 YYYYMMDD -> %Y%m%d
+#    YYYY-MM-DD -> %Y-%m-%d
+def user_date_format_to_strftime(fmt):
+    fmt = fmt.replace('YYYY', '%Y').replace('MM', '%m').replace('DD', '%d')
+    return fmt
+
+
+def gen_value(rule, field, ftype, extra=None):
+    """
+    按规则生成单字段数据（逐个值解析规则，供单次生成和基准对比使用）
+    """
+    if rule == '随机姓名':
+        return DataFactory.random_name()
+    elif rule == '随机手机号':
+        return DataFactory.random_phone()
+    elif rule == '随机身份证':
+        return DataFactory.random_id_number()
+    elif rule == '随机车牌':
+        return DataFactory.random_plate_number()['plate_number']
+    elif rule == '随机ETC号':
+        return DataFactory.random_etc_number()
+    elif rule == '随机OBN号':
+        return DataFactory.random_obn_number()
+    elif rule == '随机设备号':
+        return DataFactory.random_device_id()
+    elif rule == '随机订单号':
+        return DataFactory.random_order_id()
+    elif rule == '随机银行卡号':
+        return DataFactory.random_bank_card()
+    elif rule == '随机银行地址':
+        return DataFactory.random_bank_address()
+    elif rule == '雪花ID':
+        return DataFactory.random_snowflake_id()
+    elif rule == 'UUID':
+        return str(uuid.uuid4())
+    elif rule == '固定值':
+        return extra if extra is not None else 'test'
+    elif rule == '枚举值':
+        if extra:
+            enums = [v.strip() for v in extra.split(',') if v.strip()]
+            return random.choice(enums) if enums else '0'
+        return '0'
+    elif rule == '随机日期':
+        fmt = extra if extra else 'YYYY-MM-DD'
+        strftime_fmt = user_date_format_to_strftime(fmt)
+        dt = datetime.now() - timedelta(days=random.randint(0, DATE_RANGE_DAYS))
+        try:
+            return dt.strftime(strftime_fmt)
+        except Exception:
+            return dt.strftime('%Y%m%d')
+    elif rule == '自增主键（自动生成）':
+        return None
+    elif rule == PROFILE_RULE:
+        return compile_profile_column(extra, random.Random())()
+    else:
+        # 自动识别类型
+        ftype_low = ftype.lower()
+        fname = field.lower()
+        if 'int' in ftype_low:
+            if 'bigint' in ftype_low:
+                return random.randint(1000000000, 9999999999)
+            return random.randint(1, 100000)
+        if 'decimal' in ftype_low or 'float' in ftype_low or 'double' in ftype_low:
+            return round(random.uniform(1, 10000), 2)
+        if 'date' in ftype_low and 'time' not in ftype_low:
+            return (datetime.now() - timedelta(days=random.randint(0, DATE_RANGE_DAYS))).strftime('%Y-%m-%d')
+        if 'datetime' in ftype_low or 'timestamp' in ftype_low:
+            return (datetime.now() - timedelta(days=random.randint(0, DATE_RANGE_DAYS))).strftime('%Y-%m-%d %H:%M:%S')
+        if 'char' in ftype_low or 'text' in ftype_low:
+            if 'name' in fname:
+                return DataFactory.random_name()
+            if 'phone' in fname:
+                return DataFactory.random_phone()
+            if 'id' in fname and 'card' not in fname:
+                return DataFactory.random_id_number()
+            if 'plate' in fname:
+                return DataFactory.random_plate_number()['plate_number']
+            if 'etc' in fname:
+                return DataFactory.random_etc_number()
+            if 'obn' in fname:
+                return DataFactory.random_obn_number()
+            if 'device' in fname:
+                return DataFactory.random_device_id()
+            if 'order' in fname:
+                return DataFactory.random_order_id()
+            if 'card' in fname:
+                return DataFactory.random_bank_card()
+            if 'bank' in fname:
+                return DataFactory.random_bank_address()
+            return 'teststr'
+        return 'test'
+
+
+def _const(value):
+    return lambda: value
+
+
+def _choice_of(values, rng):
+    """从预先算好的候选值里随机取一个"""
+    values = tuple(values)
+    n = len(values)
+    rand = rng.random
+    return lambda: values[int(rand() * n)]
+
+
+def _date_pool(strftime_fmt, fallback_fmt):
+    """
+    随机日期只有 DATE_RANGE_DAYS+1 种取值，编译时一次性格式化好，造数时直接按下标取
+    """
+    now = datetime.now()
+    days = [now - timedelta(days=d) for d in range(DATE_RANGE_DAYS + 1)]
+    try:
+        return [d.strftime(strftime_fmt) for d in days]
+    except Exception:
+        return [d.strftime(fallback_fmt) for d in days]
+
+
+def _plate_number(index=None):
+    return DataFactory.random_plate_number(index=index)['plate_number']
+
+
+def _buffered(batch_fn, chunk):
+    """一次批量生成chunk个值放入缓冲区，逐个取出"""
+    buffer = []
+
+    def next_value():
+        if not buffer:
+            buffer.extend(reversed(batch_fn(chunk)))
+        return buffer.pop()
+    return next_value
+
+
+def _numpy_batched(batch_fn, scalar_fn, rng, chunk=BATCH_CHUNK):
+    """
+    用 DataFactory 的NumPy批量方法一次生成一整段值，逐个取出；未安装numpy时退回单条生成
+    NumPy随机流的种子取自rng，保证同一种子编译出的序列一致
+    """
+    try:
+        import numpy
+    except ImportError:
+        return scalar_fn
+    np_rng = numpy.random.default_rng(rng.getrandbits(64))
+    return _buffered(lambda n: batch_fn(n, rng=np_rng), chunk)
+
+
+# NumPy批量实现的规则：规则名 -> (批量函数(n, rng), 单条函数)
+BATCH_GENERATORS = {
+    '随机车牌': (lambda n, rng, index=None: DataFactory.random_plate_numbers(n, rng=rng, index=index)['plate_number'],
+                 _plate_number),
+    '随机ETC号': (DataFactory.random_etc_numbers, DataFactory.random_etc_number),
+    '随机OBN号': (DataFactory.random_obn_numbers, DataFactory.random_obn_number),
+    '随机设备号': (DataFactory.random_device_ids, DataFactory.random_device_id),
+    '随机订单号': (DataFactory.random_order_ids, DataFactory.random_order_id),
+    '随机银行卡号': (DataFactory.random_bank_cards, DataFactory.random_bank_card),
+}
+
+# 可查重的规则：规则名 -> value_indexes 中的索引名
+UNIQUE_RULES = {
+    '随机车牌': CAR_NUM_INDEX,
+    '随机ETC号': DEVICE_NO_INDEX,
+    '随机OBN号': DEVICE_NO_INDEX,
+}
+
+# 纯Python批量实现的身份类规则：规则名 -> 批量函数(n, rng)
+IDENTITY_GENERATORS = {
+    '随机姓名': IdentityFactory.names,
+    '随机手机号': IdentityFactory.phones,
+    '随机身份证': IdentityFactory.id_numbers,
+}
+
+SNOWFLAKE_CHUNK = 1000  # 雪花ID每次预取数量，取出顺序保持递增
+
+# 自动识别时按字段名关键字匹配的规则，顺序即优先级
+AUTO_NAME_RULES = (
+    ('name', '随机姓名'),
+    ('phone', '随机手机号'),
+    ('id', '随机身份证'),
+    ('plate', '随机车牌'),
+    ('etc', '随机ETC号'),
+    ('obn', '随机OBN号'),
+    ('device', '随机设备号'),
+    ('order', '随机订单号'),
+    ('card', '随机银行卡号'),
+    ('bank', '随机银行地址'),
+)
+
+
+def _compile_auto(field, ftype, rng, value_indexes=None):
+    ftype_low = ftype.lower()
+    fname = field.lower()
+    randint = rng.randint
+    if 'int' in ftype_low:
+        if 'bigint' in ftype_low:
+            return lambda: randint(1000000000, 9999999999)
+        return lambda: randint(1, 100000)
+    if 'decimal' in ftype_low or 'float' in ftype_low or 'double' in ftype_low:
+        uniform = rng.uniform
+        return lambda: round(uniform(1, 10000), 2)
+    if 'date' in ftype_low and 'time' not in ftype_low:
+        return _choice_of(_date_pool('%Y-%m-%d', '%Y-%m-%d'), rng)
+    if 'datetime' in ftype_low or 'timestamp' in ftype_low:
+        return _choice_of(_date_pool('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S'), rng)
+    if 'char' in ftype_low or 'text' in ftype_low:
+        for keyword, rule in AUTO_NAME_RULES:
+            if keyword == 'id' and 'card' in fname:
+                continue
+            if keyword in fname:
+                return compile_column(rule, field, ftype, rng=rng, value_indexes=value_indexes)
+        return _const('teststr')
+    return _const('test')
+
+
+def compile_column(rule, field, ftype, extra=None, rng=None, value_indexes=None):
+    """
+    把单列规则编译成无参生成函数，结果与 gen_value(rule, field, ftype, extra) 一致
+    :param rng: random.Random 实例，传入同一种子的rng可得到相同的随机序列
+    :param value_indexes: {索引名: ExistingValueIndex}，UNIQUE_RULES 中的规则据此排除已存在的值；None时不查重
+    """
+    rng = rng or random.Random()
+    if rule == '雪花ID':
+        return _buffered(DataFactory.random_snowflake_ids, SNOWFLAKE_CHUNK)
+    if rule == 'UUID':
+        getrandbits = rng.getrandbits
+        return lambda: str(uuid.UUID(int=getrandbits(128), version=4))
+    if rule in IDENTITY_GENERATORS:
+        batch_fn = IDENTITY_GENERATORS[rule]
+        return _buffered(lambda n: batch_fn(n, rng), BATCH_CHUNK)
+    if rule in BATCH_GENERATORS:
+        batch_fn, scalar_fn = BATCH_GENERATORS[rule]
+        index = (value_indexes or {}).get(UNIQUE_RULES.get(rule))
+        if index is not None:
+            batch_fn, scalar_fn = partial(batch_fn, index=index), partial(scalar_fn, index=index)
+        return _numpy_batched(batch_fn, scalar_fn, rng)
+    if rule == '随机银行地址':
+        return DataFactory.random_bank_address
+    if rule == '固定值':
+        return _const(extra if extra is not None else 'test')
+    if rule == '枚举值':
+        enums = [v.strip() for v in extra.split(',') if v.strip()] if extra else []
+        return _choice_of(enums, rng) if enums else _const('0')
+    if rule == '随机日期':
+        strftime_fmt = user_date_format_to_strftime(extra if extra else 'YYYY-MM-DD')
+        return _choice_of(_date_pool(strftime_fmt, '%Y%m%d'), rng)
+    if rule == '自增主键（自动生成）':
+        return _const(None)
+    if rule == PROFILE_RULE:
+        # extra 为该列的数据画像（见 data_profile.py）
+        return compile_profile_column(extra, rng)
+    return _compile_auto(field, ftype, rng, value_indexes)
+
+
+def compile_rules(fields, types, rules, extras=None, rng=None, value_indexes=None):
+    """
+    编译整张表的造数规则
+    :param rng: random.Random 实例，各列共用；多进程造数时每个进程传入不同种子的rng
+    :param value_indexes: 见 compile_column，需要对照某个库查重时显式传入
+    :return: 与fields一一对应的生成函数元组
+    """
+    rng = rng or random.Random()
+    extras = extras or [None] * len(fields)
+    return tuple(
+        compile_column(rules[i], field, types[i], extras[i] if i < len(extras) else None, rng, value_indexes)
+        for i, field in enumerate(fields)
+    )
+
+
+def make_row_factory(generators, max_lengths=None):
+    """
+    根据编译好的生成函数构造整行生成函数
+    :param generators: compile_rules 的结果
+    :param max_lengths: 各列字符最大长度，超长字符串截断；None表示不截断
+    :return: 无参函数，每次调用返回一行tuple
+    """
+    if max_lengths and any(max_lengths):
+        def truncate(gen, max_len):
+            def wrapped():
+                val = gen()
+                if isinstance(val, str) and len(val) > max_len:
+                    return val[:max_len]
+                return val
+            return wrapped
+        generators = tuple(
+            truncate(gen, max_len) if max_len else gen
+            for gen, max_len in zip(generators, max_lengths)
+        )
+    generators = tuple(generators)
+    return lambda: tuple([gen() for gen in generators])
@@ -5,33 +5,26 @@
 # 详细中文注释，便于维护和协作
 # -------------------------------------------------------------
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QPushButton, QLineEdit, QListWidget, QMessageBox, QSplitter, QTableWidget, QTableWidgetItem, QHBoxLayout, QComboBox, QHeaderView, QProgressBar, QScrollArea
+    QWidget, QVBoxLayout, QLabel, QPushButton, QLineEdit, QListWidget, QMessageBox, QSplitter, QTableWidget, QTableWidgetItem, QHBoxLayout, QComboBox, QHeaderView, QProgressBar, QScrollArea, QCheckBox, QFileDialog
 )
 from PyQt5.QtCore import Qt
 import os
-import json
 from common.mysql_util import MySQLUtil
+from common.schema_cache import schema_cache
 from common.data_factory import DataFactory
-from apps.data_generator.services.data_gen_worker import DataGenInsertWorker
+from apps.data_generator.services.data_gen_worker import DataGenInsertWorker, DataGenPlanWorker, DataProfileWorker
+from apps.data_generator.services.data_profile import PROFILE_RULE, TableProfiler, apply_profile
+from apps.data_generator.services.db_config import get_mysql_config
+from apps.data_generator.services.batch_tuner import format_throughput
+from apps.data_generator.services.gen_plan import GenPlan
+from apps.data_generator.services.file_sinks import SINK_FORMATS
+from apps.data_generator.models.gen_job import GenJob
 from datetime import datetime, timedelta
 import random
+import uuid
 
-# 读取数据库连接配置（仅取第一个MySQL配置）
-def get_mysql_config():
-    config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'connections.json')
-    with open(config_path, 'r', encoding='utf-8') as f:
-        configs = json.load(f)
-    for item in configs:
-        if item['type'] == 'mysql':
-            host, port = item['address'].split(':')
-            return {
-                'host': host,
-                'port': int(port),
-                'user': item['username'],
-                'password': item['password'],
-                'database': 'test'  # 默认库，后续可切换
-            }
-    raise Exception('未找到MySQL连接信息')
+# 输出方式：显示名 -> 文件格式（None为写入数据库）
+OUTPUT_OPTIONS = [('写入数据库', None), ('导出CSV', 'csv'), ('导出SQL', 'sql'), ('导出Parquet', 'parquet')]
 
 # 用户自定义日期格式转strftime格式
 # 如 YYYYMMDD -> %Y%m%d
@@ -65,6 +58,10 @@ def get_rule_example(rule, field, ftype, extra=None):
         return DataFactory.random_bank_card()
     elif rule == '随机银行地址':
         return DataFactory.random_bank_address()
+    elif rule == '雪花ID':
+        return str(DataFactory.random_snowflake_id())
+    elif rule == 'UUID':
+        return str(uuid.uuid4())
     elif rule == '固定值':
         return extra if extra is not None else 'test'
     elif rule == '枚举值':
@@ -79,6 +76,8 @@ def get_rule_example(rule, field, ftype, extra=None):
             return dt.strftime('%Y-%m-%d')
     elif rule == '自增主键（自动生成）':
         return '自增主键（自动生成）'
+    elif rule == PROFILE_RULE:
+        return '按采集的数据画像生成'
     else:
         # 自动识别类型
         ftype_low = ftype.lower()
@@ -136,6 +135,7 @@ class DataGenWidget(QWidget):
         self._splitter_initialized = False
         self.extra_inputs = {}  # 记录可编辑输入框
         self.table_rule_cache = {}  # {(db, table): [(rule, extra), ...]} 规则缓存
+        self.table_profiles = {}  # {(db, table): 数据画像}
         self.tabs = None
         self.init_ui()
 
@@ -208,11 +208,29 @@ class DataGenWidget(QWidget):
         self.count_input.setPlaceholderText('生成/插入数量，默认1000')
         hbox.addWidget(QLabel('数量:'))
         hbox.addWidget(self.count_input)
+        self.workers_input = QLineEdit()
+        self.workers_input.setPlaceholderText('并行数，默认1（串行）')
+        hbox.addWidget(QLabel('并行:'))
+        hbox.addWidget(self.workers_input)
+        self.server_side_check = QCheckBox('规则支持时在数据库端生成')
+        self.server_side_check.setChecked(True)
+        hbox.addWidget(self.server_side_check)
+        self.bulk_load_check = QCheckBox('批量导入模式')
+        self.bulk_load_check.setToolTip('写入期间关闭唯一性/外键检查并合并提交，结束或取消后自动恢复')
+        hbox.addWidget(self.bulk_load_check)
+        self.output_combo = QComboBox()
+        for label, _ in OUTPUT_OPTIONS:
+            self.output_combo.addItem(label)
+        self.output_combo.setToolTip('导出文件时不写入数据库，CSV中NULL写为\\N，可直接用于LOAD DATA')
+        hbox.addWidget(self.output_combo)
         self.right_layout.addLayout(hbox)
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
         self.progress_bar.hide()
         self.right_layout.addWidget(self.progress_bar)
+        self.stats_label = QLabel()
+        self.stats_label.hide()
+        self.right_layout.addWidget(self.stats_label)
         btn_hbox = QHBoxLayout()
         self.gen_btn = QPushButton('批量生成并插入数据')
         self.gen_btn.clicked.connect(self.handle_gen_data)
@@ -222,6 +240,19 @@ class DataGenWidget(QWidget):
         self.cancel_btn.clicked.connect(self.handle_cancel)
         self.cancel_btn.hide()
         btn_hbox.addWidget(self.cancel_btn)
+        self.resume_btn = QPushButton('继续未完成任务')
+        self.resume_btn.clicked.connect(self.handle_resume)
+        self.resume_btn.hide()
+        btn_hbox.addWidget(self.resume_btn)
+        self.profile_btn = QPushButton('采集数据画像')
+        self.profile_btn.setToolTip('抽样读取当前表数据，统计各列分布，之后可用“数据画像”规则按分布造数')
+        self.profile_btn.clicked.connect(self.handle_profile)
+        self.profile_btn.hide()
+        btn_hbox.addWidget(self.profile_btn)
+        self.plan_btn = QPushButton('多表造数计划')
+        self.plan_btn.setToolTip('选择造数计划文件，按外键/关联顺序生成多张表')
+        self.plan_btn.clicked.connect(self.handle_gen_plan)
+        btn_hbox.addWidget(self.plan_btn)
         self.right_layout.addLayout(btn_hbox)
         self.right_widget.setLayout(self.right_layout)
         scroll = QScrollArea()
@@ -288,7 +319,10 @@ class DataGenWidget(QWidget):
         if not self.current_db:
             return
         try:
-            self.all_tables = MySQLUtil.get_tables(get_mysql_config(), self.current_db)
+            # 刷新时丢弃该库的结构缓存，重新一次性加载
+            config = get_mysql_config()
+            schema_cache.invalidate(config, self.current_db)
+            self.all_tables = schema_cache.get_tables(config, self.current_db)
             width = self.get_max_text_width(self.all_tables, self.table_list.font())
             self.mid_width = width
             self.table_list.setFixedWidth(width)
@@ -322,8 +356,9 @@ class DataGenWidget(QWidget):
         展示表字段、类型、造数规则、示例，支持规则缓存和主键检测
         """
         self.right_label.setText(f'当前表：{self.current_table}')
-        fields = MySQLUtil.get_table_fields(get_mysql_config(), self.current_db, self.current_table)
-        self.pk_fields = set(MySQLUtil.get_table_primary_keys(get_mysql_config(), self.current_db, self.current_table))
+        config = get_mysql_config()
+        fields = schema_cache.get_table_fields(config, self.current_db, self.current_table)
+        self.pk_fields = set(schema_cache.get_table_primary_keys(config, self.current_db, self.current_table))
         self.auto_inc_fields = set()
         self.extra_inputs = {}
         for field in fields:
@@ -335,6 +370,8 @@ class DataGenWidget(QWidget):
         # 恢复缓存
         cache_key = (self.current_db, self.current_table)
         cache = self.table_rule_cache.get(cache_key, None)
+        if cache_key not in self.table_profiles:
+            self.table_profiles[cache_key] = TableProfiler.load(self.current_db, self.current_table)
         for i, field in enumerate(fields):
             self.table_struct.setItem(i, 0, QTableWidgetItem(field['Field']))
             self.table_struct.setItem(i, 1, QTableWidgetItem(field['Type']))
@@ -349,7 +386,7 @@ class DataGenWidget(QWidget):
                 rule_box = QComboBox()
                 rule_box.addItems([
                     '自动识别', '随机姓名', '随机手机号', '随机身份证', '随机车牌', '随机ETC号', '随机OBN号', '随机设备号', '随机订单号',
-                    '随机银行卡号', '随机银行地址', '随机日期', '枚举值', '固定值'
+                    '随机银行卡号', '随机银行地址', '雪花ID', 'UUID', '随机日期', '枚举值', '固定值', PROFILE_RULE
                 ])
                 # 绑定当前行，避免lambda late binding问题
                 def on_rule_change(rule, row=i, f=field['Field'], t=field['Type']):
@@ -367,9 +404,12 @@ class DataGenWidget(QWidget):
                     self.set_example_widget(i, '自动识别', field['Field'], field['Type'])
         self.table_struct.show()
         self.gen_btn.show()
+        self.profile_btn.show()
         self.cancel_btn.hide()
         self.progress_bar.hide()
         self.progress_bar.setValue(0)
+        self.stats_label.hide()
+        self.update_resume_btn()
 
     def set_example_widget(self, row, rule, field, ftype, extra_val=None):
         """
@@ -410,6 +450,7 @@ class DataGenWidget(QWidget):
         """
         try:
             count = int(self.count_input.text()) if self.count_input.text().strip() else 1000
+            workers = int(self.workers_input.text()) if self.workers_input.text().strip() else 1
             rules = []
             fields_to_insert = []
             types_to_insert = []
@@ -434,12 +475,12 @@ class DataGenWidget(QWidget):
                 extra = self.extra_inputs[i].text() if (rule in ['固定值', '枚举值', '随机日期'] and i in self.extra_inputs) else None
                 cache_val.append((rule, extra))
             self.table_rule_cache[cache_key] = cache_val
-            self.progress_bar.setValue(0)
-            self.progress_bar.show()
-            self.cancel_btn.show()
-            self.gen_btn.setEnabled(False)
+            extras = apply_profile(self.table_profiles.get(cache_key), fields_to_insert, rules, extras)
+            output = self.get_output()
+            if output is False:
+                return
             # 启动造数插入线程
-            self.worker = DataGenInsertWorker(
+            self.start_worker(DataGenInsertWorker(
                 get_mysql_config(),
                 self.current_db,
                 self.current_table,
@@ -447,16 +488,153 @@ class DataGenWidget(QWidget):
                 types_to_insert,
                 rules,
                 count,
-                extras
-            )
-            self.worker.progress.connect(self.progress_bar.setValue)
-            self.worker.finished.connect(self.handle_finished)
-            self.worker.error.connect(self.handle_error)
-            self.worker.start()
+                extras,
+                workers,
+                self.server_side_check.isChecked(),
+                self.bulk_load_check.isChecked(),
+                output=output
+            ))
         except Exception as e:
             QMessageBox.critical(self, '错误', f'启动插入失败：{e}')
             self.progress_bar.hide()
 
+    def handle_profile(self):
+        """
+        采集当前表的数据画像，完成后把可编辑字段的规则切换为“数据画像”
+        """
+        try:
+            worker = DataProfileWorker(get_mysql_config(), self.current_db, self.current_table)
+        except Exception as e:
+            QMessageBox.critical(self, '错误', f'采集数据画像失败：{e}')
+            return
+        self.profile_btn.setEnabled(False)
+        self.gen_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.profile_worker = worker
+        worker.progress.connect(self.progress_bar.setValue)
+        worker.finished.connect(self.handle_profile_finished)
+        worker.error.connect(self.handle_profile_error)
+        worker.start()
+
+    def handle_profile_finished(self, profile):
+        self.table_profiles[(profile['database'], profile['table'])] = profile
+        self.profile_btn.setEnabled(True)
+        self.gen_btn.setEnabled(True)
+        self.progress_bar.hide()
+        if (profile['database'], profile['table']) == (self.current_db, self.current_table):
+            for i, field in enumerate(self.fields):
+                if field not in self.auto_inc_fields and field in profile['columns']:
+                    self.table_struct.cellWidget(i, 2).setCurrentText(PROFILE_RULE)
+        QMessageBox.information(self, '数据画像', TableProfiler.summary(profile))
+
+    def handle_profile_error(self, msg):
+        self.profile_btn.setEnabled(True)
+        self.gen_btn.setEnabled(True)
+        self.progress_bar.hide()
+        QMessageBox.critical(self, '错误', msg)
+
+    def get_output(self):
+        """
+        当前选择的输出方式：写库返回None；导出文件时选择保存路径，返回 {'format', 'path'}，取消选择返回False
+        """
+        fmt = OUTPUT_OPTIONS[self.output_combo.currentIndex()][1]
+        if fmt is None:
+            return None
+        suffix = SINK_FORMATS[fmt].suffix
+        path, _ = QFileDialog.getSaveFileName(self, '导出到文件', f'{self.current_table}{suffix}', f'*{suffix}')
+        if not path:
+            return False
+        return {'format': fmt, 'path': path}
+
+    def handle_gen_plan(self):
+        """
+        选择造数计划文件（JSON），按表间关联生成多张表
+        """
+        plan_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'plans')
+        path, _ = QFileDialog.getOpenFileName(self, '选择造数计划', plan_dir, '造数计划 (*.json)')
+        if not path:
+            return
+        try:
+            spec = GenPlan.load_spec(path)
+            if not spec.get('database') and self.current_db:
+                spec['database'] = self.current_db
+            tables = spec.get('tables') or {}
+            reply = QMessageBox.question(
+                self, '多表造数',
+                f'将向 {spec.get("database")} 库的 {len(tables)} 张表共插入 '
+                f'{sum(int(t.get("count", 1000)) for t in tables.values())} 条数据：\n' + '\n'.join(tables) +
+                '\n是否继续？'
+            )
+            if reply != QMessageBox.Yes:
+                return
+            self.start_worker(DataGenPlanWorker(
+                get_mysql_config(), spec, self.bulk_load_check.isChecked(), self.server_side_check.isChecked()
+            ))
+        except Exception as e:
+            QMessageBox.critical(self, '错误', f'启动多表造数失败：{e}')
+            self.progress_bar.hide()
+
+    def start_worker(self, worker):
+        """
+        绑定信号并启动造数线程
+        """
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.stats_label.setText('')
+        self.stats_label.show()
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.show()
+        self.gen_btn.setEnabled(False)
+        self.plan_btn.setEnabled(False)
+        self.resume_btn.hide()
+        self.worker = worker
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.stats.connect(self.handle_stats)
+        self.worker.finished.connect(self.handle_finished)
+        self.worker.error.connect(self.handle_error)
+        self.worker.start()
+
+    def update_resume_btn(self):
+        """
+        当前表有未完成的造数任务时显示“继续”按钮
+        """
+        jobs = GenJob.list_resumable(self.current_db, self.current_table) if self.current_table else []
+        if jobs:
+            job = jobs[0]
+            self.resume_btn.setText(f'继续未完成任务（{job.committed}/{job.count}）')
+            self.resume_btn.show()
+        else:
+            self.resume_btn.hide()
+
+    def handle_resume(self):
+        """
+        从检查点继续当前表最近一次未完成的造数任务
+        """
+        jobs = GenJob.list_resumable(self.current_db, self.current_table)
+        if not jobs:
+            self.resume_btn.hide()
+            return
+        job = jobs[0]
+        reply = QMessageBox.question(
+            self, '继续任务',
+            f'任务 {job.job_id}（{job.updated_at}）已完成 {job.committed}/{job.count} 条，'
+            f'是否按原规则继续生成剩余 {job.remaining} 条？'
+        )
+        if reply != QMessageBox.Yes:
+            return
+        try:
+            self.start_worker(DataGenInsertWorker.resume(get_mysql_config(), job))
+        except Exception as e:
+            QMessageBox.critical(self, '错误', f'继续任务失败：{e}')
+            self.progress_bar.hide()
+
+    def handle_stats(self, stats):
+        """
+        吞吐统计回调，显示速度、剩余时间和当前批大小
+        """
+        self.stats_label.setText(format_throughput(stats))
+
     def handle_cancel(self):
         """
         取消批量插入任务
@@ -471,15 +649,21 @@ class DataGenWidget(QWidget):
         """
         self.progress_bar.setValue(100)
         self.gen_btn.setEnabled(True)
+        self.plan_btn.setEnabled(True)
         self.cancel_btn.hide()
         QMessageBox.information(self, '完成', msg)
         self.progress_bar.hide()
+        self.stats_label.hide()
+        self.update_resume_btn()
 
     def handle_error(self, msg):
         """
         插入出错回调，恢复按钮状态
         """
         self.gen_btn.setEnabled(True)
+        self.plan_btn.setEnabled(True)
         self.cancel_btn.hide()
         QMessageBox.critical(self, '错误', msg)
         self.progress_bar.hide()
+        self.stats_label.hide()
+        self.update_resume_btn()
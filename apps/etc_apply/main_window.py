@@ -12,6 +12,7 @@ from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QIcon
 from apps.etc_apply.ui.rtx.ui_events import ui_events, excepthook
 from apps.etc_apply.ui.rtx.ui_utils import ui_builder
+from apps.etc_apply.services.rtx.core_service import CoreService
 
 class EtcApplyWidget(QDialog):  # ETC申办主界面类，继承自QWidget
     """
@@ -27,6 +28,7 @@ class EtcApplyWidget(QDialog):  # ETC申办主界面类，继承自QWidget
         super().__init__(parent)  # 初始化父类
         self.inputs = {}  # 输入控件字典
         self.current_vehicle_type = "passenger"  # 当前车辆类型
+        CoreService.register_value_indexes()  # 车牌号/设备号查重索引（首次查重时才加载）
         
         # 设置窗口标题和图标
         self.setWindowTitle('ETC自助申办工具')
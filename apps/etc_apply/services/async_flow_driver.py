@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+异步申办流程驱动 - 在单个事件循环上并发跑大量客车（Core）/货车（TruckCore）申办流程
+
+复用现有步骤方法（见 step_driver）：接口调用换成异步客户端后await，数据库步骤放到线程池，
+因此几百个并发流程只占一个事件循环线程加一个小线程池，而不是每个流程一个线程。
+需要aiohttp：pip install aiohttp
+
+用法：
+    driver = AsyncFlowDriver(concurrency=200)
+    results = AsyncFlowDriver.run(driver.run_many([driver.run_core(core) for core in cores]))
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from common import aio_transport
+from apps.etc_apply.services.step_driver import call_async
+from apps.etc_apply.services.rtx.api_client import AsyncApiClient
+from apps.etc_apply.services.rtx.core_service import CoreService
+from apps.etc_apply.services.rtx.etc_core import Core
+from apps.etc_apply.services.rtx.state_service import StepManager
+from apps.etc_apply.services.hcb.truck_api_client import AsyncTruckApiClient
+from apps.etc_apply.services.hcb.truck_core import TruckCore
+from apps.etc_apply.services.hcb.truck_state_service import TruckStepManager
+from apps.etc_apply.services.hcb.truck_step_registry import TruckStepPlan
+
+DEFAULT_CONCURRENCY = 100   # 同时在跑的流程数上限
+
+
+class AsyncFlowDriver:
+    """
+    异步流程驱动：run_core / run_truck 跑单个流程，并发数由信号量限制
+    流程的接口客户端在开始时换成异步客户端，结束后关闭；步骤的进度回调、错误处理与同步执行一致
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY):
+        self.concurrency = max(1, int(concurrency))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    @staticmethod
+    def run(main: Awaitable):
+        """在新的事件循环中执行，结束前关闭共享连接池"""
+        async def runner():
+            try:
+                return await main
+            finally:
+                await aio_transport.close_connector()
+        return asyncio.run(runner())
+
+    @staticmethod
+    async def _timed_step(step: int, method: Callable, on_step_done: Optional[Callable], *args):
+        start = time.perf_counter()
+        error = None
+        try:
+            return await call_async(method, *args)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if on_step_done:
+                on_step_done(step, time.perf_counter() - start, error)
+
+    async def run_core(self, core: Core, verify_code: Optional[str] = None,
+                       on_step_done: Optional[Callable] = None,
+                       should_stop: Optional[Callable[[], bool]] = None) -> Optional[Dict[int, Any]]:
+        """
+        客车流程步骤1~15：前置步骤1~4并发，之后依次执行，失败时抛出该步骤的错误
+        （前置步骤同时失败时取步骤号最小的，与 Core.run_independent_steps 一致）
+        :param verify_code: 签约校验（步骤8）验证码，不传时取 params['code']
+        :param on_step_done: 每步结束回调 on_step_done(step_number, elapsed_seconds, error)
+        :param should_stop: 流程开始和每步开始前检查，返回True时停止并返回None
+        :return: {步骤号: 返回值}
+        """
+        async with self._semaphore:
+            # 等待信号量期间可能已取消，排队中的流程不再执行前置步骤
+            if should_stop and should_stop():
+                return None
+            core.api = AsyncApiClient(core.base_url or CoreService.get_api_base_url(), cookies=core.browser_cookies)
+            try:
+                prechecks = sorted(Core.INDEPENDENT_STEPS)
+                outcomes = await asyncio.gather(
+                    *(self._timed_step(step, getattr(core, Core.INDEPENDENT_STEPS[step]), on_step_done)
+                      for step in prechecks),
+                    return_exceptions=True)
+                errors = [o for o in outcomes if isinstance(o, BaseException)]
+                if errors:
+                    raise errors[0]
+                results = dict(zip(prechecks, outcomes))
+                for step, method in Core.FLOW_STEPS:
+                    if step in Core.INDEPENDENT_STEPS:
+                        continue
+                    if should_stop and should_stop():
+                        return None
+                    args = (verify_code,) if step == 8 and verify_code is not None else ()
+                    results[step] = await self._timed_step(step, getattr(core, method), on_step_done, *args)
+                core._update_progress(16, StepManager.format_step_message(16))
+                return results
+            finally:
+                await core.api.aclose()
+
+    async def _timed_truck_step(self, truck_core: TruckCore, step: int, on_step_done: Optional[Callable]) -> bool:
+        start = time.perf_counter()
+        success = await call_async(truck_core._execute_step, step)
+        if on_step_done:
+            error = None if success else Exception(f"{step}.{TruckStepManager.get_step_name(step)}失败")
+            on_step_done(step, time.perf_counter() - start, error)
+        return success
+
+    async def run_truck(self, truck_core: TruckCore, targets: Optional[Iterable[int]] = None,
+                        done: Iterable[int] = (), on_step_done: Optional[Callable] = None,
+                        should_stop: Optional[Callable[[], bool]] = None) -> Optional[Dict[str, Any]]:
+        """
+        货车流程，按步骤注册表的依赖调度（与 TruckCore.run_steps 相同），依赖满足的步骤并发执行；
+        默认执行全部步骤，关键步骤失败时返回None
+        :param targets: 目标步骤集合，缺少的依赖步骤自动补上
+        :param done: 视为已完成的步骤（如检查点中已完成的步骤）
+        :param on_step_done: 每步结束回调 on_step_done(step_number, elapsed_seconds, error)，失败步骤的error为异常
+        :param should_stop: 启动新步骤前检查，返回True时等正在执行的步骤结束后返回None
+        """
+        async with self._semaphore:
+            truck_core.api_client = AsyncTruckApiClient(truck_core.base_url, cookies=truck_core.browser_cookies)
+            try:
+                plan = TruckStepPlan(targets, done)
+                running = {}
+                stopped = False
+                while True:
+                    stopped = stopped or bool(should_stop and should_stop())
+                    if not stopped:
+                        for step in plan.ready(truck_core.MAX_CONCURRENT_STEPS - len(running)):
+                            plan.start(step)
+                            running[asyncio.ensure_future(self._timed_truck_step(truck_core, step, on_step_done))] = step
+                    if not running:
+                        break
+                    finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        plan.finish(running.pop(task), task.result())
+                if stopped or not truck_core._check_plan(plan):
+                    return None
+                return {
+                    'truck_etc_apply_id': truck_core.truck_etc_apply_id,
+                    'truck_user_id': truck_core.truck_user_id,
+                    'truck_user_wallet_id': truck_core.truck_user_wallet_id,
+                    'order_id': truck_core.order_id,
+                    'status': 'completed'
+                }
+            finally:
+                await truck_core.api_client.aclose()
+
+    @staticmethod
+    async def run_many(flows: Iterable[Awaitable]) -> List[Any]:
+        """并发等待多个流程，按传入顺序返回结果，失败的流程返回其异常而不影响其他流程"""
+        return await asyncio.gather(*flows, return_exceptions=True)
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+申办流程检查点 - 每个步骤成功后把流程状态落盘，失败或程序重启后可从第一个未完成的步骤继续
+
+是否落盘由 etc_config.json 的 checkpoint.enabled 决定（默认开启），也可用 persist 参数指定；
+未开启时只在内存中记录已完成的步骤。
+每个流程一个JSON文件（项目根目录下 temp/etc_flow_checkpoints/<run_id>.json），保存申办参数、
+流程中间结果（订单号、签约单号、申办ID等）和已完成的步骤；流程全部完成后删除文件，
+失败的保留以便继续，超过保留天数（checkpoint.ttl_days，默认 CHECKPOINT_TTL_DAYS）未更新的自动清理
+（文件含身份证、手机号等申办信息）。
+不保存浏览器cookie，继续流程时由调用方重新提供。
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from apps.etc_apply.services.rtx.core_service import CoreService
+from common.path_util import resource_path
+
+CHECKPOINT_DIR = resource_path(os.path.join('temp', 'etc_flow_checkpoints'))
+CHECKPOINT_TTL_DAYS = 7     # 检查点默认保留天数，过期的在保存和列出时清理
+FLOW_RTX = 'rtx'        # 客车流程（Core）
+FLOW_TRUCK = 'truck'    # 货车流程（TruckCore）
+FLOW_FINISHED = 'finished'
+FLOW_RESUMABLE = ('running', 'failed')
+
+
+def persist_enabled() -> bool:
+    """配置中是否开启检查点落盘，未配置时默认开启"""
+    return bool(CoreService.get_checkpoint_config().get('enabled', True))
+
+
+class FlowCheckpoint:
+    """
+    单个申办流程的检查点
+    """
+    _pruned = False     # 本进程是否已清理过过期检查点
+
+    def __init__(self, flow_type: str, params: Optional[Dict[str, Any]] = None, base_url: Optional[str] = None,
+                 run_id: Optional[str] = None, persist: Optional[bool] = None):
+        self.run_id = run_id or time.strftime('%Y%m%d_%H%M%S_') + uuid.uuid4().hex[:6]
+        self.flow_type = flow_type
+        self.base_url = base_url
+        self.params = params or {}      # 申办参数（步骤中补充的字段一并保存）
+        self.state = {}                 # 流程中间结果，字段由各流程决定
+        self.completed_steps = []       # 已成功的步骤号
+        self.failed_step = None
+        self.error = None
+        self.status = 'running'
+        self.created_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.updated_at = self.created_at
+        self._persist = persist_enabled() if persist is None else persist   # 是否落盘
+        self._lock = threading.Lock()   # 客车前置步骤并发执行时多个线程同时记录
+
+    @property
+    def path(self):
+        return os.path.join(CHECKPOINT_DIR, f'{self.run_id}.json')
+
+    def to_dict(self):
+        return {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
+
+    @staticmethod
+    def from_dict(data):
+        checkpoint = FlowCheckpoint(data['flow_type'], data.get('params'), data.get('base_url'), data['run_id'],
+                                    persist=True)
+        checkpoint.state = data.get('state') or {}
+        checkpoint.completed_steps = data.get('completed_steps') or []
+        checkpoint.failed_step = data.get('failed_step')
+        checkpoint.error = data.get('error')
+        checkpoint.status = data.get('status', 'running')
+        checkpoint.created_at = data.get('created_at', checkpoint.created_at)
+        checkpoint.updated_at = data.get('updated_at', checkpoint.updated_at)
+        return checkpoint
+
+    def save(self):
+        """原子写入：先写临时文件再替换，中途退出不会留下半个文件；未开启落盘时不写"""
+        if not self._persist:
+            return
+        if not FlowCheckpoint._pruned:
+            FlowCheckpoint._pruned = True
+            FlowCheckpoint.prune()
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        self.updated_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        tmp_path = f'{self.path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'), default=str)
+        os.replace(tmp_path, self.path)
+
+    def record(self, step_number: int, params: Dict[str, Any], state: Dict[str, Any]):
+        """步骤成功后调用，记录参数和中间结果并落盘"""
+        with self._lock:
+            self.params = params
+            self.state = state
+            if step_number not in self.completed_steps:
+                self.completed_steps = sorted(self.completed_steps + [step_number])
+            if self.failed_step == step_number:
+                self.failed_step, self.error = None, None
+            self.status = 'running'
+            self.save()
+
+    def fail(self, step_number: int, error: str):
+        """步骤失败时调用，保留检查点以便继续"""
+        with self._lock:
+            self.failed_step = step_number
+            self.error = str(error)[:500]
+            self.status = 'failed'
+            self.save()
+
+    def finish(self):
+        """流程全部完成，删除检查点文件"""
+        with self._lock:
+            self.status = FLOW_FINISHED
+            if self._persist and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def first_incomplete_step(self, steps: List[int]) -> Optional[int]:
+        """按顺序找第一个未完成的步骤，全部完成时返回None"""
+        for step in steps:
+            if step not in self.completed_steps:
+                return step
+        return None
+
+    @staticmethod
+    def load(run_id: str) -> 'FlowCheckpoint':
+        path = os.path.join(CHECKPOINT_DIR, f'{run_id}.json')
+        if not os.path.exists(path):
+            raise Exception(f"申办流程检查点不存在: {run_id}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return FlowCheckpoint.from_dict(json.load(f))
+
+    @staticmethod
+    def prune(max_age_days: Optional[float] = None) -> int:
+        """删除超过保留天数未更新的检查点（含残留的临时文件），返回删除个数"""
+        if not os.path.isdir(CHECKPOINT_DIR):
+            return 0
+        if max_age_days is None:
+            max_age_days = float(CoreService.get_checkpoint_config().get('ttl_days', CHECKPOINT_TTL_DAYS))
+        deadline = time.time() - max_age_days * 86400
+        removed = 0
+        for name in os.listdir(CHECKPOINT_DIR):
+            path = os.path.join(CHECKPOINT_DIR, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                print(f"[WARNING] 清理申办流程检查点失败 {name}: {e}")
+        return removed
+
+    @staticmethod
+    def list_resumable(flow_type: Optional[str] = None) -> List['FlowCheckpoint']:
+        """列出可继续的流程，按更新时间倒序；先清理过期的检查点"""
+        FlowCheckpoint.prune()
+        if not os.path.isdir(CHECKPOINT_DIR):
+            return []
+        checkpoints = []
+        for name in os.listdir(CHECKPOINT_DIR):
+            if not name.endswith('.json'):
+                continue
+            try:
+                checkpoint = FlowCheckpoint.load(name[:-len('.json')])
+            except Exception as e:
+                print(f"[WARNING] 读取申办流程检查点失败 {name}: {e}")
+                continue
+            if checkpoint.status in FLOW_RESUMABLE and (flow_type is None or checkpoint.flow_type == flow_type):
+                checkpoints.append(checkpoint)
+        checkpoints.sort(key=lambda c: c.updated_at, reverse=True)
+        return checkpoints
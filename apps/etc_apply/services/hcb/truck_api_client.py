@@ -2,9 +2,14 @@
 """
 货车ETC申办API客户端 - 基于HCB接口
 """
+import asyncio
+import json
 import requests
+from common import aio_transport
+from common.http_transport import new_session
 from apps.etc_apply.services.rtx.log_service import LogService
 from apps.etc_apply.services.rtx.core_service import CoreService
+from apps.etc_apply.services.hcb.truck_reference_cache import truck_reference_cache
 
 
 class TruckApiClient:
@@ -20,29 +25,28 @@ class TruckApiClient:
                 base_url = base_url.replace('https://', 'http://')
         
         self.base_url = base_url
-        self.session = requests.Session()
-        # 设置网络超时
-        self.session.timeout = 30
+        api_config = CoreService.get_api_config()
+        # 共享连接池的会话：并发流程复用连接，带默认超时（读取超时取配置，默认30秒）和幂等重试
+        self.session = new_session(api_config.get('timeout', 30), api_config.get('retry_count'))
         self.log_service = LogService("truck_api_client", log_file)
         self.cookies = cookies or {}
         self.last_error_detail = None  # 保存最后一次的错误详情
+        # 运营商/产品/银行/产品信息等参考数据的缓存，设为None时每次都请求
+        self.reference_cache = truck_reference_cache
         if self.cookies:
             self.session.cookies.update(self.cookies)
     
-    def post(self, path, data, headers=None, cookies=None):
-        """统一的POST请求方法，发送JSON格式数据"""
+    def _build_url(self, path):
         # 确保URL正确拼接
         if self.base_url.endswith('/'):
             if path.startswith('/'):
-                url = self.base_url + path[1:]  # 移除path开头的/
-            else:
-                url = self.base_url + path
-        else:
-            if path.startswith('/'):
-                url = self.base_url + path
-            else:
-                url = self.base_url + '/' + path
-            
+                return self.base_url + path[1:]  # 移除path开头的/
+            return self.base_url + path
+        if path.startswith('/'):
+            return self.base_url + path
+        return self.base_url + '/' + path
+
+    def _build_headers(self, headers=None):
         default_headers = {
             "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 18_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 MicroMessenger/8.0.60(0x18003c32) NetType/4G Language/zh_CN",
             "Accept": "*/*",
@@ -51,155 +55,157 @@ class TruckApiClient:
         }
         if headers:
             default_headers.update(headers)
-        if not self.session.cookies and self.cookies:
-            self.session.cookies.update(self.cookies)
+        return default_headers
+
+    def _encode_body(self, data):
+        """
+        清理参数并编码为JSON字节（同步/异步客户端共用）
+        HCB接口发送JSON格式数据，但Content-Type为application/x-www-form-urlencoded
+        :return: (清理后的参数, JSON字节)
+        """
+        # 确保所有字符串值都是有效的
+        cleaned_data = {}
+        for key, value in data.items():
+            if isinstance(value, str):
+                # 清理字符串，移除可能的特殊字符
+                original_value = value
+                cleaned_value = value.strip()
+                
+                # 检查字符串中是否有问题字符
+                problem_chars = ['"', '\n', '\r', '\t', '\\']
+                has_problem = any(char in cleaned_value for char in problem_chars)
+                if has_problem:
+                    self.log_service.warning(f"🚨 字段 '{key}' 包含特殊字符: '{original_value}'")
+                    # 转义特殊字符
+                    cleaned_value = cleaned_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+                    self.log_service.info(f"🔧 字段 '{key}' 清理后: '{cleaned_value}'")
+                
+                if cleaned_value:
+                    cleaned_data[key] = cleaned_value
+                else:
+                    self.log_service.warning(f"⚠️ 字段 '{key}' 清理后为空，原值: '{original_value}'")
+            else:
+                cleaned_data[key] = value
         
-        self.log_service.log_api_request(path, data)
+        # 记录日志用的json字符串
+        json_data = json.dumps(cleaned_data, ensure_ascii=False, separators=(',', ':'))
+
+        # 调试：打印JSON数据长度和内容
+        self.log_service.info(f"发送JSON数据长度: {len(json_data)}")
+        self.log_service.info(f"发送JSON数据: {json_data}")
         
+        # 验证JSON格式是否正确
         try:
-            # HCB接口发送JSON格式数据，但Content-Type为application/x-www-form-urlencoded
-            import json
-            # 确保所有字符串值都是有效的
-            cleaned_data = {}
-            for key, value in data.items():
-                if isinstance(value, str):
-                    # 清理字符串，移除可能的特殊字符
-                    original_value = value
-                    cleaned_value = value.strip()
-                    
-                    # 检查字符串中是否有问题字符
-                    problem_chars = ['"', '\n', '\r', '\t', '\\']
-                    has_problem = any(char in cleaned_value for char in problem_chars)
-                    if has_problem:
-                        self.log_service.warning(f"🚨 字段 '{key}' 包含特殊字符: '{original_value}'")
-                        # 转义特殊字符
-                        cleaned_value = cleaned_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
-                        self.log_service.info(f"🔧 字段 '{key}' 清理后: '{cleaned_value}'")
-                    
-                    if cleaned_value:
-                        cleaned_data[key] = cleaned_value
-                    else:
-                        self.log_service.warning(f"⚠️ 字段 '{key}' 清理后为空，原值: '{original_value}'")
-                else:
-                    cleaned_data[key] = value
-            
-            # 记录日志用的json字符串
-            json_data = json.dumps(cleaned_data, ensure_ascii=False, separators=(',', ':'))
+            json.loads(json_data)  # 验证JSON格式
+            self.log_service.info("✅ JSON格式验证通过")
+        except json.JSONDecodeError as json_err:
+            self.log_service.error(f"❌ JSON格式错误: {json_err}")
+            self.log_service.error(f"❌ 原始数据: {data}")
+            self.log_service.error(f"❌ 清理后数据: {cleaned_data}")
+            raise Exception(f"JSON格式错误: {json_err}")
 
-            # 调试：打印JSON数据长度和内容
-            self.log_service.info(f"发送JSON数据长度: {len(json_data)}")
-            self.log_service.info(f"发送JSON数据: {json_data}")
-            
-            # 验证JSON格式是否正确
-            try:
-                json.loads(json_data)  # 验证JSON格式
-                self.log_service.info("✅ JSON格式验证通过")
-            except json.JSONDecodeError as json_err:
-                self.log_service.error(f"❌ JSON格式错误: {json_err}")
-                self.log_service.error(f"❌ 原始数据: {data}")
-                self.log_service.error(f"❌ 清理后数据: {cleaned_data}")
-                raise Exception(f"JSON格式错误: {json_err}")
+        # 明确设置Content-Length避免数据截断 - 关键：直接使用字节数据发送
+        return cleaned_data, json_data.encode('utf-8')
 
-            # 仍按表单方式发送纯JSON字符串，保持与后端兼容
-            self.log_service.info(f"🌐 发送POST请求到: {url}")
-            self.log_service.info(f"📤 请求头: {default_headers}")
-            self.log_service.info(f"📝 请求体类型: {type(json_data)} 长度: {len(json_data)}")
-            
-            # 明确设置Content-Length避免数据截断 - 关键：直接使用字节数据发送
-            json_bytes = json_data.encode('utf-8')
-            default_headers['Content-Length'] = str(len(json_bytes))
-            self.log_service.info(f"🔢 实际字节长度: {len(json_bytes)}, Content-Length: {default_headers['Content-Length']}")
+    def _parse_response(self, path, url, cleaned_data, text):
+        """解析响应并检查业务状态（同步/异步客户端共用），HCB接口以 ret == "1" 表示成功"""
+        try:
+            response_data = json.loads(text)
+        except ValueError as e:
+            # JSON解析异常
+            self.log_service.error(f"{path} 响应解析失败: {str(e)}")
+            raise Exception(f"响应解析失败: {str(e)}")
+        if response_data.get("ret") != "1":
+            error_msg = response_data.get("msg") or f"业务错误: {response_data.get('ret')}"
+            error_code = response_data.get("ret")
             
-            # 关键修复：直接发送字节数据而不是字符串，确保长度一致
-            self.log_service.info(f"📦 发送字节数据前10字节: {json_bytes[:10]}")
-            self.log_service.info(f"📦 发送字节数据后10字节: {json_bytes[-10:]}")
+            # 记录详细错误信息
+            self.log_service.error(f"{path} 调用失败 | URL: {url} | 错误码: {error_code} | 错误信息: {error_msg}")
             
-            resp = self.session.post(url, data=json_bytes, headers=default_headers, cookies=cookies)
-            resp.raise_for_status()
-            self.log_service.log_api_response(path, resp.text)
-            
-            try:
-                response_data = resp.json()
-                # HCB接口成功标志是ret="1"
-                if response_data.get("ret") != "1":
-                    error_msg = response_data.get("msg") or f"业务错误: {response_data.get('ret')}"
-                    error_code = response_data.get("ret")
-                    
-                    # 记录详细错误信息
-                    self.log_service.error(f"{path} 调用失败 | URL: {url} | 错误码: {error_code} | 错误信息: {error_msg}")
-                    
-                    # 创建结构化异常信息
-                    error_detail = CoreService.create_api_error_detail(
-                        api_path=path,
-                        url=url,
-                        error_code=error_code,
-                        error_message=error_msg,
-                        request_data=cleaned_data,
-                        response_data=response_data
-                    )
-                    
-                    # 保存错误详情，供后续错误处理使用
-                    self.last_error_detail = error_detail
-                    
-                    # 立即抛出异常
-                    exception = Exception(f"业务错误: {error_msg}")
-                    exception.error_detail = error_detail
-                    raise exception
-                return response_data
-            except Exception as e:
-                if hasattr(e, 'error_detail'):
-                    # 如果是我们创建的业务异常，直接重新抛出
-                    raise e
-                else:
-                    # JSON解析异常或其他异常
-                    self.log_service.error(f"{path} 响应解析失败: {str(e)}")
-                    raise Exception(f"响应解析失败: {str(e)}")
-                    
-        except requests.exceptions.RequestException as e:
-            self.log_service.error(f"{path} 网络请求失败: {str(e)}")
-            
-            # 创建网络错误详情
+            # 创建结构化异常信息
             error_detail = CoreService.create_api_error_detail(
                 api_path=path,
                 url=url,
-                error_code="NETWORK_ERROR",
-                error_message=f"网络请求失败: {str(e)}",
+                error_code=error_code,
+                error_message=error_msg,
                 request_data=cleaned_data,
-                response_data={"error": str(e), "type": "RequestException"}
+                response_data=response_data
             )
             
-            # 保存错误详情
+            # 保存错误详情，供后续错误处理使用
             self.last_error_detail = error_detail
             
-            # 抛出带详情的异常
-            exception = Exception(f"网络请求失败: {str(e)}")
+            # 立即抛出异常
+            exception = Exception(f"业务错误: {error_msg}")
             exception.error_detail = error_detail
             raise exception
+        return response_data
+
+    def _raise_request_error(self, path, url, cleaned_data, e, network_error):
+        """
+        请求异常统一转换后抛出：已带error_detail的业务异常原样抛出，
+        网络异常（network_error=True）和其他异常分别附带 NETWORK_ERROR / UNKNOWN_ERROR 详情
+        """
+        if hasattr(e, 'error_detail'):
+            raise e
+        if network_error:
+            self.log_service.error(f"{path} 网络请求失败: {str(e)}")
+            error_code, error_message, error_type = "NETWORK_ERROR", f"网络请求失败: {str(e)}", "RequestException"
+        else:
+            self.log_service.error(f"{path} 请求异常: {str(e)}")
+            error_code, error_message, error_type = "UNKNOWN_ERROR", f"请求异常: {str(e)}", "Exception"
+        
+        error_detail = CoreService.create_api_error_detail(
+            api_path=path,
+            url=url,
+            error_code=error_code,
+            error_message=error_message,
+            request_data=cleaned_data,
+            response_data={"error": str(e), "type": error_type}
+        )
+        
+        # 保存错误详情
+        self.last_error_detail = error_detail
+        
+        # 抛出带详情的异常
+        exception = Exception(error_message)
+        exception.error_detail = error_detail
+        raise exception
+
+    def post(self, path, data, headers=None, cookies=None):
+        """统一的POST请求方法，发送JSON格式数据"""
+        url = self._build_url(path)
+        default_headers = self._build_headers(headers)
+        if not self.session.cookies and self.cookies:
+            self.session.cookies.update(self.cookies)
+        
+        self.log_service.log_api_request(path, data)
+        
+        cleaned_data = data
+        try:
+            cleaned_data, json_bytes = self._encode_body(data)
+            default_headers['Content-Length'] = str(len(json_bytes))
+
+            # 仍按表单方式发送纯JSON字符串，保持与后端兼容
+            self.log_service.info(f"🌐 发送POST请求到: {url}")
+            self.log_service.info(f"📤 请求头: {default_headers}")
+            self.log_service.info(f"🔢 实际字节长度: {len(json_bytes)}, Content-Length: {default_headers['Content-Length']}")
             
+            resp = self.session.post(url, data=json_bytes, headers=default_headers, cookies=cookies)
+            resp.raise_for_status()
+            self.log_service.log_api_response(path, resp.text)
+            return self._parse_response(path, url, cleaned_data, resp.text)
+        except requests.exceptions.RequestException as e:
+            self._raise_request_error(path, url, cleaned_data, e, network_error=True)
         except Exception as e:
-            # 如果异常已经有error_detail，直接重新抛出
-            if hasattr(e, 'error_detail'):
-                raise e
-            else:
-                self.log_service.error(f"{path} 请求异常: {str(e)}")
-                
-                # 创建通用错误详情
-                error_detail = CoreService.create_api_error_detail(
-                    api_path=path,
-                    url=url,
-                    error_code="UNKNOWN_ERROR",
-                    error_message=f"请求异常: {str(e)}",
-                    request_data=cleaned_data,
-                    response_data={"error": str(e), "type": "Exception"}
-                )
-                
-                # 保存错误详情
-                self.last_error_detail = error_detail
-                
-                # 抛出带详情的异常
-                exception = Exception(f"请求异常: {str(e)}")
-                exception.error_detail = error_detail
-                raise exception
+            self._raise_request_error(path, url, cleaned_data, e, network_error=False)
+
+    def _cached_post(self, path, data):
+        """参考数据接口：按请求参数走缓存，并发的相同请求只发一次"""
+        if self.reference_cache is None:
+            return self.post(path, data)
+        key = self.reference_cache.make_key(self.base_url, path, data)
+        return self.reference_cache.get_or_load(key, lambda: self.post(path, data))
     
     # ==================== 货车流程专用接口 ====================
     
@@ -216,7 +222,7 @@ class TruckApiClient:
     
     def get_bank_list(self, params):
         """获取银行列表 - 实际上是获取产品列表"""
-        return self.post("/hcbapi/gateWay/pubCtrl.do", {
+        return self._cached_post("/hcbapi/gateWay/pubCtrl.do", {
             "channelId": params.get("channelId", "0000"),
             "operatorId": params.get("operatorId", ""),
             "isCompany": params.get("isCompany", "0"),
@@ -228,7 +234,7 @@ class TruckApiClient:
     
     def get_product_info(self, params):
         """获取产品信息"""
-        return self.post("/hcbapi/gateWay/pubCtrl.do", {
+        return self._cached_post("/hcbapi/gateWay/pubCtrl.do", {
             "channelId": params.get("channelId", "0000"),
             "operatorId": params.get("operatorId", ""),
             "bankId": params.get("bankId", ""),
@@ -636,7 +642,7 @@ class TruckApiClient:
 
     def get_operator_list(self, params):
         """获取运营商列表"""
-        return self.post("/hcbapi/gateWay/pubCtrl.do", {
+        return self._cached_post("/hcbapi/gateWay/pubCtrl.do", {
             "channelId": params.get("channelId", "0000"),
             "relativeurl": "com.hcb.channel.getOperatorList",
             "caller": "chefuAPP",
@@ -689,4 +695,58 @@ class TruckApiClient:
             "caller": "chefuAPP",
             "timestamp": params.get("timestamp"),
             "hashcode": params.get("hashcode")
-        }) 
\ No newline at end of file
+        }) 
+
+
+class AsyncTruckApiClient(TruckApiClient):
+    """
+    货车异步客户端：接口与TruckApiClient相同，业务方法返回可await的协程，业务错误语义一致（ret != "1" 抛出业务错误）
+    aiohttp会话在首次请求时于事件循环内创建，同一事件循环的客户端共用连接池；用完调用 aclose()
+    """
+
+    def __init__(self, base_url=None, log_file=None, cookies=None):
+        super().__init__(base_url, log_file, cookies)
+        api_config = CoreService.get_api_config()
+        self.timeout = api_config.get('timeout', 30)
+        self.retries = api_config.get('retry_count')
+        self.aio_session = None
+
+    def _get_aio_session(self):
+        if self.aio_session is None or self.aio_session.closed:
+            self.aio_session = aio_transport.new_session(self.timeout, self.cookies)
+        return self.aio_session
+
+    async def post(self, path, data, headers=None, cookies=None):
+        """统一的异步POST请求方法，请求体编码和响应解析与同步客户端相同"""
+        aiohttp = aio_transport.require_aiohttp()
+        url = self._build_url(path)
+        default_headers = self._build_headers(headers)
+        
+        self.log_service.log_api_request(path, data)
+        
+        cleaned_data = data
+        try:
+            cleaned_data, json_bytes = self._encode_body(data)
+            default_headers['Content-Length'] = str(len(json_bytes))
+            self.log_service.info(f"🌐 发送POST请求到: {url}")
+            
+            text = await aio_transport.request_text(self._get_aio_session(), 'POST', url, retries=self.retries,
+                                                    data=json_bytes, headers=default_headers, cookies=cookies)
+            self.log_service.log_api_response(path, text)
+            return self._parse_response(path, url, cleaned_data, text)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._raise_request_error(path, url, cleaned_data, e, network_error=True)
+        except Exception as e:
+            self._raise_request_error(path, url, cleaned_data, e, network_error=False)
+
+    async def _cached_post(self, path, data):
+        """参考数据接口的异步版本，同一事件循环内并发流程的相同请求只发一次"""
+        if self.reference_cache is None:
+            return await self.post(path, data)
+        key = self.reference_cache.make_key(self.base_url, path, data)
+        return await self.reference_cache.aget_or_load(key, lambda: self.post(path, data))
+
+    async def aclose(self):
+        if self.aio_session is not None:
+            await self.aio_session.close()
+            self.aio_session = None
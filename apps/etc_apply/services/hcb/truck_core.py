@@ -3,18 +3,29 @@
 货车ETC申办核心流程 - 基于55个接口的完整数据流分析
 """
 import time
-from typing import Dict, Any, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Iterable, Optional, Callable
 from apps.etc_apply.services.hcb.truck_api_client import TruckApiClient
+from apps.etc_apply.services.flow_checkpoint import FlowCheckpoint, FLOW_TRUCK
 from apps.etc_apply.services.hcb.truck_state_service import TruckFlowState, TruckStepManager, TruckStepStatus
+from apps.etc_apply.services.hcb.truck_step_registry import TRUCK_STEPS, LOOKUP_STEPS, TruckStepPlan
 from apps.etc_apply.services.rtx.log_service import LogService
 from apps.etc_apply.services.rtx.core_service import CoreService
+from apps.etc_apply.services.step_driver import Blocking, flow_step
 
 
 class TruckCore:
     """货车ETC申办核心流程控制器"""
     
+    TOTAL_STEPS = 21
+    MAX_CONCURRENT_STEPS = 4    # 调度器同时执行的步骤数上限，设为1时按步骤号依次执行
+    # 检查点保存的流程中间结果，继续流程时按原样恢复
+    CHECKPOINT_FIELDS = ('truck_etc_apply_id', 'truck_user_id', 'truck_user_wallet_id', 'order_id',
+                         'user_bind_bank_id', 'product_id', 'selected_operator', 'selected_product',
+                         'selected_bank', 'product_info')
+    
     def __init__(self, params: Dict[str, Any], progress_callback: Optional[Callable] = None, 
-                 base_url: str = None, browser_cookies: Dict = None):
+                 base_url: str = None, browser_cookies: Dict = None, persist_checkpoint: Optional[bool] = None):
         self.params = params
         self.base_url = base_url or "https://788360p9o5.yicp.fun"
         self.browser_cookies = browser_cookies or {}
@@ -23,6 +34,8 @@ class TruckCore:
         self.api_client = TruckApiClient(self.base_url, cookies=self.browser_cookies)
         self.flow_state = TruckFlowState(progress_callback)
         self.log_service = LogService("truck_core")
+        # 检查点：每步成功后落盘（默认按配置 checkpoint.enabled），失败或重启后可用 TruckCore.resume(run_id) 继续
+        self.checkpoint = FlowCheckpoint(FLOW_TRUCK, self.params, self.base_url, persist=persist_checkpoint)
         
         # 关键数据存储
         self.truck_etc_apply_id = None
@@ -48,6 +61,26 @@ class TruckCore:
         
         self.log_service.info("货车申办流程初始化完成")
     
+    @property
+    def run_id(self):
+        return self.checkpoint.run_id
+
+    def _save_checkpoint(self, step_number: int):
+        """步骤成功后保存检查点，最后一步完成后删除；落盘失败只告警，不影响申办"""
+        try:
+            state = {field: getattr(self, field) for field in self.CHECKPOINT_FIELDS}
+            self.checkpoint.record(step_number, self.params, state)
+            if step_number == self.TOTAL_STEPS:
+                self.checkpoint.finish()
+        except Exception as e:
+            self.log_service.warning(f"保存申办流程检查点失败: {e}")
+
+    def _fail_checkpoint(self, step_number: int, error):
+        try:
+            self.checkpoint.fail(step_number, error)
+        except Exception as e:
+            self.log_service.warning(f"保存申办流程检查点失败: {e}")
+
     def _handle_api_error(self, step_number: int, step_name: str, error: Exception):
         """处理API错误，提供详细的错误信息"""
         # 格式化错误消息
@@ -112,12 +145,9 @@ class TruckCore:
         try:
             self.log_service.info("开始执行完整货车申办流程")
             
-            # 执行完整的21步流程
-            for step in range(1, 22):
-                success = self._execute_step(step)
-                if not success:
-                    self.log_service.error(f"步骤{step}执行失败，流程终止")
-                    return None
+            # 执行完整的21步流程，无依赖的步骤并发
+            if not self.run_steps():
+                return None
             
             # 返回最终结果
             result = {
@@ -144,12 +174,9 @@ class TruckCore:
         try:
             self.log_service.info("开始执行货车申办前置流程（到步骤5）")
             
-            # 执行前5个步骤
-            for step in range(1, 6):
-                success = self._execute_step(step)
-                if not success:
-                    self.log_service.error(f"步骤{step}执行失败，流程终止")
-                    return None
+            # 执行运营商/产品/银行等查询步骤
+            if not self.run_steps(LOOKUP_STEPS):
+                return None
             
             return {
                 'truck_etc_apply_id': self.truck_etc_apply_id,
@@ -167,12 +194,9 @@ class TruckCore:
         try:
             self.log_service.info("继续执行货车申办后续流程（从步骤6）")
             
-            # 执行步骤6到21
-            for step in range(6, 22):
-                success = self._execute_step(step)
-                if not success:
-                    self.log_service.error(f"步骤{step}执行失败，流程终止")
-                    return None
+            # 执行剩余全部步骤，run_to_step5 已完成的查询步骤不再重复
+            if not self.run_steps(done=LOOKUP_STEPS):
+                return None
             
             return {
                 'truck_etc_apply_id': self.truck_etc_apply_id,
@@ -186,8 +210,83 @@ class TruckCore:
             self.log_service.error(f"货车申办后续流程异常: {str(e)}")
             raise e
     
+    @classmethod
+    def resume(cls, run_id: str, progress_callback: Optional[Callable] = None,
+               base_url: str = None, browser_cookies: Dict = None) -> Optional[Dict[str, Any]]:
+        """
+        从检查点继续货车流程：恢复参数和申办ID等中间结果，执行全部未完成的步骤
+        返回值与 run_full_truck_flow 相同，步骤失败时返回None（检查点保留，可再次继续）
+        """
+        return cls.from_checkpoint(run_id, progress_callback, base_url, browser_cookies).run_remaining_steps()
+
+    @classmethod
+    def from_checkpoint(cls, run_id: str, progress_callback: Optional[Callable] = None,
+                        base_url: str = None, browser_cookies: Dict = None) -> 'TruckCore':
+        """按检查点恢复流程对象（参数、申办ID等中间结果、已完成的步骤），不执行步骤"""
+        checkpoint = FlowCheckpoint.load(run_id)
+        if checkpoint.flow_type != FLOW_TRUCK:
+            raise Exception(f"检查点{run_id}不是货车申办流程")
+        if browser_cookies is None:
+            browser_cookies = CoreService.get_browser_cookies()
+        core = cls(checkpoint.params, progress_callback, base_url or checkpoint.base_url, browser_cookies)
+        core.checkpoint = checkpoint
+        for field in cls.CHECKPOINT_FIELDS:
+            if field in checkpoint.state:
+                setattr(core, field, checkpoint.state[field])
+        core.flow_state.set_truck_info(core.truck_etc_apply_id, core.truck_user_id, core.truck_user_wallet_id)
+        for step in checkpoint.completed_steps:
+            core.flow_state.step_status[step] = TruckStepStatus.SUCCESS
+        core.flow_state.current_step = max(checkpoint.completed_steps, default=0)
+        return core
+
+    def run_remaining_steps(self) -> Optional[Dict[str, Any]]:
+        """执行检查点中未完成的全部步骤"""
+        remaining = sorted(set(TRUCK_STEPS) - set(self.checkpoint.completed_steps))
+        if remaining:
+            self.log_service.info(f"继续货车申办流程 {self.run_id}：剩余步骤{remaining}")
+            if not self.run_steps(done=self.checkpoint.completed_steps):
+                return None
+        return {
+            'truck_etc_apply_id': self.truck_etc_apply_id,
+            'truck_user_id': self.truck_user_id,
+            'truck_user_wallet_id': self.truck_user_wallet_id,
+            'order_id': self.order_id,
+            'status': 'completed'
+        }
+
+    def run_steps(self, targets: Optional[Iterable[int]] = None, done: Iterable[int] = ()) -> bool:
+        """
+        按步骤注册表的依赖执行目标步骤（默认全部21步），目标缺少的依赖步骤自动补上，
+        依赖都已满足的步骤并发执行；关键步骤失败后不再启动新步骤，等正在执行的步骤结束后返回False
+        :param targets: 目标步骤集合
+        :param done: 视为已完成、不再执行的步骤
+        :return: 全部步骤成功（非关键步骤失败不影响）时返回True
+        """
+        plan = TruckStepPlan(targets, done)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_STEPS, thread_name_prefix='truck-step') as pool:
+            while True:
+                for step in plan.ready(self.MAX_CONCURRENT_STEPS - len(running)):
+                    plan.start(step)
+                    running[pool.submit(self._execute_step, step)] = step
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    plan.finish(running.pop(future), future.result())
+        return self._check_plan(plan)
+
+    def _check_plan(self, plan: TruckStepPlan) -> bool:
+        """记录调度结果，同步和异步调度共用"""
+        if plan.skipped:
+            self.log_service.warning(f"非关键步骤{sorted(plan.skipped)}失败，已跳过")
+        if plan.failed:
+            self.log_service.error(f"步骤{plan.failed[0]}执行失败，流程终止")
+        return plan.succeeded
+    
+    @flow_step
     def _execute_step(self, step_number: int) -> bool:
-        """执行单个步骤"""
+        """执行单个步骤（生成器写法，flow_step 包装后同步调用；异步驱动见 step_driver）"""
         step_name = TruckStepManager.get_step_name(step_number)
         self.log_service.info(f"{step_number}.{step_name}")
         
@@ -199,8 +298,13 @@ class TruckCore:
                 TruckStepStatus.RUNNING
             )
             
-            # 根据步骤号执行对应逻辑
-            success, error_detail = self._execute_step_logic(step_number)
+            # 按注册表执行步骤，可重试的步骤失败后按配置的次数重试
+            retries = TRUCK_STEPS[step_number].retries if step_number in TRUCK_STEPS else 0
+            for attempt in range(retries + 1):
+                success, error_detail = yield from self._execute_step_logic(step_number)
+                if success or attempt == retries:
+                    break
+                self.log_service.warning(f"{step_number}.{step_name}失败，第{attempt + 1}次重试: {error_detail}")
             
             if success:
                 self.flow_state.update_progress(
@@ -209,6 +313,7 @@ class TruckCore:
                     TruckStepStatus.SUCCESS
                 )
                 self.log_service.info(f"{step_number}.{step_name}完成")
+                self._save_checkpoint(step_number)
                 return True
             else:
                 # 使用具体的错误信息，如果没有则使用默认信息
@@ -257,6 +362,7 @@ class TruckCore:
                     TruckStepStatus.FAILED
                 )
                 self.log_service.error(error_msg)
+                self._fail_checkpoint(step_number, error_msg)
                 # 通过进度回调传递错误信息到UI
                 if self.flow_state.progress_callback:
                     self.flow_state.progress_callback(int((step_number / 21) * 100), error_msg)
@@ -265,6 +371,7 @@ class TruckCore:
         except Exception as e:
             # 使用新的错误处理机制
             self._handle_api_error(step_number, step_name, e)
+            self._fail_checkpoint(step_number, f"{step_number}.{step_name}异常: {str(e)}")
             # 通过进度回调传递错误信息到UI
             if self.flow_state.progress_callback:
                 error_msg = f"{step_number}.{step_name}异常: {str(e)}"
@@ -272,178 +379,19 @@ class TruckCore:
             return False
     
     def _execute_step_logic(self, step_number: int) -> tuple[bool, str]:
-        """执行具体步骤逻辑，返回(成功标志, 错误详情)"""
-        
-        if step_number == 1:
-            # 步骤1: 更新微信消息模板
-            try:
-                success = self._step1_update_wx_msg_template()
-                return (success, None if success else "更新微信消息模板失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "更新微信消息模板", e)
-            
-        elif step_number == 2:
-            # 步骤2: 获取运营商列表
-            try:
-                success = self._step2_get_operator_list()
-                return (success, None if success else "获取运营商列表失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "获取运营商列表", e)
-            
-        elif step_number == 3:
-            # 步骤3: 根据运营商获取产品列表
-            try:
-                success = self._step3_get_product_list_by_operator()
-                return (success, None if success else "获取产品列表失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "获取产品列表", e)
-            
-        elif step_number == 4:
-            # 步骤4: 获取银行列表
-            try:
-                success = self._step4_get_bank_list()
-                return (success, None if success else "获取银行列表失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "获取银行列表", e)
-            
-        elif step_number == 5:
-            # 步骤5: 获取产品信息
-            try:
-                success = self._step5_get_product_info()
-                return (success, None if success else "获取产品信息失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "获取产品信息", e)
-            
-        elif step_number == 6:
-            # 步骤6: 校验车牌号信息
-            try:
-                success = self._step6_check_plate_no_info()
-                return (success, None if success else "校验车牌号信息失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "校验车牌号信息", e)
-            
-        elif step_number == 7:
-            # 步骤7: 检查是否可申办
-            try:
-                success = self._step7_check_is_not_car_num()
-                return (success, None if success else "检查是否可申办失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "检查是否可申办", e)
-            
-        elif step_number == 8:
-            # 步骤8: 检查渠道使用地址
-            try:
-                success = self._step8_check_channel_use_address()
-                return (success, None if success else "检查渠道使用地址失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "检查渠道使用地址", e)
-            
-        elif step_number == 9:
-            # 步骤9: 校验手机号
-            try:
-                success = self._step9_check_phone()
-                return (success, None if success else "校验手机号失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "校验手机号", e)
-            
-        elif step_number == 10:
-            # 步骤10: 身份证OCR识别（可选）
-            try:
-                success = self._step10_ocr_identity_card()
-                return (success, None if success else "身份证OCR识别失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "身份证OCR识别", e)
-            
-        elif step_number == 11:
-            # 步骤11: 行驶证OCR识别（可选）
-            try:
-                success = self._step11_ocr_driver_license()
-                return (success, None if success else "行驶证OCR识别失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "行驶证OCR识别", e)
-            
-        elif step_number == 12:
-            # 步骤12: 提交申办银行信息（关键步骤，获取申办ID）
-            try:
-                success = self._step12_submit_apply_bank_info()
-                return (success, None if success else "提交申办银行信息失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "提交申办银行信息", e)
-            
-        elif step_number == 13:
-            # 步骤13: 交通违章查询（可选）
-            try:
-                success = self._step13_traffic_query()
-                return (success, None if success else "交通违章查询失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "交通违章查询", e)
-            
-        elif step_number == 14:
-            # 步骤14: 提交车辆信息
-            try:
-                success = self._step14_submit_vehicle_info()
-                return (success, None if success else "提交车辆信息失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "提交车辆信息", e)
-            
-        elif step_number == 15:
-            # 步骤15: 获取ETC申办信息
-            try:
-                success = self._step15_get_etc_apply_info()
-                return (success, None if success else "获取ETC申办信息失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "获取ETC申办信息", e)
-            
-        elif step_number == 16:
-            # 步骤16: 保存车辆视频信息（可选）
-            try:
-                success = self._step16_save_car_video_info()
-                return (success, None if success else "保存车辆视频信息失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "保存车辆视频信息", e)
-            
-        elif step_number == 17:
-            # 步骤17: 签发保险协议
-            try:
-                success = self._step17_issue_insure_agreements()
-                return (success, None if success else "签发保险协议失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "签发保险协议", e)
-            
-        elif step_number == 18:
-            # 步骤18: 查询绑定银行卡列表
-            try:
-                success = self._step18_select_bind_bank_list()
-                return (success, None if success else "查询绑定银行卡列表失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "查询绑定银行卡列表", e)
-            
-        elif step_number == 19:
-            # 步骤19: 快捷支付预存
-            try:
-                success = self._step19_quick_pay_prestore()
-                return (success, None if success else "快捷支付预存失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "快捷支付预存", e)
-            
-        elif step_number == 20:
-            # 步骤20: 提交OBU订单
-            try:
-                success = self._step20_submit_obu_order()
-                return (success, None if success else "提交OBU订单失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "提交OBU订单", e)
-            
-        elif step_number == 21:
-            # 步骤21: 流程完成
-            try:
-                success = self._step21_flow_completed()
-                return (success, None if success else "流程完成失败")
-            except Exception as e:
-                return self._handle_step_exception(step_number, "流程完成", e)
-            
-        else:
+        """执行注册表中声明的步骤方法（生成器），返回(成功标志, 错误详情)"""
+        spec = TRUCK_STEPS.get(step_number)
+        if spec is None:
             return (False, f"未知步骤号: {step_number}")
+        try:
+            method = getattr(self, spec.method)
+            if spec.blocking:
+                success = yield Blocking(method)
+            else:
+                success = yield from method()
+            return (success, None if success else f"{spec.name}失败")
+        except Exception as e:
+            return self._handle_step_exception(step_number, spec.name, e)
     
     # ==================== 具体步骤实现 ====================
     
@@ -457,7 +405,7 @@ class TruckCore:
                 openId=self.params.get('openId', 'oDefaultTestOpenId12345')
             )
             
-            response = self.api_client.update_wx_msg_template(params)
+            response = yield self.api_client.update_wx_msg_template(params)
             self.log_service.info("更新微信消息模板成功")
             return response.get('ret') == '1'
             
@@ -480,7 +428,7 @@ class TruckCore:
                     return True
             
             params = CoreService.generate_hcb_params('com.hcb.channel.getOperatorList')
-            response = self.api_client.get_operator_list(params)
+            response = yield self.api_client.get_operator_list(params)
             
             if not response or response.get('ret') != '1':
                 error_msg = response.get('msg', '获取运营商列表失败') if response else '网络请求失败'
@@ -532,7 +480,7 @@ class TruckCore:
             params = CoreService.generate_hcb_params('com.hcb.channel.getProductListByOperator', 
                                                    operatorId=operator_id)
             
-            response = self.api_client.get_product_list_by_operator(params)
+            response = yield self.api_client.get_product_list_by_operator(params)
             
             if not response or response.get('ret') != '1':
                 error_msg = response.get('msg', '获取产品列表失败') if response else '网络请求失败'
@@ -576,7 +524,7 @@ class TruckCore:
             operator_id = self.selected_operator.get('id')
             params = CoreService.generate_hcb_params('com.hcb.channel.getBankList', 
                                                    operatorId=operator_id)
-            response = self.api_client.get_bank_list(params)
+            response = yield self.api_client.get_bank_list(params)
             
             if not response or response.get('ret') != '1':
                 error_msg = response.get('msg', '获取银行列表失败') if response else '网络请求失败'
@@ -619,7 +567,7 @@ class TruckCore:
                                                    bankId=bank_id,
                                                    operatorId=self.selected_operator.get('id') if self.selected_operator else '')
             
-            response = self.api_client.get_product_info(params)
+            response = yield self.api_client.get_product_info(params)
             
             if not response or response.get('ret') != '1':
                 error_msg = response.get('msg', '获取产品信息失败') if response else '网络请求失败'
@@ -664,7 +612,7 @@ class TruckCore:
                 channelId=self.params.get('channelId', '0000')
             )
             
-            response = self.api_client.check_plate_no_info(params)
+            response = yield self.api_client.check_plate_no_info(params)
             if response.get('ret') == '1':
                 self.log_service.info("校验车牌号信息成功")
                 return True
@@ -686,7 +634,7 @@ class TruckCore:
                 channelId=self.params.get('channelId', '0000')
             )
             
-            response = self.api_client.check_is_not_car_num(params)
+            response = yield self.api_client.check_is_not_car_num(params)
             if response.get('ret') == '1':
                 self.log_service.info("检查是否可申办成功")
                 return True
@@ -707,7 +655,7 @@ class TruckCore:
                 channelId=self.params.get('channelId', '0000')
             )
             
-            response = self.api_client.check_channel_use_address(params)
+            response = yield self.api_client.check_channel_use_address(params)
             if response.get('ret') == '1':
                 self.log_service.info("检查渠道使用地址成功")
                 return True
@@ -741,7 +689,7 @@ class TruckCore:
             
             self.log_service.info(f"使用验证码: {verification_code}")
             
-            response = self.api_client.check_phone(params)
+            response = yield self.api_client.check_phone(params)
             if response.get('ret') == '1':
                 self.log_service.info("校验手机号成功")
                 return True
@@ -769,7 +717,7 @@ class TruckCore:
                 cardSide='front'
             )
             
-            response = self.api_client.ocr_identity_card(params)
+            response = yield self.api_client.ocr_identity_card(params)
             return response.get('ret') == '1'
             
         except Exception as e:
@@ -790,7 +738,7 @@ class TruckCore:
                 image=self.params.get('licenseUrl', '')
             )
             
-            response = self.api_client.ocr_driver_license(params)
+            response = yield self.api_client.ocr_driver_license(params)
             return response.get('ret') == '1'
             
         except Exception as e:
@@ -878,7 +826,7 @@ class TruckCore:
             self.log_service.info(f"使用默认身份证背面图片: {default_back_id_card_url}")
             self.log_service.info(f"使用默认银行卡图片: {default_bank_pic_url}")
             
-            response = self.api_client.submit_apply_bank_info(params)
+            response = yield self.api_client.submit_apply_bank_info(params)
             
             if response.get('ret') == '1':
                 # 提取关键数据
@@ -896,7 +844,8 @@ class TruckCore:
                     from apps.etc_apply.services.hcb.truck_data_service import TruckDataService
                     
                     # HCB_TRUCKUSEREXTENDS表主要存储设备和运营商状态信息，不需要用户详细信息
-                    extends_id = TruckDataService.insert_truck_user_extends(
+                    extends_id = yield Blocking(
+                        TruckDataService.insert_truck_user_extends,
                         self.truck_user_id, 
                         self.truck_etc_apply_id, 
                         {}  # 空参数，因为表结构主要是设备状态相关
@@ -980,7 +929,7 @@ class TruckCore:
                 carNum=self.params.get('carNum', '')
             )
             
-            response = self.api_client.traffic_query(params)
+            response = yield self.api_client.traffic_query(params)
             if response.get('ret') == '1':
                 self.log_service.info("交通违章查询成功")
                 return True
@@ -1049,7 +998,7 @@ class TruckCore:
                 'hashcode': CoreService.generate_hash()
             }
             
-            response = self.api_client.submit_vehicle_info(params)
+            response = yield self.api_client.submit_vehicle_info(params)
             if response.get('ret') == '1':
                 self.log_service.info("提交车辆信息成功")
                 return True
@@ -1075,7 +1024,7 @@ class TruckCore:
                 'hashcode': CoreService.generate_hash()
             }
             
-            response = self.api_client.get_etc_apply_info(params)
+            response = yield self.api_client.get_etc_apply_info(params)
             
             if response.get('ret') == '1':
                 # 更新申办信息
@@ -1107,7 +1056,7 @@ class TruckCore:
                 'hashcode': CoreService.generate_hash()
             }
             
-            response = self.api_client.save_car_video_info(params)
+            response = yield self.api_client.save_car_video_info(params)
             return response.get('ret') == '1'
             
         except Exception as e:
@@ -1127,7 +1076,7 @@ class TruckCore:
                 'hashcode': CoreService.generate_hash()
             }
             
-            response = self.api_client.issue_insure_agreements(params)
+            response = yield self.api_client.issue_insure_agreements(params)
             return response.get('ret') == '1'
             
         except Exception as e:
@@ -1143,7 +1092,7 @@ class TruckCore:
                 idCard=self.params.get('idCode', '')
             )
             
-            response = self.api_client.select_bind_bank_list(params)
+            response = yield self.api_client.select_bind_bank_list(params)
             
             if response.get('ret') == '1':
                 # 提取银行卡ID
@@ -1176,7 +1125,7 @@ class TruckCore:
                 'hashcode': CoreService.generate_hash()
             }
             
-            response = self.api_client.quick_pay_prestore(params)
+            response = yield self.api_client.quick_pay_prestore(params)
             return response.get('ret') == '1'
             
         except Exception as e:
@@ -1208,7 +1157,7 @@ class TruckCore:
             # 打印实际发送的参数
             self.log_service.info(f"步骤20 - 发送参数: {params}")
             
-            response = self.api_client.submit_obu_order(params)
+            response = yield self.api_client.submit_obu_order(params)
             return response.get('ret') == '1'
             
         except Exception as e:
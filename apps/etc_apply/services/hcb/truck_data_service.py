@@ -8,6 +8,8 @@ from datetime import datetime
 from typing import Dict, List, Any
 
 from common.mysql_util import MySQLUtil
+from common.data_factory import DataFactory
+from common.value_index import DEVICE_NO_INDEX
 from apps.etc_apply.services.hcb.truck_core_service import TruckCoreService
 
 
@@ -85,10 +87,8 @@ class TruckDataService:
             
             # ETC号总长度20位，省份代码4位，剩余16位随机数字
             etc_length = 20
-            remain = etc_length - len(prefix)
-            suffix = ''.join([str(random.randint(0, 9)) for _ in range(remain)])
-            
-            return prefix + suffix
+            # 对照hcb_newstock已有设备号查重，只返回未使用过的号码
+            return DataFactory.random_device_number(prefix, etc_length, CoreService.get_value_index(DEVICE_NO_INDEX))
             
         except Exception as e:
             # 异常时使用默认江苏代码
@@ -115,10 +115,8 @@ class TruckDataService:
             
             # OBU号总长度16位，省份代码4位，剩余12位随机数字
             obu_length = 16
-            remain = obu_length - len(prefix)
-            suffix = ''.join([str(random.randint(0, 9)) for _ in range(remain)])
-            
-            return prefix + suffix
+            # 对照hcb_newstock已有设备号查重，只返回未使用过的号码
+            return DataFactory.random_device_number(prefix, obu_length, CoreService.get_value_index(DEVICE_NO_INDEX))
             
         except Exception as e:
             # 异常时使用默认江苏代码
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+货车申办参考数据缓存 - 运营商列表、产品列表、银行列表、产品信息（流程步骤2~5）
+
+这些数据大约一天才变一次，批量申办时每个流程都重新请求没有必要：
+- 按 (base_url, 接口路径, 请求参数) 缓存解析后的响应，过了TTL重新请求；时间戳和签名不参与缓存键
+- 同一个键同时只有一个请求在途（single-flight），并发的流程等待并共用这次请求的结果，请求失败不缓存
+- 缓存落盘（temp/etc_reference_cache.json），程序重启后未过期的数据直接可用
+TTL 读取 etc_config.json 的 api.reference_cache_ttl（秒），设为0关闭缓存
+"""
+import asyncio
+import copy
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+from apps.etc_apply.services.rtx.core_service import CoreService
+from common.path_util import resource_path
+
+DEFAULT_TTL = 3600
+CACHE_FILE = resource_path(os.path.join('temp', 'etc_reference_cache.json'))  # 按项目根目录定位
+# 每次请求都不同、不影响返回数据的参数
+VOLATILE_PARAMS = ('timestamp', 'hashcode')
+
+
+class TruckReferenceCache:
+    """
+    参考数据缓存，同步客户端用 get_or_load，异步客户端用 aget_or_load
+    返回的都是缓存数据的副本，流程修改返回值不会影响其他流程
+    """
+
+    def __init__(self, ttl: Optional[float] = None, cache_file: Optional[str] = CACHE_FILE):
+        self._ttl = ttl                 # None 时按配置读取
+        self.cache_file = cache_file    # None 时不落盘
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}   # {key: {'loaded_at': 时间戳, 'value': 响应}}
+        self._inflight: Dict[str, Future] = {}          # 同步请求在途
+        self._async_inflight: Dict[tuple, asyncio.Future] = {}  # 异步请求在途，按 (事件循环, key)
+        self._warm_loaded = False
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return float(CoreService.get_api_config().get('reference_cache_ttl', DEFAULT_TTL))
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def make_key(base_url: str, path: str, data: Dict[str, Any]) -> str:
+        params = {k: v for k, v in (data or {}).items() if k not in VOLATILE_PARAMS}
+        return f"{base_url.rstrip('/')}{path}?{json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)}"
+
+    def _get_fresh(self, key: str):
+        """取未过期的缓存，调用方持有锁；未命中返回 (False, None)"""
+        if not self._warm_loaded:
+            self._warm_loaded = True
+            self._load_file()
+        entry = self._entries.get(key)
+        if entry and time.time() - entry['loaded_at'] < self.ttl:
+            return True, copy.deepcopy(entry['value'])
+        return False, None
+
+    def _store(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = {'loaded_at': time.time(), 'value': copy.deepcopy(value)}
+            snapshot = dict(self._entries)
+        self._save_file(snapshot)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """命中直接返回；同一个键已有请求在途时等待它的结果，否则由当前线程请求"""
+        if not self.enabled:
+            return loader()
+        with self._lock:
+            hit, value = self._get_fresh(key)
+            if hit:
+                return value
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return copy.deepcopy(future.result())
+        try:
+            value = loader()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return copy.deepcopy(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def aget_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_load 的异步版本，同一事件循环内的并发流程共用一个在途请求"""
+        if not self.enabled:
+            return await loader()
+        inflight_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            hit, value = self._get_fresh(key)
+            if hit:
+                return value
+            future = self._async_inflight.get(inflight_key)
+            owner = future is None
+            if owner:
+                future = self._async_inflight[inflight_key] = asyncio.get_running_loop().create_future()
+        if not owner:
+            # shield：某个等待方被取消不影响其他等待方
+            return copy.deepcopy(await asyncio.shield(future))
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 没有等待方时也算已取走异常，避免 "exception was never retrieved" 告警
+            raise
+        else:
+            # 落盘是文件IO，放到线程池
+            await asyncio.to_thread(self._store, key, value)
+            future.set_result(value)
+            return copy.deepcopy(value)
+        finally:
+            with self._lock:
+                self._async_inflight.pop(inflight_key, None)
+
+    def invalidate(self, base_url: Optional[str] = None):
+        """使缓存失效：不传参数清空全部，传base_url只清空该环境的数据"""
+        with self._lock:
+            self._warm_loaded = True
+            if base_url is None:
+                self._entries.clear()
+            else:
+                prefix = base_url.rstrip('/')
+                for key in [k for k in self._entries if k.startswith(prefix + '/')]:
+                    del self._entries[key]
+            snapshot = dict(self._entries)
+        self._save_file(snapshot)
+
+    def _load_file(self):
+        """启动时读取落盘的缓存，只保留未过期的；文件损坏时忽略"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            now, ttl = time.time(), self.ttl
+            for key, entry in entries.items():
+                if now - entry['loaded_at'] < ttl:
+                    self._entries.setdefault(key, entry)
+        except Exception as e:
+            print(f"[WARNING] 读取参考数据缓存失败 {self.cache_file}: {e}")
+
+    def _save_file(self, entries: Dict[str, Dict[str, Any]]):
+        """原子写入：先写临时文件再替换；落盘失败只告警"""
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            tmp_path = f'{self.cache_file}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, separators=(',', ':'), default=str)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"[WARNING] 保存参考数据缓存失败 {self.cache_file}: {e}")
+
+
+# 全局默认缓存实例，所有货车客户端共用
+truck_reference_cache = TruckReferenceCache()
@@ -213,6 +213,41 @@ def start_truck_apply_step_flow(params, ui):
     ui.worker_thread.start()
 
 
+def resume_truck_apply_flow(run_id, ui):
+    """
+    从检查点继续货车申办流程（流程失败或程序重启后），执行全部未完成的步骤
+    :param run_id: 检查点ID，来自 FlowCheckpoint.list_resumable
+    :param ui: UI主窗口对象
+    """
+    def progress_callback(percent, msg):
+        if hasattr(ui, 'progress_signal'):
+            ui.progress_signal.emit(percent, msg)
+        if hasattr(ui, 'log_signal'):
+            ui.log_signal.emit(msg)
+
+    progress_callback.ui = ui
+    ui.duplicate_service = None     # 继续流程不做重复申办检查，也就没有需要恢复的记录状态
+
+    def run_remaining():
+        worker = TruckCore.from_checkpoint(run_id, progress_callback)
+        ui.truck_worker = worker
+        result = worker.run_remaining_steps()
+        ui.truck_etc_apply_id = worker.truck_etc_apply_id
+        ui.truck_user_id = worker.truck_user_id
+        ui.truck_user_wallet_id = worker.truck_user_wallet_id
+        return result
+
+    if not hasattr(ui, 'worker_thread_list'):
+        ui.worker_thread_list = []
+    ui.worker_thread_list = [t for t in ui.worker_thread_list if t.isRunning()]
+    ui.worker_thread = WorkerQThread(run_remaining)
+    ui.worker_thread_list.append(ui.worker_thread)
+    ui.worker_thread.log_signal.connect(ui.log_signal.emit)
+    ui.worker_thread.progress_signal.connect(ui.progress_signal.emit)
+    ui.worker_thread.finished_signal.connect(lambda result: handle_truck_result(result, ui))
+    ui.worker_thread.start()
+
+
 def show_truck_confirm_dialog(ui, step5_result):
     """
     显示货车申办确认对话框
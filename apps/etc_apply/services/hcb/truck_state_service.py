@@ -2,6 +2,7 @@
 """
 货车ETC申办状态管理服务
 """
+import threading
 from typing import Dict, Any, Optional, Callable
 from enum import Enum
 from apps.etc_apply.services.rtx.core_service import CoreService
@@ -28,15 +29,18 @@ class TruckFlowState:
         self.truck_user_id = None
         self.truck_user_wallet_id = None
         self.params = {}
+        self._lock = threading.Lock()  # 调度器并发执行无依赖的步骤时，多个线程同时更新进度
         
     def update_progress(self, step_number: int, message: str, status: TruckStepStatus = TruckStepStatus.SUCCESS):
         """更新进度"""
-        self.current_step = step_number
-        self.step_status[step_number] = status
-        
-        if self.progress_callback:
-            percent = int((step_number / self.total_steps) * 100)
-            self.progress_callback(percent, message)
+        with self._lock:
+            # 并发步骤的完成顺序不固定，进度只前进不回退
+            self.current_step = max(self.current_step, step_number)
+            self.step_status[step_number] = status
+
+            if self.progress_callback:
+                percent = int((self.current_step / self.total_steps) * 100)
+                self.progress_callback(percent, message)
     
     def set_truck_info(self, truck_etc_apply_id: str, truck_user_id: str = None, truck_user_wallet_id: str = None):
         """设置货车申办信息"""
@@ -109,7 +113,10 @@ class TruckStepManager:
     
     @classmethod
     def get_step_name(cls, step_number: int) -> str:
-        """获取步骤名称"""
+        """获取步骤名称，以步骤注册表的声明为准"""
+        from apps.etc_apply.services.hcb.truck_step_registry import TRUCK_STEPS
+        if step_number in TRUCK_STEPS:
+            return TRUCK_STEPS[step_number].name
         step_def = cls.STEP_DEFINITIONS.get(step_number, {})
         return step_def.get("name", f"步骤{step_number}")
     
@@ -133,8 +140,9 @@ class TruckStepManager:
     
     @staticmethod
     def get_critical_steps() -> list:
-        """获取关键步骤"""
-        return [5, 6, 8, 10]  # 提交申办信息、提交车辆信息、签发协议、支付
+        """获取关键步骤（失败即终止流程），由步骤注册表声明"""
+        from apps.etc_apply.services.hcb.truck_step_registry import TRUCK_STEPS
+        return sorted(step for step, spec in TRUCK_STEPS.items() if spec.critical)
     
     @staticmethod
     def is_critical_step(step_number: int) -> bool:
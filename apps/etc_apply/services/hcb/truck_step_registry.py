@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+货车申办步骤注册表 - 声明每个步骤的输入、输出、依赖、重试策略和关键性，由调度器按依赖关系执行
+
+- inputs / outputs：步骤读写的 TruckCore 流程属性（申办参数 params 始终可用，不列出）
+- deps：必须先完成的步骤。除了数据依赖，写接口之间按业务顺序串联，提交申办（步骤12）要等全部前置校验通过
+- idempotent：只读/可重复调用的步骤，失败后按 TruckStepManager.get_step_retry_count 重试；写接口不重试
+- critical：关键步骤失败则流程失败；非关键步骤（可跳过的查询、可选的OCR/视频）失败后后续步骤照常执行
+- blocking：只有数据库操作的步骤，异步驱动时整体放到线程池
+部分执行用目标步骤集合表示，调度器自动补上未完成的依赖步骤
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from apps.etc_apply.services.hcb.truck_state_service import TruckStepManager
+
+
+class TruckStepSpec:
+    """单个步骤的声明"""
+
+    def __init__(self, number: int, name: str, method: str, deps: Iterable[int] = (),
+                 inputs: Iterable[str] = (), outputs: Iterable[str] = (),
+                 idempotent: bool = False, critical: bool = True, blocking: bool = False):
+        self.number = number
+        self.name = name            # 错误提示中使用的步骤名
+        self.method = method        # TruckCore 上的步骤方法名
+        self.deps = tuple(deps)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.idempotent = idempotent
+        self.critical = critical
+        self.blocking = blocking
+
+    @property
+    def retries(self) -> int:
+        """失败后的重试次数，写接口不重试，避免重复提交"""
+        if not self.idempotent:
+            return 0
+        return max(0, int(TruckStepManager.get_step_retry_count(self.number)))
+
+
+_SPECS = [
+    TruckStepSpec(1, "更新微信消息模板", '_step1_update_wx_msg_template', idempotent=True),
+    TruckStepSpec(2, "获取运营商列表", '_step2_get_operator_list',
+                  outputs=('operator_list', 'selected_operator'), idempotent=True),
+    TruckStepSpec(3, "获取产品列表", '_step3_get_product_list_by_operator', deps=(2,),
+                  inputs=('selected_operator',), outputs=('product_list', 'selected_product'), idempotent=True),
+    TruckStepSpec(4, "获取银行列表", '_step4_get_bank_list', deps=(2,),
+                  inputs=('selected_operator',), outputs=('bank_list', 'selected_bank'), idempotent=True),
+    TruckStepSpec(5, "获取产品信息", '_step5_get_product_info', deps=(2, 3),
+                  inputs=('selected_operator', 'selected_product'), outputs=('product_info', 'product_id'),
+                  idempotent=True),
+    TruckStepSpec(6, "校验车牌号信息", '_step6_check_plate_no_info', idempotent=True, critical=False),
+    TruckStepSpec(7, "检查是否可申办", '_step7_check_is_not_car_num', idempotent=True, critical=False),
+    TruckStepSpec(8, "检查渠道使用地址", '_step8_check_channel_use_address', idempotent=True, critical=False),
+    TruckStepSpec(9, "校验手机号", '_step9_check_phone', idempotent=True),
+    TruckStepSpec(10, "身份证OCR识别", '_step10_ocr_identity_card', idempotent=True, critical=False),
+    TruckStepSpec(11, "行驶证OCR识别", '_step11_ocr_driver_license', idempotent=True, critical=False),
+    TruckStepSpec(12, "提交申办银行信息", '_step12_submit_apply_bank_info', deps=(1, 4, 5, 6, 7, 8, 9, 10, 11),
+                  inputs=('product_id', 'selected_product'),
+                  outputs=('truck_etc_apply_id', 'truck_user_id', 'truck_user_wallet_id')),
+    TruckStepSpec(13, "交通违章查询", '_step13_traffic_query', deps=(12,),
+                  inputs=('truck_etc_apply_id', 'product_id'), idempotent=True, critical=False),
+    TruckStepSpec(14, "提交车辆信息", '_step14_submit_vehicle_info', deps=(12,),
+                  inputs=('truck_etc_apply_id', 'product_id')),
+    TruckStepSpec(15, "获取ETC申办信息", '_step15_get_etc_apply_info', deps=(14,),
+                  inputs=('truck_etc_apply_id',), outputs=('order_id',), idempotent=True),
+    TruckStepSpec(16, "保存车辆视频信息", '_step16_save_car_video_info', deps=(14,),
+                  inputs=('truck_etc_apply_id',), critical=False),
+    TruckStepSpec(17, "签发保险协议", '_step17_issue_insure_agreements', deps=(15, 16),
+                  inputs=('order_id', 'truck_etc_apply_id'), outputs=('order_id',)),
+    TruckStepSpec(18, "查询绑定银行卡列表", '_step18_select_bind_bank_list', deps=(12,),
+                  outputs=('user_bind_bank_id',), idempotent=True),
+    TruckStepSpec(19, "快捷支付预存", '_step19_quick_pay_prestore', deps=(17, 18),
+                  inputs=('order_id', 'truck_user_id', 'user_bind_bank_id')),
+    TruckStepSpec(20, "提交OBU订单", '_step20_submit_obu_order', deps=(19,),
+                  inputs=('order_id', 'truck_etc_apply_id')),
+    TruckStepSpec(21, "流程完成", '_step21_flow_completed', deps=(13, 20),
+                  inputs=('truck_etc_apply_id', 'truck_user_id'), blocking=True),
+]
+
+TRUCK_STEPS: Dict[int, TruckStepSpec] = {spec.number: spec for spec in _SPECS}
+ALL_STEPS = frozenset(TRUCK_STEPS)
+LOOKUP_STEPS = frozenset([1, 2, 3, 4, 5])     # 运营商/产品/银行等查询，分步流程中先执行这些再等用户确认
+
+
+def dependency_closure(targets: Iterable[int], done: Iterable[int] = ()) -> Set[int]:
+    """目标步骤加上它们尚未完成的全部依赖步骤"""
+    done = set(done)
+    result = set()
+    stack = [step for step in targets if step not in done]
+    while stack:
+        step = stack.pop()
+        if step in result:
+            continue
+        if step not in TRUCK_STEPS:
+            raise Exception(f"未知步骤号: {step}")
+        result.add(step)
+        stack.extend(dep for dep in TRUCK_STEPS[step].deps if dep not in done)
+    return result
+
+
+def validate_registry():
+    """检查声明是否自洽：依赖的步骤存在、没有环，每个输入都由某个前序步骤产出"""
+    for spec in _SPECS:
+        for dep in spec.deps:
+            if dep not in TRUCK_STEPS or dep == spec.number:
+                raise Exception(f"步骤{spec.number}依赖的步骤{dep}不存在")
+        ancestors = dependency_closure(spec.deps)
+        if spec.number in ancestors:
+            raise Exception(f"步骤{spec.number}存在循环依赖")
+        produced = {output for step in ancestors for output in TRUCK_STEPS[step].outputs}
+        missing = [name for name in spec.inputs if name not in produced]
+        if missing:
+            raise Exception(f"步骤{spec.number}的输入{missing}没有由依赖步骤产出")
+
+
+validate_registry()
+
+
+class TruckStepPlan:
+    """
+    一次执行的调度状态：待执行、执行中、已完成、失败的步骤
+    关键步骤失败后不再启动新步骤，正在执行的步骤照常结束
+    """
+
+    def __init__(self, targets: Optional[Iterable[int]] = None, done: Iterable[int] = ()):
+        self.done = set(done)
+        self.pending = dependency_closure(ALL_STEPS if targets is None else targets, self.done)
+        self.running: Set[int] = set()
+        self.failed: List[int] = []        # 失败的关键步骤
+        self.skipped: List[int] = []       # 失败后跳过的非关键步骤
+
+    def ready(self, limit: Optional[int] = None) -> List[int]:
+        """依赖都已完成、可以启动的步骤，按步骤号排序"""
+        if self.failed:
+            return []
+        steps = sorted(step for step in self.pending if all(dep in self.done for dep in TRUCK_STEPS[step].deps))
+        return steps if limit is None else steps[:max(0, limit)]
+
+    def start(self, step: int):
+        self.pending.discard(step)
+        self.running.add(step)
+
+    def finish(self, step: int, success: bool):
+        self.running.discard(step)
+        if success:
+            self.done.add(step)
+        elif not TRUCK_STEPS[step].critical:
+            self.skipped.append(step)
+            self.done.add(step)
+        else:
+            self.failed.append(step)
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failed and not self.pending and not self.running
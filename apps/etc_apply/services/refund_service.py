@@ -5,10 +5,10 @@ ETC申办退款服务 - 基于批量退款脚本改造
 在申办完成后自动执行退款操作
 """
 
-import requests
 import json
 import os
 from typing import Optional, Dict, Any
+from common.http_transport import new_session
 
 class RefundService:
     """退款服务类"""
@@ -20,6 +20,7 @@ class RefundService:
         self.login_url = f'{self.base_url}/fenmi/auth/login'
         self.headers = self._get_base_headers()
         self.is_logged_in = False
+        self.session = new_session()  # 共享连接池，登录、查询、退款复用同一连接
         
         # 从配置文件读取登录信息
         refund_config = self.config.get('refund', {})
@@ -78,7 +79,7 @@ class RefundService:
             headers['Content-Type'] = 'application/json;charset=UTF-8'
             
             # 发送登录请求
-            response = requests.post(self.login_url, headers=headers, json=login_data, verify=False)
+            response = self.session.post(self.login_url, headers=headers, json=login_data, verify=False)
             
             if response.status_code == 200:
                 result = response.json()
@@ -108,7 +109,7 @@ class RefundService:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, verify=False)
+            response = self.session.get(url, headers=self.headers, params=params, verify=False)
             
             if response.status_code == 200:
                 result = response.json()
@@ -145,7 +146,7 @@ class RefundService:
         print(f"[REFUND] 处理退款订单: {order.get('bizOrderNo')}")
         
         try:
-            response = requests.post(url, headers=refund_headers, json=data, verify=False)
+            response = self.session.post(url, headers=refund_headers, json=data, verify=False)
             
             if response.status_code == 401:  # token过期
                 print(f"[REFUND] Token已过期，尝试重新登录...")
@@ -1,4 +1,6 @@
-import requests
+import json
+from common import aio_transport
+from common.http_transport import new_session
 from apps.etc_apply.services.rtx.log_service import LogService
 from apps.etc_apply.services.rtx.core_service import CoreService
 
@@ -6,14 +8,15 @@ from apps.etc_apply.services.rtx.core_service import CoreService
 class ApiClient:
     def __init__(self, base_url, log_file=None, cookies=None):
         self.base_url = base_url
-        self.session = requests.Session()
+        api_config = CoreService.get_api_config()
+        # 共享连接池的会话：并发流程复用连接，带默认超时和幂等重试
+        self.session = new_session(api_config.get('timeout'), api_config.get('retry_count'))
         self.log_service = LogService("api_client", log_file)
         self.cookies = cookies or {}
         if self.cookies:
             self.session.cookies.update(self.cookies)
 
-    def post(self, path, data, headers=None, cookies=None):
-        url = self.base_url + path
+    def _build_headers(self, headers=None):
         default_headers = {
             "User-Agent": "Mozilla/5.0 ...",
             "Accept": "application/json, text/javascript, */*; q=0.01",
@@ -22,6 +25,75 @@ class ApiClient:
         }
         if headers:
             default_headers.update(headers)
+        return default_headers
+
+    def _parse_response(self, path, url, data, text):
+        """解析响应并检查业务状态码（同步/异步客户端共用）：只有code=200是成功，其他都是业务错误"""
+        try:
+            response_data = json.loads(text)
+        except ValueError:
+            response_data = None
+        if not isinstance(response_data, dict):
+            self.log_service.error(f"接口返回内容不是JSON: {text}")
+            raise Exception(f"接口响应格式错误: {path} - 返回内容不是有效的JSON格式")
+        if response_data.get("code") != 200:
+            # 提取业务错误信息
+            error_msg = response_data.get("msg") or response_data.get("message") or f"业务错误: {response_data.get('code')}"
+            error_code = response_data.get("code")
+            
+            # 记录详细错误信息
+            self.log_service.error(f"{path} 调用失败 | URL: {url} | 错误码: {error_code} | 错误信息: {error_msg}")
+            
+            # 创建结构化异常信息
+            error_detail = CoreService.create_api_error_detail(
+                api_path=path,
+                url=url,
+                error_code=error_code,
+                error_message=error_msg,
+                request_data=data,
+                response_data=response_data
+            )
+            
+            # 抛出结构化异常
+            exception = Exception(f"业务错误: {error_msg}")
+            exception.error_detail = error_detail
+            raise exception
+        return response_data
+
+    def _raise_request_error(self, path, data, e):
+        """请求异常统一转换：区分网络错误和API错误，附带error_detail后抛出"""
+        if "Connection refused" in str(e) or "timeout" in str(e).lower():
+            error_msg = CoreService.format_network_error(path, e)
+            error_type = "network_error"
+        elif "业务错误" in str(e):
+            # 业务错误已经有详细信息，直接抛出
+            raise e
+        else:
+            error_msg = CoreService.handle_exception_with_context(path, e)
+            error_type = "system_error"
+        
+        # 记录错误
+        self.log_service.log_api_error(path, data, e)
+        
+        # 创建结构化异常信息（非业务错误）
+        if not hasattr(e, 'error_detail'):
+            error_detail = {
+                "api_path": path,
+                "url": self.base_url + path,
+                "error_type": error_type,
+                "error_message": error_msg,
+                "original_error": str(e)
+            }
+            
+            exception = Exception(error_msg)
+            exception.error_detail = error_detail
+            raise exception
+        else:
+            raise Exception(error_msg)
+
+    def post(self, path, data, headers=None, cookies=None):
+        url = self.base_url + path
+        default_headers = self._build_headers(headers)
         if not self.session.cookies and self.cookies:
             self.session.cookies.update(self.cookies)
         
@@ -31,67 +103,9 @@ class ApiClient:
             resp = self.session.post(url, json=data, headers=default_headers, cookies=cookies)  # 用json参数
             resp.raise_for_status()
             self.log_service.log_api_response(path, resp.text)
-            try:
-                response_data = resp.json()
-                # 检查API响应状态 - 只有200是成功，其他都是业务错误
-                if response_data.get("code") != 200:
-                    # 提取业务错误信息
-                    error_msg = response_data.get("msg") or response_data.get("message") or f"业务错误: {response_data.get('code')}"
-                    error_code = response_data.get("code")
-                    
-                    # 记录详细错误信息
-                    self.log_service.error(f"{path} 调用失败 | URL: {url} | 错误码: {error_code} | 错误信息: {error_msg}")
-                    
-                    # 创建结构化异常信息
-                    error_detail = CoreService.create_api_error_detail(
-                        api_path=path,
-                        url=url,
-                        error_code=error_code,
-                        error_message=error_msg,
-                        request_data=data,
-                        response_data=response_data
-                    )
-                    
-                    # 抛出结构化异常
-                    exception = Exception(f"业务错误: {error_msg}")
-                    exception.error_detail = error_detail
-                    raise exception
-                return response_data
-            except Exception as e:
-                if "业务错误" not in str(e) and "code" not in str(e):  # 避免重复错误信息
-                    self.log_service.error(f"接口返回内容不是JSON: {resp.text}")
-                    raise Exception(f"接口响应格式错误: {path} - 返回内容不是有效的JSON格式")
-                raise e
+            return self._parse_response(path, url, data, resp.text)
         except Exception as e:
-            # 区分网络错误和API错误
-            if "Connection refused" in str(e) or "timeout" in str(e).lower():
-                error_msg = CoreService.format_network_error(path, e)
-                error_type = "network_error"
-            elif "业务错误" in str(e):
-                # 业务错误已经有详细信息，直接抛出
-                raise e
-            else:
-                error_msg = CoreService.handle_exception_with_context(path, e)
-                error_type = "system_error"
-            
-            # 记录错误
-            self.log_service.log_api_error(path, data, e)
-            
-            # 创建结构化异常信息（非业务错误）
-            if not hasattr(e, 'error_detail'):
-                error_detail = {
-                    "api_path": path,
-                    "url": self.base_url + path,
-                    "error_type": error_type,
-                    "error_message": error_msg,
-                    "original_error": str(e)
-                }
-                
-                exception = Exception(error_msg)
-                exception.error_detail = error_detail
-                raise exception
-            else:
-                raise Exception(error_msg)
+            self._raise_request_error(path, data, e)
 
     # 业务高阶方法
     def check_car_num(self, params):
@@ -222,3 +236,41 @@ class ApiClient:
             "verifyCode": verify_code,
             "phoneNumber": params["bindBankPhone"]
         })
+
+
+class AsyncApiClient(ApiClient):
+    """
+    异步客户端：接口与ApiClient相同，业务方法返回可await的协程，业务错误语义一致（code != 200 抛出业务错误）
+    aiohttp会话在首次请求时于事件循环内创建，同一事件循环的客户端共用连接池；用完调用 aclose()
+    """
+
+    def __init__(self, base_url, log_file=None, cookies=None):
+        super().__init__(base_url, log_file, cookies)
+        api_config = CoreService.get_api_config()
+        self.timeout = api_config.get('timeout')
+        self.retries = api_config.get('retry_count')
+        self.aio_session = None
+
+    def _get_aio_session(self):
+        if self.aio_session is None or self.aio_session.closed:
+            self.aio_session = aio_transport.new_session(self.timeout, self.cookies)
+        return self.aio_session
+
+    async def post(self, path, data, headers=None, cookies=None):
+        url = self.base_url + path
+        default_headers = self._build_headers(headers)
+        
+        self.log_service.log_api_request(path, data)
+        
+        try:
+            text = await aio_transport.request_text(self._get_aio_session(), 'POST', url, retries=self.retries,
+                                                    json=data, headers=default_headers, cookies=cookies)
+            self.log_service.log_api_response(path, text)
+            return self._parse_response(path, url, data, text)
+        except Exception as e:
+            self._raise_request_error(path, data, e)
+
+    async def aclose(self):
+        if self.aio_session is not None:
+            await self.aio_session.close()
+            self.aio_session = None
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+客车ETC批量申办 - 回归/压测用，不依赖PyQt
+多个申办人在有限大小的线程池中并发跑完整流程（步骤1~15），每个申办人一个Core实例，
+即各自独立的ApiClient会话；签约校验使用固定验证码，需开启Mock数据
+结束后输出汇总（各步骤成功/失败数、耗时分位数、每分钟申办数）和每个申办人的订单号CSV
+
+用法：
+    python -m apps.etc_apply.services.rtx.batch_runner --count 200 --workers 8
+    python -m apps.etc_apply.services.rtx.batch_runner --input applicants.csv --workers 4
+    python -m apps.etc_apply.services.rtx.batch_runner --count 1000 --workers 300 --async
+退出码：0 全部成功，1 有失败或出错，130 已取消
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+from common.data_factory import DataFactory
+from common.path_util import resource_path
+from common.identity_factory import IdentityFactory
+from common.value_index import CAR_NUM_INDEX
+from apps.etc_apply.services.async_flow_driver import AsyncFlowDriver
+from apps.etc_apply.services.rtx.core_service import CoreService
+from apps.etc_apply.services.rtx.data_service import DataService
+from apps.etc_apply.services.rtx.etc_core import Core
+from apps.etc_apply.services.rtx.state_service import StepManager
+
+BATCH_DIR = resource_path(os.path.join('temp', 'etc_batch_runs'))  # 汇总和CSV输出目录，与检查点同在项目根目录下
+DEFAULT_WORKERS = 4
+DEFAULT_VERIFY_CODE = '123456'  # Mock数据开启时签约校验使用的固定验证码
+BANK_NAMES = ['中国工商银行', '中国建设银行', '中国农业银行', '中国银行', '交通银行', '招商银行']
+
+# 流程步骤：(步骤号, Core方法名)，步骤8单独传入验证码；Core.INDEPENDENT_STEPS 中的步骤并发执行
+FLOW_STEPS = Core.FLOW_STEPS
+
+# run_id 为申办流程检查点ID，失败的申办人可用 Core.resume(run_id) 从失败步骤继续
+CSV_FIELDS = ['index', 'car_num', 'name', 'id_code', 'phone', 'status', 'order_id', 'sign_order_id',
+              'failed_step', 'error', 'elapsed', 'run_id']
+
+
+def percentile(values: List[float], p: float) -> float:
+    """最近秩分位数，values 为空时返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """耗时分布（秒）：p50/p90/p99/max"""
+    return {
+        'p50': round(percentile(values, 50), 3),
+        'p90': round(percentile(values, 90), 3),
+        'p99': round(percentile(values, 99), 3),
+        'max': round(max(values), 3) if values else 0.0,
+    }
+
+
+class BatchApplyRunner:
+    """
+    批量申办：run() 返回汇总字典，并把汇总JSON和订单CSV写到 BATCH_DIR
+    申办人记录字段与 DataService.build_apply_params 的表单字段一致：
+    name / id_code / phone / bank_no / bank_name / plate_province / plate_letter / plate_number /
+    vehicle_color / vin / selected_product
+    """
+
+    def __init__(self, applicants: List[Dict[str, Any]], workers: int = DEFAULT_WORKERS,
+                 verify_code: str = DEFAULT_VERIFY_CODE, use_mock: bool = True, output_dir: str = BATCH_DIR,
+                 base_url: Optional[str] = None, browser_cookies: Optional[dict] = None, use_async: bool = False):
+        self.applicants = list(applicants)
+        self.workers = max(1, int(workers))
+        self.verify_code = verify_code
+        self.use_mock = use_mock          # 批次开始前开启Mock数据，结束后关闭
+        self.output_dir = output_dir
+        self.base_url = base_url or CoreService.get_api_base_url()
+        self.browser_cookies = browser_cookies if browser_cookies is not None else CoreService.get_browser_cookies()
+        self.use_async = use_async        # 单个事件循环驱动全部申办人，workers 为同时在跑的流程数
+        self.run_id = time.strftime('%Y%m%d_%H%M%S')
+        self.results: List[Dict[str, Any]] = []
+        self._cancel = threading.Event()
+        CoreService.register_value_indexes()
+
+    def stop(self):
+        """取消：正在跑的申办人在当前步骤结束后停止，未开始的不再执行"""
+        self._cancel.set()
+
+    @staticmethod
+    def generate_applicants(n: int, province: Optional[str] = None, color: str = '蓝色',
+                            seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        生成n个申办人：车牌不重复（同时按车牌号索引排除HCB库中已有的），身份证/手机号/银行卡带合法校验位
+        """
+        rng = random.Random(seed)
+        np_rng = None
+        if seed is not None:
+            import numpy
+            np_rng = numpy.random.default_rng(rng.getrandbits(64))
+        plate_index = CoreService.get_value_index(CAR_NUM_INDEX)
+        province = province or CoreService.get_ui_config().get('default_province', '苏')
+
+        plates = []
+        seen = set()
+        while len(plates) < n:
+            cols = DataFactory.random_plate_numbers(n - len(plates), province, color, rng=np_rng, index=plate_index)
+            for plate in cols['plate_number']:
+                if plate not in seen:
+                    seen.add(plate)
+                    plates.append(plate)
+
+        names = IdentityFactory.names(n, rng)
+        id_codes = IdentityFactory.id_numbers(n, rng)
+        phones = IdentityFactory.phones(n, rng)
+        bank_cards = IdentityFactory.bank_cards(n, rng)
+        return [
+            {
+                'name': names[i],
+                'id_code': id_codes[i],
+                'phone': phones[i],
+                'bank_no': bank_cards[i],
+                'bank_name': rng.choice(BANK_NAMES),
+                'plate_province': plate[0],
+                'plate_letter': plate[1],
+                'plate_number': plate[2:],
+                'vehicle_color': color,
+            }
+            for i, plate in enumerate(plates)
+        ]
+
+    @staticmethod
+    def load_applicants(path: str) -> List[Dict[str, Any]]:
+        """从CSV（首行为字段名）或JSON数组读取申办人；只有 car_num 时自动拆分省份/字母/号码"""
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            if path.lower().endswith('.json'):
+                records = json.load(f)
+            else:
+                records = [dict(row) for row in csv.DictReader(f)]
+        for record in records:
+            car_num = record.get('car_num')
+            if car_num and not record.get('plate_number'):
+                record['plate_province'] = car_num[0]
+                record['plate_letter'] = car_num[1]
+                record['plate_number'] = car_num[2:]
+        return records
+
+    @staticmethod
+    def _new_result(index: int, applicant: Dict[str, Any]) -> Dict[str, Any]:
+        car_num = CoreService.build_car_num(applicant.get('plate_province', ''), applicant.get('plate_letter', ''),
+                                            applicant.get('plate_number', ''))
+        return {
+            'index': index,
+            'car_num': car_num,
+            'name': applicant.get('name', ''),
+            'id_code': applicant.get('id_code', ''),
+            'phone': applicant.get('phone', ''),
+            'status': 'running',
+            'order_id': '',
+            'sign_order_id': '',
+            'failed_step': '',
+            'error': '',
+            'elapsed': 0.0,
+            'run_id': '',
+            'steps': {},  # 步骤号 -> 耗时（秒），只记录执行过的步骤
+            'failed_steps': [],  # 失败的步骤号，并发执行的前置步骤可能同时失败多个
+        }
+
+    def _new_core(self, applicant: Dict[str, Any]) -> Core:
+        params = DataService.build_apply_params(dict(applicant, vehicle_type='passenger'))
+        params = DataService.validate_and_complete_params(params)
+        return Core(params=params, base_url=self.base_url, browser_cookies=self.browser_cookies,
+                    persist_checkpoint=True)
+
+    def _run_one(self, index: int, applicant: Dict[str, Any]) -> Dict[str, Any]:
+        """跑一个申办人的完整流程，记录每步耗时；失败时停在失败步骤"""
+        result = self._new_result(index, applicant)
+        if self._cancel.is_set():
+            # 已取消：队列中尚未开始的申办人不再调用接口
+            result['status'] = 'cancelled'
+            return result
+        start = time.perf_counter()
+        core = None
+        step_no = 0
+        try:
+            core = self._new_core(applicant)
+
+            def on_step_done(step, elapsed, error):
+                result['steps'][step] = elapsed
+                if error is not None:
+                    result['failed_steps'].append(step)
+
+            try:
+                core.run_independent_steps(on_step_done=on_step_done)
+            except Exception:
+                step_no = min(result['failed_steps'] or Core.INDEPENDENT_STEPS)
+                raise
+            for step_no, method in FLOW_STEPS:
+                if step_no in Core.INDEPENDENT_STEPS:
+                    continue
+                if self._cancel.is_set():
+                    result['status'] = 'cancelled'
+                    break
+                step_start = time.perf_counter()
+                try:
+                    if step_no == 8:
+                        getattr(core, method)(self.verify_code)
+                    else:
+                        getattr(core, method)()
+                finally:
+                    result['steps'][step_no] = time.perf_counter() - step_start
+            else:
+                result['status'] = 'success'
+        except Exception as e:
+            result['status'] = 'failed'
+            result['failed_step'] = step_no
+            if step_no not in result['failed_steps']:
+                result['failed_steps'].append(step_no)
+            result['error'] = str(e)[:200]
+        if core is not None:
+            result['order_id'] = core.state.order_id or ''
+            result['sign_order_id'] = core.state.sign_order_id or ''
+            result['run_id'] = core.run_id
+        result['elapsed'] = round(time.perf_counter() - start, 3)
+        return result
+
+    async def _run_one_async(self, driver: AsyncFlowDriver, index: int, applicant: Dict[str, Any]) -> Dict[str, Any]:
+        """异步模式下跑一个申办人，记录内容与 _run_one 相同"""
+        result = self._new_result(index, applicant)
+        start = time.perf_counter()
+        core = None
+
+        def on_step_done(step, elapsed, error):
+            result['steps'][step] = elapsed
+            if error is not None:
+                result['failed_steps'].append(step)
+
+        try:
+            # 参数组装要读配置文件，放到线程池避免阻塞事件循环
+            core = await asyncio.to_thread(self._new_core, applicant)
+            steps = await driver.run_core(core, self.verify_code, on_step_done, self._cancel.is_set)
+            result['status'] = 'success' if steps is not None else 'cancelled'
+        except Exception as e:
+            result['status'] = 'failed'
+            result['failed_step'] = min(result['failed_steps'] or [0])
+            result['error'] = str(e)[:200]
+        if core is not None:
+            result['order_id'] = core.state.order_id or ''
+            result['sign_order_id'] = core.state.sign_order_id or ''
+            result['run_id'] = core.run_id
+        result['elapsed'] = round(time.perf_counter() - start, 3)
+        return result
+
+    async def _run_all_async(self, on_result, total: int):
+        driver = AsyncFlowDriver(self.workers)
+
+        async def run_one(index, applicant):
+            result = await self._run_one_async(driver, index, applicant)
+            self.results.append(result)
+            if on_result:
+                on_result(result, len(self.results), total)
+
+        await driver.run_many([run_one(i, a) for i, a in enumerate(self.applicants, 1)])
+
+    def run(self, on_result: Optional[Callable[[Dict[str, Any], int, int], None]] = None) -> Dict[str, Any]:
+        """
+        并发执行全部申办人
+        :param on_result: 每完成一个申办人回调 on_result(result, done, total)
+        :return: 汇总字典，见 summarize()
+        """
+        total = len(self.applicants)
+        if total == 0:
+            raise Exception('申办人列表为空')
+        print(f"[INFO] 批量申办开始：{total}人，并发{self.workers}{'（异步）' if self.use_async else ''}")
+        if self.use_mock and not DataService.enable_mock_data():
+            raise Exception('开启Mock数据失败，签约校验无法使用固定验证码')
+        start = time.perf_counter()
+        self.results = []
+        try:
+            if self.use_async:
+                AsyncFlowDriver.run(self._run_all_async(on_result, total))
+            else:
+                self._run_threaded(on_result, total)
+        finally:
+            if self.use_mock:
+                DataService.close_mock_data()
+        self.results.sort(key=lambda r: r['index'])
+        summary = self.summarize(self.results, time.perf_counter() - start)
+        self.save(summary)
+        return summary
+
+    def _run_threaded(self, on_result, total: int):
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='etc-batch') as pool:
+            futures = [pool.submit(self._run_one, i, a) for i, a in enumerate(self.applicants, 1)]
+            for future in as_completed(futures):
+                result = future.result()
+                self.results.append(result)
+                if on_result:
+                    on_result(result, len(self.results), total)
+
+    @staticmethod
+    def summarize(results: List[Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+        """
+        汇总：整体成功/失败数、每分钟完成的申办数、整单耗时分位数，以及每个步骤的成功/失败数和耗时分位数
+        """
+        steps = {}
+        for step_no, _ in FLOW_STEPS:
+            durations = []
+            failed = 0
+            for r in results:
+                if step_no not in r['steps']:
+                    continue
+                if step_no in r['failed_steps']:
+                    failed += 1
+                else:
+                    durations.append(r['steps'][step_no])
+            steps[step_no] = dict(
+                name=StepManager.get_step_name(step_no),
+                success=len(durations),
+                failed=failed,
+                **latency_summary(durations),
+            )
+        success = [r for r in results if r['status'] == 'success']
+        return {
+            'total': len(results),
+            'success': len(success),
+            'failed': sum(1 for r in results if r['status'] == 'failed'),
+            'cancelled': sum(1 for r in results if r['status'] == 'cancelled'),
+            'wall_time': round(wall_time, 3),
+            'applications_per_min': round(len(success) / wall_time * 60, 2) if wall_time > 0 else 0.0,
+            'latency': latency_summary([r['elapsed'] for r in success]),
+            'steps': steps,
+        }
+
+    def save(self, summary: Dict[str, Any]) -> Dict[str, str]:
+        """写出汇总JSON和每个申办人的订单CSV，返回两个文件路径"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        csv_path = os.path.join(self.output_dir, f'batch_{self.run_id}.csv')
+        json_path = os.path.join(self.output_dir, f'batch_{self.run_id}_summary.json')
+        with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.results)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        summary['csv_path'] = csv_path
+        summary['summary_path'] = json_path
+        print(f"[INFO] 批量申办结果已保存: {csv_path}")
+        return {'csv': csv_path, 'summary': json_path}
+
+    @staticmethod
+    def format_summary(summary: Dict[str, Any]) -> str:
+        """汇总转为多行文本，供命令行和日志输出"""
+        latency = summary['latency']
+        lines = [
+            f"共{summary['total']}人 成功{summary['success']} 失败{summary['failed']} 取消{summary['cancelled']}，"
+            f"用时{summary['wall_time']:.1f}秒，{summary['applications_per_min']}单/分钟",
+            f"整单耗时(秒) p50={latency['p50']} p90={latency['p90']} p99={latency['p99']} max={latency['max']}",
+        ]
+        for step_no, step in summary['steps'].items():
+            if not step['success'] and not step['failed']:
+                continue
+            lines.append(f"  {step_no:>2}. {step['name']}: 成功{step['success']} 失败{step['failed']} "
+                         f"p50={step['p50']} p90={step['p90']} p99={step['p99']}")
+        return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m apps.etc_apply.services.rtx.batch_runner',
+                                     description='客车ETC批量申办')
+    parser.add_argument('--input', help='申办人文件（CSV/JSON），不指定时按 --count 随机生成')
+    parser.add_argument('--count', type=int, default=10, help='随机生成的申办人数，默认10')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f'并发数，默认{DEFAULT_WORKERS}')
+    parser.add_argument('--province', help='随机车牌的省份简称，默认取界面配置的默认省份')
+    parser.add_argument('--color', default='蓝色', help='随机车牌颜色，默认蓝色')
+    parser.add_argument('--seed', type=int, help='随机种子，相同种子生成相同的申办人')
+    parser.add_argument('--verify-code', default=DEFAULT_VERIFY_CODE, help='签约校验验证码')
+    parser.add_argument('--no-mock', action='store_true', help='不自动开启/关闭Mock数据')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='用单个事件循环异步驱动（需要aiohttp），--workers 可设到几百')
+    parser.add_argument('--output-dir', default=BATCH_DIR, help=f'结果目录，默认{BATCH_DIR}')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.input:
+            applicants = BatchApplyRunner.load_applicants(args.input)
+        else:
+            applicants = BatchApplyRunner.generate_applicants(args.count, args.province, args.color, args.seed)
+        runner = BatchApplyRunner(applicants, args.workers, args.verify_code, not args.no_mock, args.output_dir,
+                                  use_async=args.use_async)
+
+        def on_result(result, done, total):
+            if result['status'] == 'success':
+                print(f"[INFO] [{done}/{total}] {result['car_num']} 申办成功 订单号={result['order_id']} "
+                      f"耗时{result['elapsed']:.1f}秒")
+            else:
+                print(f"[WARNING] [{done}/{total}] {result['car_num']} 步骤{result['failed_step']}失败: "
+                      f"{result['error']}")
+
+        # Ctrl+C：正在跑的申办人做完当前步骤后停止，仍输出已完成部分的汇总
+        signal.signal(signal.SIGINT, lambda *_: runner.stop())
+        summary = runner.run(on_result)
+    except Exception as e:
+        print(f"[ERROR] 批量申办失败: {e}")
+        return 1
+    print(BatchApplyRunner.format_summary(summary))
+    if summary['cancelled']:
+        return 130
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -58,6 +58,12 @@ class CoreService:
         config = CoreService._load_etc_config()
         return config.get('api', {}).get('base_url', 'http://788360p9o5.yicp.fun')
     
+    @staticmethod
+    def get_api_config() -> Dict[str, Any]:
+        """获取接口配置（timeout 读取超时秒数、retry_count 重试次数、reference_cache_ttl 货车参考数据缓存秒数）"""
+        config = CoreService._load_etc_config()
+        return config.get('api', {})
+    
     @staticmethod
     def get_browser_cookies() -> dict:
         """获取浏览器cookies"""
@@ -88,6 +94,33 @@ class CoreService:
         """获取HCB数据库配置"""
         return CoreService.get_mysql_config('hcb')
     
+    @staticmethod
+    def register_value_indexes() -> None:
+        """
+        注册HCB库的已存在值索引（车牌号、设备号），ETC申办启动时调用（主窗口、Web服务、批量申办）
+        重复调用无副作用，索引在首次查重时才真正加载
+        """
+        from common.value_index import (
+            ExistingValueIndex, register_value_index, CAR_NUM_INDEX, DEVICE_NO_INDEX
+        )
+        register_value_index(CAR_NUM_INDEX, ExistingValueIndex(
+            CoreService.get_hcb_mysql_config, 'hcb_truckuser', 'CAR_NUM'))
+        register_value_index(DEVICE_NO_INDEX, ExistingValueIndex(
+            CoreService.get_hcb_mysql_config, 'hcb_newstock', 'INTERNAL_DEVICE_NO'))
+    
+    @staticmethod
+    def get_value_index(name: str):
+        """
+        取HCB库的已存在值索引，由申办业务显式传给 DataFactory 查重
+        未经启动流程注册时（如脚本直接调用业务服务）先注册
+        """
+        from common.value_index import get_value_index
+        index = get_value_index(name)
+        if index is None:
+            CoreService.register_value_indexes()
+            index = get_value_index(name)
+        return index
+    
     @staticmethod
     def get_business_config() -> Dict[str, Any]:
         """获取业务配置"""
@@ -157,6 +190,12 @@ class CoreService:
         config = CoreService._load_etc_config()
         return config.get('steps', {})
     
+    @staticmethod
+    def get_checkpoint_config() -> Dict[str, Any]:
+        """获取申办流程检查点配置（enabled 是否落盘，默认开启；ttl_days 保留天数）"""
+        config = CoreService._load_etc_config()
+        return config.get('checkpoint', {})
+    
     # ==================== 参数验证 ====================
     
     @staticmethod
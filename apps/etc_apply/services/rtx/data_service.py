@@ -7,6 +7,8 @@ import uuid
 from datetime import datetime
 from typing import Dict, Any
 from common.mysql_util import MySQLUtil
+from common.data_factory import DataFactory
+from common.value_index import DEVICE_NO_INDEX
 from apps.etc_apply.services.rtx.core_service import CoreService
 
 
@@ -143,20 +145,19 @@ class DataService:
         obu_length = device_config.get('obu_length', 16)
         etc_length = device_config.get('etc_length', 20)
         
+        # 设备号生成时对照hcb_newstock已有设备号查重
+        device_index = CoreService.get_value_index(DEVICE_NO_INDEX)
+        
         def generate_device_no_by_prefix(prefix, device_type):
             """根据前缀生成设备号"""
             length = obu_length if device_type == "0" else etc_length
-            remain = length - len(prefix)
-            suffix = ''.join(random.choices("0123456789", k=remain))
-            return prefix + suffix
+            return DataFactory.random_device_number(prefix, length, device_index)
         
         def generate_device_no_by_province(province, device_type):
             """根据省份生成设备号（兜底方案）"""
             code = province_codes.get(province, "3201")
             length = obu_length if device_type == "0" else etc_length
-            remain = length - len(code)
-            suffix = ''.join(random.choices("0123456789", k=remain))
-            return code + suffix
+            return DataFactory.random_device_number(code, length, device_index)
         
         # 🔥 新逻辑：优先根据运营商编码生成设备号前缀
         if operator_code:
@@ -276,27 +277,29 @@ class DataService:
             else:
                 return ''
         
-        for i in range(count):
-            data = {}
-            for j, field in enumerate(fields):
-                rule = rules[j] if j < len(rules) else 'fixed'
-                extra = None
-                if isinstance(extras, dict):
-                    extra = extras.get(field)
-                elif isinstance(extras, list) and j < len(extras):
-                    extra = extras[j]
-                data[field] = gen_value(rule, field, types[j], extra)
-            
-            # 插入数据
-            keys = ','.join(f'`{k}`' for k in data.keys())
-            vals = ','.join(['%s'] * len(data))
-            sql = f"INSERT INTO {table} ({keys}) VALUES ({vals})"
-            db.execute(sql, tuple(data.values()))
-            
-            if progress_callback:
-                progress_callback(int((i + 1) / count * 100), f"插入第{i+1}条数据")
+        column_specs = []
+        for j, field in enumerate(fields):
+            rule = rules[j] if j < len(rules) else 'fixed'
+            extra = None
+            if isinstance(extras, dict):
+                extra = extras.get(field)
+            elif isinstance(extras, list) and j < len(extras):
+                extra = extras[j]
+            column_specs.append((rule, field, types[j], extra))
         
-        db.close()
+        # 分批生成，每批用多行INSERT写入并提交一次
+        batch_size = 1000
+        inserted = 0
+        try:
+            while inserted < count:
+                n = min(batch_size, count - inserted)
+                batch = [tuple(gen_value(*spec) for spec in column_specs) for _ in range(n)]
+                db.bulk_insert(table, list(fields), batch)
+                inserted += n
+                if progress_callback:
+                    progress_callback(int(inserted / count * 100), f"已插入{inserted}条数据")
+        finally:
+            db.close()
     
     # ==================== 参数处理 ====================
     
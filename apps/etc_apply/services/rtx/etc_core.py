@@ -2,11 +2,15 @@
 """
 申办江苏客车ETC流程自动化worker（流程主控，仅供logic.py等上层调用）
 """
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from apps.etc_apply.services.rtx.api_client import ApiClient
 from apps.etc_apply.services.rtx.core_service import CoreService
-from apps.etc_apply.services.rtx.state_service import FlowState, StepManager
+from apps.etc_apply.services.rtx.state_service import FlowState, StepManager, StepStatus
 from apps.etc_apply.services.rtx.data_service import DataService
+from apps.etc_apply.services.flow_checkpoint import FlowCheckpoint, FLOW_RTX
+from apps.etc_apply.services.step_driver import flow_step
 
 
 class Core:
@@ -16,12 +20,43 @@ class Core:
     params参数必须由上层保证已校验和补全。
     """
 
-    def __init__(self, params=None, progress_callback=None, base_url=None, browser_cookies=None):
+    # 流程步骤：(步骤号, 方法名)，步骤8单独传入验证码
+    FLOW_STEPS = [
+        (1, 'step1_check_car_num'),
+        (2, 'step2_check_is_not_car_num'),
+        (3, 'step3_get_channel_use_address'),
+        (4, 'step4_get_optional_service_list'),
+        (5, 'step5_submit_car_num'),
+        (6, 'step6_protocol_add'),
+        (7, 'step7_submit_identity_with_bank_sign'),
+        (8, 'step8_sign_check'),
+        (9, 'step9_save_vehicle_info'),
+        (10, 'step10_optional_service_update'),
+        (11, 'step11_withhold_pay'),
+        (12, 'step12_update_db_status'),
+        (13, 'step13_run_stock_in_flow'),
+        (14, 'step14_update_obu_info'),
+        (15, 'step15_update_final_status'),
+    ]
+
+    # 互不依赖的前置步骤：只读查询，不使用彼此的返回值，也不修改流程状态，可并发执行
+    INDEPENDENT_STEPS = {
+        1: 'step1_check_car_num',
+        2: 'step2_check_is_not_car_num',
+        3: 'step3_get_channel_use_address',
+        4: 'step4_get_optional_service_list',
+    }
+    MAX_CONCURRENT_STEPS = 4
+
+    def __init__(self, params=None, progress_callback=None, base_url=None, browser_cookies=None,
+                 persist_checkpoint=None):
         self.state = FlowState(progress_callback)
         self.params = params or {}
         self.state.set_params(self.params)
         self.base_url = base_url
         self.browser_cookies = browser_cookies
+        # 检查点：每步成功后落盘（默认按配置 checkpoint.enabled），失败或重启后可用 Core.resume(run_id) 继续
+        self.checkpoint = FlowCheckpoint(FLOW_RTX, self.params, base_url, persist=persist_checkpoint)
         # 新增：自动初始化api
         if self.base_url:
             self.api = ApiClient(self.base_url, cookies=self.browser_cookies)
@@ -49,6 +84,25 @@ class Core:
             print(f"[INFO] {message}")
         self.state.update_progress(step_number, message)
     
+    @property
+    def run_id(self):
+        return self.checkpoint.run_id
+
+    def _save_checkpoint(self, step_number: int):
+        """步骤成功后保存检查点，最后一步完成后删除；落盘失败只告警，不影响申办"""
+        try:
+            self.checkpoint.record(step_number, self.params, self.state.get_order_info())
+            if step_number == self.FLOW_STEPS[-1][0]:
+                self.checkpoint.finish()
+        except Exception as e:
+            print(f"[WARNING] 保存申办流程检查点失败: {e}")
+
+    def _fail_checkpoint(self, step_number: int, error):
+        try:
+            self.checkpoint.fail(step_number, error)
+        except Exception as e:
+            print(f"[WARNING] 保存申办流程检查点失败: {e}")
+
     def _handle_api_error(self, step_number: int, step_name: str, error: Exception):
         """处理API错误，提供详细的错误信息"""
         error_msg = CoreService.format_error_message(step_number, step_name, error)
@@ -80,74 +134,131 @@ class Core:
                     )
         
         self._update_progress(step_number, error_msg)
+        self._fail_checkpoint(step_number, error_msg)
         return error_msg
 
-    # 分步方法
+    def run_independent_steps(self, steps=None, max_workers=None, on_step_done=None):
+        """
+        并发执行互不依赖的步骤（默认步骤1~4），全部结束后返回 {步骤号: 返回值}
+        有步骤失败时抛出步骤号最小的那个错误，与串行执行时报出的错误一致
+        :param steps: 步骤号列表，只能取 INDEPENDENT_STEPS 中的步骤
+        :param max_workers: 最大并发数，为1时按步骤号串行执行
+        :param on_step_done: 每个步骤结束回调 on_step_done(step_number, elapsed_seconds, error)
+        """
+        steps = sorted(steps or self.INDEPENDENT_STEPS)
+        for step in steps:
+            if step not in self.INDEPENDENT_STEPS:
+                raise Exception(f"步骤{step}依赖前序步骤的结果，不能并发执行")
+
+        def run_step(step):
+            start = time.perf_counter()
+            error = None
+            try:
+                return getattr(self, self.INDEPENDENT_STEPS[step])()
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                if on_step_done:
+                    on_step_done(step, time.perf_counter() - start, error)
+
+        workers = min(len(steps), max_workers or self.MAX_CONCURRENT_STEPS)
+        if workers <= 1:
+            return {step: run_step(step) for step in steps}
+
+        results = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='etc-step') as pool:
+            futures = {pool.submit(run_step, step): step for step in steps}
+            for future in as_completed(futures):
+                step = futures[future]
+                try:
+                    results[step] = future.result()
+                except Exception as e:
+                    errors[step] = e
+        if errors:
+            raise errors[min(errors)]
+        return results
+
+    # 分步方法：接口步骤写成生成器，flow_step 包装后同步调用方式不变，异步驱动见 step_driver
+    @flow_step
     def step1_check_car_num(self):
         try:
-            result = self.api.check_car_num(self.params)
+            result = yield self.api.check_car_num(self.params)
             CoreService.assert_api_success(result, "校验车牌接口")
             self._update_progress(1, StepManager.format_step_message(1))
+            self._save_checkpoint(1)
             return result
         except Exception as e:
             error_msg = self._handle_api_error(1, "校验车牌", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step2_check_is_not_car_num(self):
         try:
-            result = self.api.check_is_not_car_num(self.params)
+            result = yield self.api.check_is_not_car_num(self.params)
             CoreService.assert_api_success(result, "校验是否可申办接口")
             self._update_progress(2, StepManager.format_step_message(2))
+            self._save_checkpoint(2)
             return result
         except Exception as e:
             error_msg = self._handle_api_error(2, "校验是否可申办", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step3_get_channel_use_address(self):
         try:
-            result = self.api.get_channel_use_address(self.params)
+            result = yield self.api.get_channel_use_address(self.params)
             CoreService.assert_api_success(result, "获取渠道地址接口")
             self._update_progress(3, StepManager.format_step_message(3))
+            self._save_checkpoint(3)
             return result
         except Exception as e:
             error_msg = self._handle_api_error(3, "获取渠道地址", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step4_get_optional_service_list(self):
         try:
-            result = self.api.get_optional_service_list(self.params)
+            result = yield self.api.get_optional_service_list(self.params)
             CoreService.assert_api_success(result, "获取可选服务接口")
             self._update_progress(4, StepManager.format_step_message(4))
+            self._save_checkpoint(4)
             return result
         except Exception as e:
             error_msg = self._handle_api_error(4, "获取可选服务", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step5_submit_car_num(self):
         try:
-            res = self.api.submit_car_num(self.params)
+            res = yield self.api.submit_car_num(self.params)
             CoreService.assert_api_success(res, "提交车牌接口")
             order_id = CoreService.safe_get_nested(res, ["data", "orderId"])
             self.state.order_id = order_id
             self._update_progress(5, StepManager.format_step_message(5))
+            self._save_checkpoint(5)
             return res
         except Exception as e:
             error_msg = self._handle_api_error(5, "提交车牌", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step6_protocol_add(self):
         try:
-            result = self.api.protocol_add(self.state.order_id, self.params)
+            result = yield self.api.protocol_add(self.state.order_id, self.params)
             CoreService.assert_api_success(result, "协议签署接口")
             self._update_progress(6, StepManager.format_step_message(6))
+            self._save_checkpoint(6)
             return result
         except Exception as e:
             error_msg = self._handle_api_error(6, "协议签署", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step7_submit_identity_with_bank_sign(self):
         try:
-            res = self.api.submit_identity_with_bank_sign(self.state.order_id, self.params)
+            res = yield self.api.submit_identity_with_bank_sign(self.state.order_id, self.params)
             CoreService.assert_api_success(res, "提交身份和银行卡信息接口")
             sign_order_id = CoreService.safe_get_nested(res, ["data", "signOrderId"])
             verify_code_no = CoreService.safe_get_nested(res, ["data", "verifyCodeNo"])
@@ -157,6 +268,7 @@ class Core:
             if etccard_user_id:
                 self.params["etccardUserId"] = etccard_user_id
             self._update_progress(7, StepManager.format_step_message(7))
+            self._save_checkpoint(7)
             return res
         except Exception as e:
             error_msg = self._handle_api_error(7, "提交身份和银行卡信息", e)
@@ -175,42 +287,49 @@ class Core:
             "raw": res
         }
 
+    @flow_step
     def step8_sign_check(self, verify_code=None):
         try:
             code = verify_code if verify_code is not None else self.params.get("code", "")
-            result = self.api.sign_check(self.params, code, self.state.verify_code_no, self.state.sign_order_id)
+            result = yield self.api.sign_check(self.params, code, self.state.verify_code_no, self.state.sign_order_id)
             CoreService.assert_api_success(result, "签约校验接口")
             self._update_progress(8, StepManager.format_step_message(8))
+            self._save_checkpoint(8)
             return result
         except Exception as e:
             error_msg = self._handle_api_error(8, "签约校验", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step9_save_vehicle_info(self, order_id=None):
         try:
             oid = order_id or self.state.order_id
-            res = self.api.save_vehicle_info(self.params, oid)
+            res = yield self.api.save_vehicle_info(self.params, oid)
             CoreService.assert_api_success(res, "保存车辆信息接口")
             etccard_user_id = CoreService.safe_get_nested(res, ["data", "etccardUserId"])
             if etccard_user_id:
                 self.params["etccardUserId"] = etccard_user_id
             self._update_progress(9, StepManager.format_step_message(9))
+            self._save_checkpoint(9)
             return res
         except Exception as e:
             error_msg = self._handle_api_error(9, "保存车辆信息", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step10_optional_service_update(self, order_id=None):
         try:
             oid = order_id or self.state.order_id
-            result = self.api.optional_service_update(oid)
+            result = yield self.api.optional_service_update(oid)
             CoreService.assert_api_success(result, "可选服务更新接口")
             self._update_progress(10, StepManager.format_step_message(10))
+            self._save_checkpoint(10)
             return result
         except Exception as e:
             error_msg = self._handle_api_error(10, "可选服务更新", e)
             raise Exception(error_msg)
 
+    @flow_step
     def step11_withhold_pay(self, order_id=None, verify_code=None):
         try:
             oid = order_id or self.state.order_id
@@ -220,9 +339,10 @@ class Core:
             else:
                 # 生成当前日期的YYMMDD格式验证码
                 code = CoreService.generate_verify_code()
-            result = self.api.withhold_pay(self.params, oid, code)
+            result = yield self.api.withhold_pay(self.params, oid, code)
             CoreService.assert_api_success(result, "代扣支付接口")
             self._update_progress(11, StepManager.format_step_message(11))
+            self._save_checkpoint(11)
             return result
         except Exception as e:
             error_msg = self._handle_api_error(11, "代扣支付", e)
@@ -250,7 +370,9 @@ class Core:
             
             DataService.update_card_user_status(car_num)
             self._update_progress(12, StepManager.format_step_message(12))
+            self._save_checkpoint(12)
         except Exception as e:
+            self._fail_checkpoint(12, e)
             # 直接抛出原始异常，让上层处理
             raise e
 
@@ -342,7 +464,9 @@ class Core:
             print(f"[INFO] step13设备入库完成，使用精确匹配的运营商代码")
             
             self._update_progress(13, StepManager.format_step_message(13))
+            self._save_checkpoint(13)
         except Exception as e:
+            self._fail_checkpoint(13, e)
             # 直接抛出原始异常，让上层处理
             raise e
 
@@ -371,7 +495,9 @@ class Core:
                 raise ValueError("step14缺少必要参数，请检查step13是否正确执行")
             DataService.update_card_user_obu_info(car_num, obu_no, etc_sn, activation_time)
             self._update_progress(14, StepManager.format_step_message(14))
+            self._save_checkpoint(14)
         except Exception as e:
+            self._fail_checkpoint(14, e)
             # 直接抛出原始异常，让上层处理
             raise e
 
@@ -393,7 +519,9 @@ class Core:
             
             self._update_progress(15, "15. 最终状态更新完成")
             DataService.update_final_card_user_status(car_num)
+            self._save_checkpoint(15)
         except Exception as e:
+            self._fail_checkpoint(15, e)
             # 直接抛出原始异常，让上层处理
             raise e
 
@@ -452,6 +580,64 @@ class Core:
             # 不更新进度到16，保持当前失败步骤的进度
             raise Exception(str(e))
 
+    @classmethod
+    def resume(cls, run_id, verify_code=None, progress_callback=None, base_url=None, browser_cookies=None):
+        """
+        从检查点继续客车流程：恢复参数和订单信息，从第一个未完成的步骤执行到步骤15
+        步骤8需要短信验证码，未传入 verify_code 时执行到步骤8之前暂停，拿到验证码后再次调用；
+        从步骤7之前继续时会重新发送验证码，此时传入的验证码只在Mock数据开启时有效
+        :return: {'run_id', 'status': completed / waiting_verify_code, 'completed_steps', 'order_id', ...}
+        """
+        core = cls.from_checkpoint(run_id, progress_callback, base_url, browser_cookies)
+        return core.run_remaining_steps(verify_code)
+
+    @classmethod
+    def from_checkpoint(cls, run_id, progress_callback=None, base_url=None, browser_cookies=None):
+        """按检查点恢复流程对象（参数、订单信息、已完成的步骤），不执行步骤"""
+        checkpoint = FlowCheckpoint.load(run_id)
+        if checkpoint.flow_type != FLOW_RTX:
+            raise Exception(f"检查点{run_id}不是客车申办流程")
+        if browser_cookies is None:
+            browser_cookies = CoreService.get_browser_cookies()
+        core = cls(checkpoint.params, progress_callback, base_url or checkpoint.base_url, browser_cookies)
+        core.checkpoint = checkpoint
+        order = checkpoint.state
+        core.state.set_order_info(order.get('order_id'), order.get('sign_order_id'), order.get('verify_code_no'))
+        for step in checkpoint.completed_steps:
+            core.state.step_status[step] = StepStatus.SUCCESS
+        core.state.current_step = max(checkpoint.completed_steps, default=0)
+        return core
+
+    def run_remaining_steps(self, verify_code=None):
+        """
+        执行检查点中未完成的步骤，未完成的前置步骤（1~4）并发执行
+        已完成的步骤一律跳过：完成的步骤不一定连续（如Web端步骤4失败后仍继续执行），重复执行写接口会重复提交
+        """
+        completed = set(self.checkpoint.completed_steps)
+        first = self.checkpoint.first_incomplete_step([step for step, _ in self.FLOW_STEPS])
+        if first is None:
+            return self._resume_result('completed')
+        print(f"[INFO] 继续申办流程 {self.run_id}：从步骤{first}开始")
+        prechecks = [step for step in self.INDEPENDENT_STEPS if step not in completed]
+        if prechecks:
+            self.run_independent_steps(prechecks)
+        for step, method in self.FLOW_STEPS:
+            if step in completed or step in self.INDEPENDENT_STEPS:
+                continue
+            if step == 8:
+                if verify_code is None:
+                    print(f"[INFO] 申办流程 {self.run_id} 等待短信验证码，拿到后再次调用 Core.resume 继续")
+                    return self._resume_result('waiting_verify_code')
+                getattr(self, method)(verify_code)
+            else:
+                getattr(self, method)()
+        self._update_progress(16, StepManager.format_step_message(16))
+        return self._resume_result('completed')
+
+    def _resume_result(self, status):
+        return dict(run_id=self.run_id, status=status, completed_steps=list(self.checkpoint.completed_steps),
+                    **self.state.get_order_info())
+
     def _auto_refund_after_success(self):
         """申办成功后自动执行退款"""
         try:
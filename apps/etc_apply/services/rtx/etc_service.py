@@ -48,11 +48,8 @@ def start_etc_apply_flow(params, ui):
             base_url=service_url,
             browser_cookies=browser_cookies
         )
-        # 分步执行前6步
-        worker.step1_check_car_num()
-        worker.step2_check_is_not_car_num()
-        worker.step3_get_channel_use_address()
-        worker.step4_get_optional_service_list()
+        # 步骤1~4互不依赖，并发执行；之后按顺序执行5、6步
+        worker.run_independent_steps()
         worker.step5_submit_car_num()
         worker.step6_protocol_add()
         # 赋值给UI
@@ -74,6 +71,49 @@ def start_etc_apply_flow(params, ui):
     ui.worker_thread.start()
 
 
+def resume_etc_apply_flow(run_id, ui):
+    """
+    从检查点继续客车申办流程（流程失败或程序重启后），执行未完成的步骤；
+    需要短信验证码（步骤8未完成）时与新申办一样弹出验证码对话框
+    :param run_id: 检查点ID，来自 FlowCheckpoint.list_resumable
+    :param ui: UI主窗口对象
+    """
+    def progress_callback(percent, msg):
+        if hasattr(ui, 'progress_signal'):
+            ui.progress_signal.emit(percent, msg)
+        if hasattr(ui, 'log_signal'):
+            ui.log_signal.emit(msg)
+
+    progress_callback.ui = ui
+
+    def run_remaining():
+        worker = Core.from_checkpoint(run_id, progress_callback)
+        ui.worker = worker
+        result = worker.run_remaining_steps()
+        ui.worker_order_id = worker.state.order_id
+        ui.worker_sign_order_id = worker.state.sign_order_id
+        ui.worker_verify_code_no = worker.state.verify_code_no
+        return result
+
+    def on_finished(result):
+        if result is None:
+            handle_result("继续申办流程异常，已关闭Mock数据", ui)
+        elif result['status'] == 'waiting_verify_code':
+            show_verify_dialog(ui)
+        else:
+            handle_result("申办流程全部完成！", ui, show_refund_dialog=True)
+
+    if not hasattr(ui, 'worker_thread_list'):
+        ui.worker_thread_list = []
+    ui.worker_thread_list = [t for t in ui.worker_thread_list if t.isRunning()]
+    ui.worker_thread = WorkerQThread(run_remaining)
+    ui.worker_thread_list.append(ui.worker_thread)
+    ui.worker_thread.log_signal.connect(ui.log_signal.emit)
+    ui.worker_thread.progress_signal.connect(ui.progress_signal.emit)
+    ui.worker_thread.finished_signal.connect(on_finished)
+    ui.worker_thread.start()
+
+
 def show_verify_dialog(ui):
     """
     弹出验证码输入对话框，处理验证码获取和后续签约流程。
@@ -2,6 +2,7 @@
 """
 状态管理服务 - 统一管理ETC申办流程的状态和进度
 """
+import threading
 from typing import Dict, Any, Optional, Callable
 from enum import Enum
 
@@ -27,6 +28,7 @@ class FlowState:
         self.sign_order_id = None
         self.verify_code_no = None
         self.params = {}
+        self._lock = threading.Lock()  # 前置步骤并发执行时，多个线程同时更新进度
         
     def update_progress(self, step_number: int, message: str, status: StepStatus = StepStatus.SUCCESS):
         """
@@ -35,12 +37,14 @@ class FlowState:
         :param message: 消息
         :param status: 状态
         """
-        self.current_step = step_number
-        self.step_status[step_number] = status
-        
-        if self.progress_callback:
-            percent = int((step_number / self.total_steps) * 100)
-            self.progress_callback(percent, message)
+        with self._lock:
+            # 并发步骤的完成顺序不固定，进度只前进不回退
+            self.current_step = max(self.current_step, step_number)
+            self.step_status[step_number] = status
+
+            if self.progress_callback:
+                percent = int((self.current_step / self.total_steps) * 100)
+                self.progress_callback(percent, message)
     
     def set_order_info(self, order_id: str, sign_order_id: str, verify_code_no: str):
         """
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+申办步骤驱动 - 同一份步骤代码既能同步执行，也能在事件循环中异步执行
+
+步骤写成生成器：接口调用写成 `result = yield self.api.xxx(...)`，阻塞的数据库操作写成
+`yield Blocking(func, *args)`。
+- 同步驱动（drive）：同步客户端的接口方法直接返回响应，原样送回生成器；Blocking 直接调用
+- 异步驱动（drive_async）：异步客户端的接口方法返回协程，由驱动await后送回；Blocking 放到线程池执行
+接口异常会在 yield 处抛回生成器，步骤里原有的 try/except 错误处理不需要改动
+"""
+import asyncio
+import functools
+import inspect
+
+
+class Blocking:
+    """阻塞操作（数据库读写等），异步驱动时放到线程池执行，不阻塞事件循环"""
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        return self.func(*self.args, **self.kwargs)
+
+
+def drive(gen):
+    """同步执行步骤生成器，返回生成器的返回值"""
+    value, error = None, None
+    while True:
+        try:
+            effect = gen.throw(error) if error is not None else gen.send(value)
+        except StopIteration as stop:
+            return stop.value
+        value, error = None, None
+        try:
+            value = effect.run() if isinstance(effect, Blocking) else effect
+        except Exception as e:
+            error = e
+
+
+async def drive_async(gen):
+    """异步执行步骤生成器：协程直接await，阻塞操作放到线程池"""
+    value, error = None, None
+    while True:
+        try:
+            effect = gen.throw(error) if error is not None else gen.send(value)
+        except StopIteration as stop:
+            return stop.value
+        value, error = None, None
+        try:
+            if isinstance(effect, Blocking):
+                value = await asyncio.to_thread(effect.run)
+            elif inspect.isawaitable(effect):
+                value = await effect
+            else:
+                value = effect
+        except Exception as e:
+            error = e
+
+
+def flow_step(func):
+    """
+    把生成器写法的步骤方法包装成普通同步方法，调用方式和返回值不变
+    原生成器函数保存在 __wrapped__ 上，供 call_async 异步驱动
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return drive(func(*args, **kwargs))
+    return wrapper
+
+
+async def call_async(method, *args, **kwargs):
+    """
+    异步调用步骤方法：flow_step 包装的步骤按生成器异步驱动，
+    其他同步方法（只有数据库操作的步骤等）整体放到线程池执行
+    """
+    gen_func = getattr(getattr(method, '__func__', None), '__wrapped__', None)
+    if gen_func is not None and inspect.isgeneratorfunction(gen_func):
+        return await drive_async(gen_func(method.__self__, *args, **kwargs))
+    return await asyncio.to_thread(method, *args, **kwargs)
@@ -4,7 +4,7 @@ UI事件处理 - 统一管理所有UI事件绑定和处理
 """
 import threading
 from typing import Dict, Any, Callable
-from PyQt5.QtWidgets import QMessageBox
+from PyQt5.QtWidgets import QMessageBox, QInputDialog
 from common.plate_util import random_plate_number
 from common.vin_util import get_next_vin
 from apps.etc_apply.ui.rtx.ui_component import ProvinceDialog, ProductSelectDialog, PlateLetterDialog
@@ -311,6 +311,42 @@ class UIEventManager:
             ui_core.set_error_state(ui)
             QMessageBox.critical(ui, "参数错误", f"参数构建失败: {e}")
     
+    def handle_resume(self, ui) -> None:
+        """继续未完成的申办：列出当前车辆类型可继续的流程检查点，选择后从未完成的步骤执行"""
+        try:
+            from apps.etc_apply.services.flow_checkpoint import FlowCheckpoint, FLOW_RTX, FLOW_TRUCK
+            is_truck = getattr(ui, 'current_vehicle_type', 'passenger') == 'truck'
+            checkpoints = FlowCheckpoint.list_resumable(FLOW_TRUCK if is_truck else FLOW_RTX)
+            if not checkpoints:
+                QMessageBox.information(ui, "继续申办", "没有可继续的申办流程")
+                return
+            items = [self._format_checkpoint(checkpoint) for checkpoint in checkpoints]
+            item, ok = QInputDialog.getItem(ui, "继续申办", "选择要继续的申办流程：", items, 0, False)
+            if not ok:
+                return
+            run_id = checkpoints[items.index(item)].run_id
+            ui_core.set_processing_state(ui)
+            self.log_service.info(f"继续申办流程 {run_id}")
+            if is_truck:
+                from apps.etc_apply.services.hcb.truck_service import resume_truck_apply_flow
+                resume_truck_apply_flow(run_id, ui)
+            else:
+                from apps.etc_apply.services.rtx.etc_service import resume_etc_apply_flow
+                resume_etc_apply_flow(run_id, ui)
+        except Exception as e:
+            self.log_service.error(f"继续申办失败: {e}")
+            ui_core.set_error_state(ui)
+            QMessageBox.critical(ui, "错误", f"继续申办失败: {e}")
+    
+    @staticmethod
+    def _format_checkpoint(checkpoint) -> str:
+        """检查点在选择列表中的显示文本：更新时间、车牌、进度和失败步骤"""
+        params = checkpoint.params
+        car_num = params.get('carNum') or params.get('car_num') or ''
+        done = len(checkpoint.completed_steps)
+        failed = f"，步骤{checkpoint.failed_step}失败" if checkpoint.failed_step else ""
+        return f"{checkpoint.updated_at} {car_num} 已完成{done}步{failed}（{checkpoint.run_id}）"
+    
     def handle_drag_drop(self, ui, file_path: str) -> None:
         """处理文件拖拽事件"""
         print(f"拖拽事件处理函数被调用，文件路径: {file_path}")
@@ -481,6 +517,9 @@ class UIEventManager:
             if hasattr(ui, 'apply_btn'):
                 ui.apply_btn.clicked.connect(lambda: self.handle_apply(ui))
             
+            if hasattr(ui, 'resume_btn'):
+                ui.resume_btn.clicked.connect(lambda: self.handle_resume(ui))
+            
             # 绑定拖拽事件
             if hasattr(ui, 'drag_group'):
                 print("找到拖拽组件，绑定事件")
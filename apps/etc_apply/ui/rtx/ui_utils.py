@@ -578,6 +578,14 @@ class UIBuilder:
         
         button_layout.addWidget(ui.apply_btn)
         
+        # 继续未完成的申办（从检查点恢复）
+        ui.resume_btn = QPushButton("继续未完成申办")
+        ui.resume_btn.setStyleSheet(ui_styles.get_button_style())
+        ui.resume_btn.setMinimumHeight(35)
+        ui.resume_btn.setMaximumHeight(40)
+        ui.resume_btn.setFont(QFont("Microsoft YaHei", 9))
+        button_layout.addWidget(ui.resume_btn)
+        
         button_container.setLayout(button_layout)
         return button_container
     
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 基于asyncio的HTTP传输层，供异步申办客户端使用（aiohttp为可选依赖，用到时才导入）
+# 同一事件循环内所有会话共用一个连接器（连接池），每个会话仍有自己的cookie
+# 超时、重试次数和退避参数与 common.http_transport 保持一致：
+# 连接失败对所有方法重试；断连/读超时和 502/503/504 只对幂等方法重试，POST 不会被重复提交
+# -------------------------------------------------------------
+import asyncio
+import random
+import weakref
+from typing import Optional, Tuple, Union
+from common.http_transport import (CONNECT_TIMEOUT, READ_TIMEOUT, DEFAULT_RETRIES,
+                                   BACKOFF_FACTOR, RETRY_STATUS, IDEMPOTENT_METHODS)
+
+# 与requests的连接池不同，aiohttp的连接数上限会限制同时在途的请求数，需不小于并发流程数
+CONNECTION_LIMIT = 512
+KEEPALIVE_TIMEOUT = 60       # 空闲连接保留时间（秒）
+
+_connectors = weakref.WeakKeyDictionary()
+
+
+def require_aiohttp():
+    """导入aiohttp，未安装时给出安装提示"""
+    try:
+        import aiohttp
+    except ImportError:
+        raise Exception("异步申办需要aiohttp，请先安装: pip install aiohttp")
+    return aiohttp
+
+
+def get_connector():
+    """取当前事件循环共享的连接器，每个事件循环只创建一次"""
+    aiohttp = require_aiohttp()
+    loop = asyncio.get_running_loop()
+    connector = _connectors.get(loop)
+    if connector is None or connector.closed:
+        connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT, limit_per_host=CONNECTION_LIMIT,
+                                         keepalive_timeout=KEEPALIVE_TIMEOUT)
+        _connectors[loop] = connector
+    return connector
+
+
+def build_timeout(timeout: Union[float, Tuple[float, float], None] = None):
+    """与 http_transport.new_session 相同的超时约定：一个数表示读取超时，连接超时不超过 CONNECT_TIMEOUT"""
+    aiohttp = require_aiohttp()
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    elif isinstance(timeout, (int, float)):
+        timeout = (min(CONNECT_TIMEOUT, timeout), timeout)
+    connect, read = timeout
+    return aiohttp.ClientTimeout(total=None, connect=connect, sock_read=read)
+
+
+def new_session(timeout: Union[float, Tuple[float, float], None] = None, cookies: Optional[dict] = None):
+    """
+    创建使用共享连接器的会话，必须在事件循环内调用；关闭会话不会关闭共享连接器
+    :param timeout: 读取超时秒数，或 (连接超时, 读取超时)
+    """
+    aiohttp = require_aiohttp()
+    # unsafe=True：测试环境常用IP地址访问，默认的cookie jar会丢弃IP主机的cookie
+    return aiohttp.ClientSession(connector=get_connector(), connector_owner=False,
+                                 timeout=build_timeout(timeout), cookies=cookies,
+                                 cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+
+def _backoff(attempt: int) -> float:
+    """第attempt次重试前的等待时间，带 50%~100% 随机抖动"""
+    return BACKOFF_FACTOR * (2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+async def request_text(session, method: str, url: str, retries: Optional[int] = None, **kwargs) -> str:
+    """
+    发送请求并返回响应文本，非2xx状态抛出 aiohttp.ClientResponseError
+    超时统一转换为 TimeoutError（消息中带timeout，便于上层按网络错误归类）
+    """
+    aiohttp = require_aiohttp()
+    retries = DEFAULT_RETRIES if retries is None else retries
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    attempt = 0
+    while True:
+        try:
+            async with session.request(method, url, **kwargs) as resp:
+                text = await resp.text()
+                if resp.status in RETRY_STATUS and idempotent and attempt < retries:
+                    attempt += 1
+                    await asyncio.sleep(_backoff(attempt))
+                    continue
+                resp.raise_for_status()
+                return text
+        except aiohttp.ClientConnectorError:
+            # 连接未建立，请求没有发出，任何方法都可以重试
+            if attempt >= retries:
+                raise
+        except (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError, asyncio.TimeoutError) as e:
+            if not idempotent or attempt >= retries:
+                if isinstance(e, asyncio.TimeoutError):
+                    raise TimeoutError(f"request timeout: {method} {url}") from e
+                raise
+        attempt += 1
+        await asyncio.sleep(_backoff(attempt))
+
+
+async def close_connector():
+    """关闭当前事件循环的共享连接器，在事件循环结束前调用"""
+    connector = _connectors.pop(asyncio.get_running_loop(), None)
+    if connector is not None and not connector.closed:
+        await connector.close()
@@ -4,9 +4,46 @@
 # 支持车牌、姓名、身份证、手机号、设备号、订单号、ETC号、OBN号、银行卡号、银行地址等
 # -------------------------------------------------------------
 import random
-from faker import Faker
+import time
+from typing import Optional
+from common.identity_factory import (
+    BANK_CARD_BINS, NAME_POOL, ID_NUMBER_POOL, PHONE_POOL, BANK_CARD_POOL
+)
+from common.snowflake import get_snowflake_generator
+from common.value_index import ExistingValueIndex, unique_value
 
-fake = Faker('zh_CN')
+_faker = None
+
+PLATE_PROVINCES = '京津沪渝冀豫云辽黑湘皖鲁新苏浙赣鄂桂甘晋蒙陕吉闽贵粤青藏川宁琼'
+PLATE_LETTERS = 'ABCDEFGHJKLMNPQRSTUVWXYZ'
+PLATE_COLORS = ['蓝色', '黄色', '绿色', '白色', '黑色']
+PLATE_COLOR_WEIGHTS = [60, 15, 15, 5, 5]
+
+
+def _numpy():
+    """批量生成才用到numpy，按需导入，避免拖慢普通单条造数的启动"""
+    import numpy
+    return numpy
+
+
+def _codes(text: str):
+    """字符串转Unicode码点数组"""
+    np = _numpy()
+    return np.array([ord(c) for c in text], dtype=np.uint32)
+
+
+def _rows_to_str(matrix) -> list:
+    """
+    码点矩阵(n, width)按行拼成字符串列表，行尾的0会被自动去掉（用于变长字段）
+    """
+    np = _numpy()
+    matrix = np.ascontiguousarray(matrix, dtype='<u4')
+    return matrix.view(f'<U{matrix.shape[1]}').ravel().tolist()
+
+
+def _digit_codes(rng, n: int, k: int):
+    """n行k列随机数字的码点矩阵"""
+    return rng.integers(48, 58, size=(n, k), dtype=_numpy().uint32)
 
 class DataFactory:
     """
@@ -31,16 +68,30 @@ class DataFactory:
     ]
 
     @staticmethod
-    def random_plate_number(province: str = None, color: str = None, prefix: str = None) -> dict:
+    def random_plate_number(province: str = None, color: str = None, prefix: str = None,
+                            index: Optional[ExistingValueIndex] = None) -> dict:
         """
         生成合规的中国大陆车牌号，支持蓝、黄、绿、白、黑色，自动适配后端校验
+        传入车牌号索引时，只返回库中未使用过的车牌
         :param province: 省份简称，如'粤'、'京'等
         :param color: 车牌颜色
         :param prefix: 车牌第二位字母
+        :param index: 已存在车牌号索引，None时不查重
         :return: {'plate_number': '粤A12345', 'color': '蓝色'}
         """
-        provinces = '京津沪渝冀豫云辽黑湘皖鲁新苏浙赣鄂桂甘晋蒙陕吉闽贵粤青藏川宁琼'
-        letters = 'ABCDEFGHJKLMNPQRSTUVWXYZ'
+        result = {}
+
+        def generate():
+            result.update(DataFactory._random_plate_number(province, color, prefix))
+            return result['plate_number']
+        unique_value(index, generate)
+        return result
+
+    @staticmethod
+    def _random_plate_number(province: str = None, color: str = None, prefix: str = None) -> dict:
+        """生成一个车牌号（不查重）"""
+        provinces = PLATE_PROVINCES
+        letters = PLATE_LETTERS
         # 修复：如果province不是字符串或不在provinces，直接随机
         province_code = province if isinstance(province, str) and province in provinces else random.choice(provinces)
         color_types = ['蓝色', '黄色', '绿色', '白色', '黑色']
@@ -91,44 +142,66 @@ class DataFactory:
 
         return {'plate_number': plate_number, 'color': color, 'province': province_code}
 
+    @staticmethod
+    def faker():
+        """
+        获取 Faker('zh_CN') 实例，仅在显式调用时才导入faker（EXE中未打包faker）
+        """
+        global _faker
+        if _faker is None:
+            from faker import Faker
+            _faker = Faker('zh_CN')
+        return _faker
+
     @staticmethod
     def random_name() -> str:
-        return fake.name()
+        """生成随机姓名（内置姓氏/名字表）"""
+        return NAME_POOL.next()
 
     @staticmethod
     def random_id_number() -> str:
-        return fake.ssn()
+        """生成随机18位身份证号（真实地区码、合法出生日期、GB 11643校验码）"""
+        return ID_NUMBER_POOL.next()
 
     @staticmethod
     def random_phone() -> str:
-        return fake.phone_number()
+        """生成随机手机号（运营商真实号段）"""
+        return PHONE_POOL.next()
 
     @staticmethod
     def random_bank_card() -> str:
-        """生成随机银行卡号（16~19位）"""
-        length = random.choice([16, 17, 18, 19])
-        return '6' + ''.join(random.choices('0123456789', k=length-1))
+        """生成随机银行卡号（常见银行BIN，16~19位，通过Luhn校验）"""
+        return BANK_CARD_POOL.next()
 
     @staticmethod
-    def random_etc_number(province: str = '苏', length: int = 20) -> str:
-        prefix = DataFactory.PROVINCE_PREFIX.get(province, '3200')
+    def random_device_number(prefix: str, length: int, index: Optional[ExistingValueIndex] = None) -> str:
+        """
+        固定前缀+随机数字的设备号，传入设备号索引时只返回库中未使用过的号码
+        """
         suffix_len = length - len(prefix)
-        suffix = ''.join(random.choices('0123456789', k=suffix_len))
-        return prefix + suffix
+        return unique_value(
+            index, lambda: prefix + ''.join(random.choices('0123456789', k=suffix_len))
+        )
 
     @staticmethod
-    def random_obn_number(province: str = '苏', length: int = 16) -> str:
+    def random_etc_number(province: str = '苏', length: int = 20, index: Optional[ExistingValueIndex] = None) -> str:
         prefix = DataFactory.PROVINCE_PREFIX.get(province, '3200')
-        suffix_len = length - len(prefix)
-        suffix = ''.join(random.choices('0123456789', k=suffix_len))
-        return prefix + suffix
+        return DataFactory.random_device_number(prefix, length, index)
+
+    @staticmethod
+    def random_obn_number(province: str = '苏', length: int = 16, index: Optional[ExistingValueIndex] = None) -> str:
+        prefix = DataFactory.PROVINCE_PREFIX.get(province, '3200')
+        return DataFactory.random_device_number(prefix, length, index)
+
+    @staticmethod
+    def random_snowflake_id() -> int:
+        """生成雪花ID（进程内共享生成器，线程安全、单调递增）"""
+        return get_snowflake_generator().next_id()
 
     @staticmethod
-    def random_snowflake_id():
-        import time
-        import random
-        # 时间戳+随机数，保证唯一性（简化版雪花ID）
-        return int(str(int(time.time() * 1000)) + str(random.randint(100, 999)))
+    def random_snowflake_ids(n: int) -> list:
+        """批量生成n个递增的雪花ID"""
+        return get_snowflake_generator().next_ids(n)
 
     @staticmethod
     def random_device_id() -> str:
@@ -138,7 +211,6 @@ class DataFactory:
     @staticmethod
     def random_order_id() -> str:
         """生成随机订单号"""
-        import time
         timestamp = str(int(time.time()))
         random_suffix = ''.join(random.choices('0123456789', k=6))
         return f"ORD{timestamp}{random_suffix}"
@@ -150,6 +222,207 @@ class DataFactory:
         streets = ['中山路', '解放路', '人民路', '建设路', '和平路', '胜利路', '东风路', '西湖路']
         return f"{random.choice(cities)}市{random.choice(streets)}{random.randint(1, 999)}号"
 
+    # ==================== 批量生成（NumPy向量化，一次生成整列） ====================
+    # rng 为 numpy.random.Generator，不传时新建；并行造数时可传入各自独立种子的rng
+
+    @staticmethod
+    def _rng(rng=None):
+        return rng if rng is not None else _numpy().random.default_rng()
+
+    @staticmethod
+    def _exclude_used(index: Optional[ExistingValueIndex], records: list, key, regenerate,
+                      max_rounds: int = 20) -> list:
+        """
+        批量结果查重：传入索引时，把已被占用的记录替换为新生成的记录，直到全部可用
+        :param index: 已存在值索引，None时不查重
+        :param records: 记录列表
+        :param key: 从记录取出查重值的函数
+        :param regenerate: regenerate(k) 重新生成k条记录
+        """
+        if index is None:
+            return records
+        index_name = f"{index.table}.{index.column}"
+        try:
+            pending = list(range(len(records)))
+            for _ in range(max_rounds):
+                pending = [i for i in pending if not index.reserve(key(records[i]))]
+                if not pending:
+                    return records
+                for i, record in zip(pending, regenerate(len(pending))):
+                    records[i] = record
+        except Exception as e:
+            print(f"[WARNING] 已存在值索引 {index_name} 不可用，跳过查重: {e}")
+            return records
+        raise Exception(f"批量生成的值多次重试后仍被占用（{index_name}），请检查号段是否耗尽")
+
+    @staticmethod
+    def _prefixed_digits(n: int, prefix: str, length: int, rng=None) -> list:
+        """固定前缀+随机数字，生成n个定长号码"""
+        np = _numpy()
+        rng = DataFactory._rng(rng)
+        matrix = np.empty((n, length), dtype=np.uint32)
+        matrix[:, :len(prefix)] = _codes(prefix)
+        matrix[:, len(prefix):] = _digit_codes(rng, n, length - len(prefix))
+        return _rows_to_str(matrix)
+
+    @staticmethod
+    def _random_plate_numbers(n: int, province: str = None, color: str = None, prefix: str = None, rng=None) -> dict:
+        """批量生成车牌号（不查重），按列返回"""
+        np = _numpy()
+        rng = DataFactory._rng(rng)
+        provinces = _codes(PLATE_PROVINCES)
+        letters = _codes(PLATE_LETTERS)
+        alnum = _codes(PLATE_LETTERS + '0123456789')
+
+        if isinstance(province, str) and province in PLATE_PROVINCES:
+            province_col = np.full(n, ord(province), dtype=np.uint32)
+        else:
+            province_col = provinces[rng.integers(0, len(provinces), size=n)]
+        if color in PLATE_COLORS:
+            color_idx = np.full(n, PLATE_COLORS.index(color))
+        else:
+            weights = np.array(PLATE_COLOR_WEIGHTS, dtype=float)
+            color_idx = rng.choice(len(PLATE_COLORS), size=n, p=weights / weights.sum())
+        if isinstance(prefix, str) and prefix in PLATE_LETTERS:
+            letter_col = np.full(n, ord(prefix), dtype=np.uint32)
+        else:
+            letter_col = letters[rng.integers(0, len(letters), size=n)]
+
+        # 尾号长度：蓝/绿5位，黄色带“学/挂”时4位，白色4或5位；黑色单独处理
+        tail_len = np.full(n, 5)
+        is_yellow = color_idx == 1
+        is_green = color_idx == 2
+        is_white = color_idx == 3
+        is_black = color_idx == 4
+        yellow_suffix = rng.choice(np.array([0, ord('学'), ord('挂')], dtype=np.uint32), size=n)
+        yellow_suffix[~is_yellow] = 0
+        tail_len[yellow_suffix > 0] = 4
+        tail_len[is_white] = rng.choice([4, 5], size=int(is_white.sum()))
+
+        # 尾号字母数字混合，至少一位数字：不满足的行整行重抽，与单条生成的拒绝采样等价
+        tails = alnum[rng.integers(0, len(alnum), size=(n, 5))]
+        used = np.arange(5)[None, :] < tail_len[:, None]
+        while True:
+            bad = ~((tails >= 48) & (tails <= 57) & used).any(axis=1)
+            bad &= ~is_black
+            if not bad.any():
+                break
+            tails[bad] = alnum[rng.integers(0, len(alnum), size=(int(bad.sum()), 5))]
+        tails[~used] = 0
+
+        matrix = np.zeros((n, 8), dtype=np.uint32)
+        matrix[:, 0] = province_col
+        matrix[:, 1] = letter_col
+        # 绿色：字母后加D/F，再接5位尾号
+        body = np.where(is_green[:, None], np.concatenate([
+            np.where(rng.integers(0, 2, size=n) == 0, ord('D'), ord('F'))[:, None].astype(np.uint32),
+            tails,
+        ], axis=1), np.concatenate([tails, np.zeros((n, 1), dtype=np.uint32)], axis=1))
+        matrix[:, 2:8] = body
+        # 黄色“学/挂”后缀放在4位尾号之后
+        has_suffix = yellow_suffix > 0
+        matrix[has_suffix, 6] = yellow_suffix[has_suffix]
+        # 黑色：省份 + Z + 港/澳 + 4位数字
+        if is_black.any():
+            k = int(is_black.sum())
+            black = np.zeros((k, 8), dtype=np.uint32)
+            black[:, 0] = province_col[is_black]
+            black[:, 1] = ord('Z')
+            black[:, 2] = np.where(rng.integers(0, 2, size=k) == 0, ord('港'), ord('澳'))
+            black[:, 3:7] = _digit_codes(rng, k, 4)
+            matrix[is_black] = black
+
+        return {
+            'plate_number': _rows_to_str(matrix),
+            'color': [PLATE_COLORS[i] for i in color_idx.tolist()],
+            'province': [chr(c) for c in province_col.tolist()],
+        }
+
+    @staticmethod
+    def random_plate_numbers(n: int, province: str = None, color: str = None, prefix: str = None, rng=None,
+                             index: Optional[ExistingValueIndex] = None) -> dict:
+        """
+        批量生成车牌号，规则与 random_plate_number 一致（省份、颜色权重、尾号至少含一位数字等）
+        传入车牌号索引时，只返回库中未使用过的车牌
+        :param n: 数量
+        :param province: 省份简称，不合法或为空时每行随机
+        :param color: 车牌颜色，不合法或为空时每行按权重随机
+        :param prefix: 车牌第二位字母，不合法或为空时每行随机
+        :param index: 已存在车牌号索引，None时不查重
+        :return: 按列返回 {'plate_number': [...], 'color': [...], 'province': [...]}
+        """
+        rng = DataFactory._rng(rng)
+
+        def generate(k):
+            cols = DataFactory._random_plate_numbers(k, province, color, prefix, rng)
+            return list(zip(cols['plate_number'], cols['color'], cols['province']))
+        rows = DataFactory._exclude_used(index, generate(n), lambda r: r[0], generate)
+        return {
+            'plate_number': [r[0] for r in rows],
+            'color': [r[1] for r in rows],
+            'province': [r[2] for r in rows],
+        }
+
+    @staticmethod
+    def random_device_numbers(n: int, prefix: str, length: int, rng=None,
+                              index: Optional[ExistingValueIndex] = None) -> list:
+        """批量生成固定前缀设备号，传入设备号索引时只返回未使用过的号码"""
+        rng = DataFactory._rng(rng)
+
+        def generate(k):
+            return DataFactory._prefixed_digits(k, prefix, length, rng)
+        return DataFactory._exclude_used(index, generate(n), lambda v: v, generate)
+
+    @staticmethod
+    def random_etc_numbers(n: int, province: str = '苏', length: int = 20, rng=None,
+                           index: Optional[ExistingValueIndex] = None) -> list:
+        """批量生成ETC卡号，前缀规则同 random_etc_number"""
+        prefix = DataFactory.PROVINCE_PREFIX.get(province, '3200')
+        return DataFactory.random_device_numbers(n, prefix, length, rng, index)
+
+    @staticmethod
+    def random_obn_numbers(n: int, province: str = '苏', length: int = 16, rng=None,
+                           index: Optional[ExistingValueIndex] = None) -> list:
+        """批量生成OBU号，前缀规则同 random_obn_number"""
+        prefix = DataFactory.PROVINCE_PREFIX.get(province, '3200')
+        return DataFactory.random_device_numbers(n, prefix, length, rng, index)
+
+    @staticmethod
+    def random_bank_cards(n: int, rng=None) -> list:
+        """批量生成银行卡号，规则同 random_bank_card（常见银行BIN，末位为Luhn校验位）"""
+        np = _numpy()
+        rng = DataFactory._rng(rng)
+        bins = rng.integers(0, len(BANK_CARD_BINS), size=n)
+        lengths = np.array([length for _, length in BANK_CARD_BINS])[bins]
+        digits = rng.integers(0, 10, size=(n, 19))
+        for i, (bin_code, _) in enumerate(BANK_CARD_BINS):
+            digits[bins == i, :len(bin_code)] = [int(c) for c in bin_code]
+        # Luhn：从校验位左侧第一位起，每隔一位乘2，大于9减9
+        pos = np.arange(19)[None, :]
+        payload_len = (lengths - 1)[:, None]
+        in_payload = pos < payload_len
+        doubled = in_payload & ((payload_len - 1 - pos) % 2 == 0)
+        values = np.where(doubled, digits * 2, digits)
+        values = np.where(values > 9, values - 9, values) * in_payload
+        check = (10 - values.sum(axis=1) % 10) % 10
+        digits[np.arange(n), lengths - 1] = check
+        matrix = (digits + 48).astype(np.uint32)
+        matrix[pos >= lengths[:, None]] = 0
+        return _rows_to_str(matrix)
+
+    @staticmethod
+    def random_device_ids(n: int, rng=None) -> list:
+        """批量生成16位十六进制设备ID"""
+        rng = DataFactory._rng(rng)
+        hex_codes = _codes('0123456789ABCDEF')
+        return _rows_to_str(hex_codes[rng.integers(0, 16, size=(n, 16))])
+
+    @staticmethod
+    def random_order_ids(n: int, rng=None) -> list:
+        """批量生成订单号：ORD + 秒级时间戳 + 6位随机数"""
+        prefix = f"ORD{int(time.time())}"
+        return DataFactory._prefixed_digits(n, prefix, len(prefix) + 6, rng)
+
     def random_car_info(self, province='苏', color='蓝色'):
         """
         生成一组车辆信息，包括车牌号和颜色
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 进程内共享的HTTP传输层
+# 所有会话共用同一组连接池（HTTPAdapter），并发的申办流程复用已建立的TCP/TLS连接，不必每个流程重新握手
+# 每个会话仍有自己的cookie，互不影响；未显式传入时使用默认的连接/读取超时
+# 重试只针对幂等请求：GET/PUT/DELETE 等在连接失败、读超时、502/503/504 时重试；
+# POST 只在连接未建立时重试（请求尚未发出，不会重复提交），退避时间带随机抖动，避免并发流程同时重试
+# -------------------------------------------------------------
+import random
+import socket
+import threading
+from typing import Dict, Optional, Tuple, Union
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 5          # 建立连接超时（秒）
+READ_TIMEOUT = 30            # 读取响应超时（秒）
+POOL_CONNECTIONS = 16        # 缓存的主机连接池个数
+POOL_MAXSIZE = 64            # 每个主机保留的空闲连接数，需不小于并发流程数，否则多出的连接用完即关
+DEFAULT_RETRIES = 3
+BACKOFF_FACTOR = 0.3         # 第n次重试前等待 BACKOFF_FACTOR * 2^(n-1) 秒左右
+RETRY_STATUS = (502, 503, 504)
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'])
+
+# TCP保活：空闲连接定期探测，避免被中间设备静默断开后下次请求才发现
+SOCKET_OPTIONS = list(HTTPConnection.default_socket_options) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+for _name, _value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3)):
+    if hasattr(socket, _name):
+        SOCKET_OPTIONS.append((socket.IPPROTO_TCP, getattr(socket, _name), _value))
+
+_adapters: Dict[int, HTTPAdapter] = {}
+_adapters_lock = threading.Lock()
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+class JitterRetry(Retry):
+    """
+    退避时间加随机抖动：在计算出的等待时间的 50%~100% 之间取值
+    """
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff * random.uniform(0.5, 1.0)
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """
+    开启TCP保活的连接池适配器
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+def build_retry(retries: int = DEFAULT_RETRIES) -> Retry:
+    """
+    幂等感知的重试策略：连接失败对所有方法重试，读失败和状态码重试只对幂等方法生效
+    重试用尽后返回最后一次响应，由调用方 raise_for_status() 处理
+    """
+    return JitterRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        allowed_methods=IDEMPOTENT_METHODS,
+        status_forcelist=RETRY_STATUS,
+        backoff_factor=BACKOFF_FACTOR,
+        raise_on_status=False,
+    )
+
+
+def get_adapter(retries: int = DEFAULT_RETRIES) -> HTTPAdapter:
+    """按重试次数取共享的连接池适配器，同一进程内只创建一次"""
+    with _adapters_lock:
+        adapter = _adapters.get(retries)
+        if adapter is None:
+            adapter = KeepAliveAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                                       max_retries=build_retry(retries))
+            _adapters[retries] = adapter
+        return adapter
+
+
+class TransportSession(requests.Session):
+    """
+    挂载共享连接池的会话：请求未指定timeout时使用会话的默认超时
+    """
+
+    def __init__(self, timeout: Union[float, Tuple[float, float], None] = None,
+                 retries: Optional[int] = None):
+        super().__init__()
+        self.timeout = timeout if timeout is not None else (CONNECT_TIMEOUT, READ_TIMEOUT)
+        adapter = get_adapter(DEFAULT_RETRIES if retries is None else retries)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().request(method, url, **kwargs)
+
+    def close(self):
+        """连接池由进程内所有会话共用，关闭单个会话时不关闭连接池"""
+        self.adapters.clear()
+
+
+def new_session(timeout: Union[float, Tuple[float, float], None] = None, retries: Optional[int] = None,
+                cookies: Optional[dict] = None) -> TransportSession:
+    """
+    创建使用共享连接池的会话，每个申办流程/客户端各用一个，cookie互相独立
+    :param timeout: 读取超时秒数，或 (连接超时, 读取超时)；只给一个数时连接超时仍取 CONNECT_TIMEOUT
+    :param retries: 重试次数
+    """
+    if isinstance(timeout, (int, float)):
+        timeout = (min(CONNECT_TIMEOUT, timeout), timeout)
+    session = TransportSession(timeout, retries)
+    if cookies:
+        session.cookies.update(cookies)
+    return session
+
+
+def shared_session() -> TransportSession:
+    """进程内共用的默认会话，给不需要单独cookie的脚本和工具使用"""
+    global _shared_session
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                _shared_session = TransportSession()
+    return _shared_session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """用默认会话发送请求，参数同 requests.request"""
+    return shared_session().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request('PUT', url, **kwargs)
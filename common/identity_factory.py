@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 身份类测试数据生成工具（不依赖Faker）
+# 批量生成符合 GB 11643 校验的18位身份证号、号段合法的手机号、
+# 通过Luhn校验的银行卡号、以及内置姓氏/名字表组合出的姓名
+# 纯标准库实现，打包EXE时无需额外依赖
+# -------------------------------------------------------------
+import random
+import threading
+from datetime import date
+from typing import Callable, List, Optional
+
+# 真实存在的区县行政区划代码（各省会/直辖市主城区）
+REGION_CODES = (
+    '110101', '110102', '110105', '110106', '110108',  # 北京 东城/西城/朝阳/丰台/海淀
+    '120101', '120103', '120104',                      # 天津 和平/河西/南开
+    '310101', '310104', '310105', '310115',            # 上海 黄浦/徐汇/长宁/浦东
+    '500103', '500105', '500106',                      # 重庆 渝中/江北/沙坪坝
+    '130102', '140105', '150102', '210102', '220102', '230102',
+    '320102', '320104', '320106', '320505', '320506',  # 南京 玄武/秦淮/鼓楼，苏州 虎丘/吴中
+    '330102', '330106', '340102', '350102', '360102', '370102',
+    '410102', '420102', '430102', '440103', '440104', '440106',
+    '440303', '440304', '440305', '450102', '460105', '510104',
+    '510105', '520102', '530102', '540102', '610102', '620102',
+    '630102', '640104', '650102',
+)
+
+# GB 11643 校验码：前17位加权求和对11取模后查表
+ID_WEIGHTS = (7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2)
+ID_CHECK_CODES = '10X98765432'
+
+# 三大运营商手机号段
+MOBILE_PREFIXES = (
+    # 中国移动
+    '134', '135', '136', '137', '138', '139', '147', '150', '151', '152', '157', '158', '159',
+    '172', '178', '182', '183', '184', '187', '188', '195', '197', '198',
+    # 中国联通
+    '130', '131', '132', '145', '155', '156', '166', '175', '176', '185', '186', '196',
+    # 中国电信
+    '133', '149', '153', '173', '177', '180', '181', '189', '190', '191', '193', '199',
+)
+
+# 常见银行卡BIN及卡号长度
+BANK_CARD_BINS = (
+    ('622202', 19), ('621226', 19),  # 工商银行
+    ('621700', 19), ('622700', 19),  # 建设银行
+    ('622848', 19), ('622845', 19),  # 农业银行
+    ('621661', 19), ('621785', 19),  # 中国银行
+    ('622262', 19),                  # 交通银行
+    ('622588', 16), ('621483', 16),  # 招商银行
+    ('621799', 19), ('622188', 19),  # 邮储银行
+    ('622908', 18),                  # 兴业银行
+)
+
+# 常见姓氏（大致按人口占比从高到低）
+SURNAMES = (
+    '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈'
+    '姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤'
+)
+SURNAME_WEIGHTS = tuple(max(1, 40 - i // 3) for i in range(len(SURNAMES)))
+
+# 名字常用字
+GIVEN_NAME_CHARS = (
+    '伟芳娜秀英敏静丽强磊军洋勇艳杰娟涛明超兰霞平刚桂文辉建华玉红志鹏飞俊宇浩然婷雪琳晨欣怡子轩梓涵佳睿博思'
+    '雨可嘉心悦诗晓丹海波斌林峰宁凯亮鑫慧颖倩璐晶昊天泽铭瑞阳东彬晖荣新国春梅云燕萍莉琴秋冬成龙江永昌德安福'
+)
+
+BIRTH_START = date(1960, 1, 1).toordinal()  # 出生日期范围，保证是成年人
+BIRTH_END = date(2004, 12, 31).toordinal()
+
+
+_birth_dates: List[str] = []
+
+
+def _birth_date_table() -> List[str]:
+    """出生日期取值有限，首次使用时一次性格式化好"""
+    if not _birth_dates:
+        _birth_dates.extend(date.fromordinal(d).strftime('%Y%m%d') for d in range(BIRTH_START, BIRTH_END + 1))
+    return _birth_dates
+
+
+def id_check_code(body17: str) -> str:
+    """计算身份证第18位校验码"""
+    total = sum(int(c) * w for c, w in zip(body17, ID_WEIGHTS))
+    return ID_CHECK_CODES[total % 11]
+
+
+def luhn_check_digit(payload: str) -> str:
+    """计算Luhn校验位（payload不含校验位）"""
+    total = 0
+    for i, c in enumerate(reversed(payload)):
+        d = int(c)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return str((10 - total % 10) % 10)
+
+
+class IdentityFactory:
+    """
+    身份类测试数据批量生成，rng 可传入 random.Random 实例以获得可复现的序列
+    """
+
+    @staticmethod
+    def id_numbers(n: int, rng: Optional[random.Random] = None) -> List[str]:
+        """批量生成18位身份证号：真实地区码 + 合法出生日期 + 顺序码 + GB 11643校验码"""
+        rng = rng or random
+        regions = rng.choices(REGION_CODES, k=n)
+        births = rng.choices(_birth_date_table(), k=n)
+        result = []
+        for region, birth in zip(regions, births):
+            body = f"{region}{birth}{rng.randint(1, 999):03d}"
+            result.append(body + id_check_code(body))
+        return result
+
+    @staticmethod
+    def phones(n: int, rng: Optional[random.Random] = None) -> List[str]:
+        """批量生成11位手机号，前三位取运营商真实号段"""
+        rng = rng or random
+        prefixes = rng.choices(MOBILE_PREFIXES, k=n)
+        return [f"{p}{rng.randrange(100000000):08d}" for p in prefixes]
+
+    @staticmethod
+    def bank_cards(n: int, rng: Optional[random.Random] = None) -> List[str]:
+        """批量生成银行卡号，常见银行BIN + 随机账号 + Luhn校验位"""
+        rng = rng or random
+        result = []
+        for bin_code, length in rng.choices(BANK_CARD_BINS, k=n):
+            body_len = length - len(bin_code) - 1
+            payload = f"{bin_code}{rng.randrange(10 ** body_len):0{body_len}d}"
+            result.append(payload + luhn_check_digit(payload))
+        return result
+
+    @staticmethod
+    def names(n: int, rng: Optional[random.Random] = None) -> List[str]:
+        """批量生成姓名：姓氏按常见程度加权，名字1~2个字"""
+        rng = rng or random
+        surnames = rng.choices(SURNAMES, weights=SURNAME_WEIGHTS, k=n)
+        chars = rng.choices(GIVEN_NAME_CHARS, k=n * 2)
+        two_chars = rng.choices((False, True), weights=(3, 7), k=n)
+        return [
+            s + (chars[2 * i] + chars[2 * i + 1] if two else chars[2 * i])
+            for i, (s, two) in enumerate(zip(surnames, two_chars))
+        ]
+
+    @staticmethod
+    def is_valid_id_number(id_number: str) -> bool:
+        """校验18位身份证号的校验码和出生日期"""
+        if len(id_number) != 18 or not id_number[:17].isdigit():
+            return False
+        try:
+            date(int(id_number[6:10]), int(id_number[10:12]), int(id_number[12:14]))
+        except ValueError:
+            return False
+        return id_check_code(id_number[:17]) == id_number[17].upper()
+
+    @staticmethod
+    def is_valid_bank_card(card_no: str) -> bool:
+        """Luhn校验银行卡号"""
+        return card_no.isdigit() and luhn_check_digit(card_no[:-1]) == card_no[-1]
+
+
+class IdentityPool:
+    """
+    预分配的数据池：一次批量生成 size 个值放入数组，逐个取用，取完整批补充
+    多线程安全
+    """
+
+    def __init__(self, generator: Callable[[int], List[str]], size: int = 2000):
+        self.generator = generator  # 批量生成函数，参数为数量
+        self.size = size
+        self._values: List[str] = []
+        self._lock = threading.Lock()
+
+    def next(self) -> str:
+        with self._lock:
+            if not self._values:
+                self._values = self.generator(self.size)
+            return self._values.pop()
+
+    def take(self, n: int) -> List[str]:
+        """一次取n个值"""
+        with self._lock:
+            while len(self._values) < n:
+                self._values.extend(self.generator(max(self.size, n - len(self._values))))
+            result = self._values[-n:]
+            del self._values[-n:]
+            return result
+
+
+# 全局数据池，DataFactory 单条生成时从这里取
+NAME_POOL = IdentityPool(IdentityFactory.names)
+ID_NUMBER_POOL = IdentityPool(IdentityFactory.id_numbers)
+PHONE_POOL = IdentityPool(IdentityFactory.phones)
+BANK_CARD_POOL = IdentityPool(IdentityFactory.bank_cards)
@@ -1,37 +1,378 @@
 # -*- coding: utf-8 -*-
 # -------------------------------------------------------------
 # MySQL 数据库操作工具类，封装连接、查询、增删改等常用功能
+# 支持线程安全的连接池（默认开启），按库复用连接，避免每次调用都重新握手
 # -------------------------------------------------------------
+import itertools
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
 import pymysql
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Iterable
+
+BULK_MAX_PACKET = 64 * 1024 * 1024        # 批量插入单条SQL的字节上限
+BULK_INSERT_MODES = ('insert', 'ignore', 'upsert')
+BULK_COMMIT_ROWS = 50000                   # 批量导入模式下每个事务的行数
+# 批量导入模式设置的会话变量，退出时恢复原值
+BULK_LOAD_SESSION_VARS = {'unique_checks': 0, 'foreign_key_checks': 0, 'autocommit': 0}
+BULK_PHASE_NAMES = {'prepare': '准备', 'generate': '造数', 'insert': '写入', 'commit': '提交', 'restore': '恢复'}
+
+# LOAD DATA 默认转义规则下需要转义的字符
+_INFILE_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def _infile_value(value) -> str:
+    """把单个值转为 LOAD DATA 文本格式，None写为\\N"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    return str(value).translate(_INFILE_ESCAPES)
+
+
+def format_phase_timings(timings: Dict[str, float]) -> str:
+    """把各阶段耗时格式化为 '写入 3.20s / 提交 0.41s' 的形式"""
+    return ' / '.join(f"{BULK_PHASE_NAMES.get(name, name)} {seconds:.2f}s" for name, seconds in timings.items())
+
+
+def merge_phase_timings(*timings: Dict[str, float]) -> Dict[str, float]:
+    """合并多个会话的阶段耗时（按阶段累加）"""
+    merged: Dict[str, float] = {}
+    for item in timings:
+        for name, seconds in item.items():
+            merged[name] = merged.get(name, 0.0) + seconds
+    return merged
+
+
+class MySQLConnectionPool:
+    """
+    线程安全的MySQL连接池
+    - 按 (host, port, user, password, database, charset) 分库管理连接
+    - 每个库的连接总数有上限，超出时等待归还，超时抛出异常
+    - 取出连接时，空闲超过 ping_interval 秒的连接先 ping 检查，失效则重建
+    - 空闲超过 idle_timeout 秒的连接会被回收关闭
+    """
+
+    def __init__(self, max_size: int = 10, idle_timeout: float = 300, ping_interval: float = 30,
+                 acquire_timeout: float = 30):
+        self.max_size = max_size                # 每个库的最大连接数（空闲+借出）
+        self.idle_timeout = idle_timeout        # 空闲回收时间（秒）
+        self.ping_interval = ping_interval      # 超过该空闲时间取出时先ping（秒）
+        self.acquire_timeout = acquire_timeout  # 连接数已满时的最长等待时间（秒）
+        self._lock = threading.Condition()
+        self._idle: Dict[Tuple, deque] = {}     # {key: deque([(conn, last_used), ...])}
+        self._in_use: Dict[Tuple, int] = {}     # {key: 借出数量}
+
+    def acquire(self, key: Tuple, factory) -> pymysql.connections.Connection:
+        """
+        借出一个连接，没有可用空闲连接时用 factory() 新建
+        :param key: 连接分组键
+        :param factory: 新建连接的无参函数
+        :return: pymysql连接
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._lock:
+            while True:
+                self._evict_idle(key)
+                idle = self._idle.setdefault(key, deque())
+                in_use = self._in_use.get(key, 0)
+                if idle:
+                    conn, last_used = idle.pop()
+                    self._in_use[key] = in_use + 1
+                    break
+                if in_use < self.max_size:
+                    conn, last_used = None, None
+                    self._in_use[key] = in_use + 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Exception(f"获取数据库连接超时：{key[4]} 已有{in_use}个连接在使用")
+                self._lock.wait(remaining)
+        # 建连和ping放在锁外，避免阻塞其他线程
+        try:
+            if conn is not None and time.monotonic() - last_used > self.ping_interval:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    self._close_quietly(conn)
+                    conn = None
+            if conn is None:
+                conn = factory()
+            return conn
+        except Exception:
+            self._release_slot(key)
+            raise
+
+    def release(self, key: Tuple, conn: pymysql.connections.Connection) -> None:
+        """
+        归还连接，未提交的事务会被回滚，回滚失败的连接直接丢弃
+        """
+        try:
+            conn.rollback()
+        except Exception:
+            self.discard(key, conn)
+            return
+        with self._lock:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            self._idle.setdefault(key, deque()).append((conn, time.monotonic()))
+            self._lock.notify()
+
+    def discard(self, key: Tuple, conn: pymysql.connections.Connection) -> None:
+        """
+        丢弃一个借出的连接（连接异常或使用方未归还时调用）
+        """
+        self._close_quietly(conn)
+        self._release_slot(key)
+
+    def clear(self) -> None:
+        """
+        关闭所有空闲连接（借出中的连接归还后仍会正常入池）
+        """
+        with self._lock:
+            idle_lists = list(self._idle.values())
+            self._idle.clear()
+        for idle in idle_lists:
+            for conn, _ in idle:
+                self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        连接池状态，{库名: {'idle': 空闲数, 'in_use': 借出数}}
+        """
+        with self._lock:
+            return {
+                key[4]: {'idle': len(self._idle.get(key, ())), 'in_use': self._in_use.get(key, 0)}
+                for key in set(self._idle) | set(self._in_use)
+            }
+
+    def _release_slot(self, key: Tuple) -> None:
+        with self._lock:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            self._lock.notify()
+
+    def _evict_idle(self, key: Tuple) -> None:
+        """回收空闲超时的连接，调用方需持有锁"""
+        idle = self._idle.get(key)
+        if not idle:
+            return
+        now = time.monotonic()
+        # 队头是最早归还的连接
+        while idle and now - idle[0][1] > self.idle_timeout:
+            conn, _ = idle.popleft()
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class BulkLoadSession:
+    """
+    批量导入会话，用法：with db.bulk_load(table) as session: ...
+    - 进入时关闭 unique_checks / foreign_key_checks / autocommit，写入的行按 commit_rows 合并成大事务提交
+    - MyISAM表额外 DISABLE KEYS，退出时 ENABLE KEYS 一次性重建索引；
+      InnoDB无法暂停二级索引维护，unique_checks=0 可让唯一二级索引走change buffer
+    - 正常退出或取消时提交剩余行；异常退出时回滚未提交的部分；两种情况都会恢复会话变量
+    - 会话变量恢复失败时丢弃该连接，避免把改过的会话带回连接池
+    - 各阶段耗时记录在 timings 中
+    """
+
+    def __init__(self, db: 'MySQLUtil', table: Optional[str] = None, commit_rows: int = BULK_COMMIT_ROWS,
+                 session_vars: Optional[Dict[str, int]] = None):
+        self.db = db
+        self.table = table                # 需要暂停索引维护的表，None表示不处理
+        self.commit_rows = commit_rows
+        self.session_vars = dict(BULK_LOAD_SESSION_VARS if session_vars is None else session_vars)
+        self.timings: Dict[str, float] = {}
+        self.committed_rows = 0
+        self.on_commit = None             # 提交成功后的回调 on_commit(本次提交行数)，用于记录检查点
+        self._pending = 0
+        self._saved: Dict[str, int] = {}
+        self._keys_disabled = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """统计一个阶段的耗时，同名阶段累加"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def _set_vars(self, values: Dict[str, int]) -> None:
+        if values:
+            self.db.cursor.execute('SET ' + ', '.join(f'SESSION {name} = {int(v)}' for name, v in values.items()))
+
+    def __enter__(self) -> 'BulkLoadSession':
+        if not self.db.conn:
+            self.db.connect()
+        with self.phase('prepare'):
+            if self.session_vars:
+                names = list(self.session_vars)
+                row = self.db.query('SELECT ' + ', '.join(f'@@SESSION.{n} AS `{n}`' for n in names))[0]
+                self._saved = {n: int(row[n]) for n in names}
+                self._set_vars(self.session_vars)
+            if self.table:
+                self._keys_disabled = self.db.disable_keys(self.table)
+        return self
+
+    def add_rows(self, n: int) -> None:
+        """登记已写入但未提交的行数，累计达到 commit_rows 时提交"""
+        self._pending += n
+        if self._pending >= self.commit_rows:
+            self.commit()
+
+    @property
+    def written_rows(self) -> int:
+        """已写入的行数（含未提交部分）"""
+        return self.committed_rows + self._pending
+
+    def recover(self) -> int:
+        """
+        语句失败后回滚未提交的部分，连接已断开时重连并重新设置会话变量
+        :return: 被回滚的行数
+        """
+        lost = self._pending
+        self._pending = 0
+        with self.phase('commit'):
+            try:
+                self.db.conn.rollback()
+            except Exception:
+                self.db.close(discard=True)
+                self.db.connect()
+                self._set_vars(self.session_vars)
+        return lost
+
+    def commit(self) -> None:
+        with self.phase('commit'):
+            self.db.conn.commit()
+        rows, self._pending = self._pending, 0
+        self.committed_rows += rows
+        if rows and self.on_commit:
+            self.on_commit(rows)
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                with self.phase('commit'):
+                    self.db.conn.rollback()
+                self._pending = 0
+        finally:
+            self._restore()
+        return False
+
+    def _restore(self) -> None:
+        with self.phase('restore'):
+            try:
+                if self._keys_disabled:
+                    self.db.enable_keys(self.table)
+                self._set_vars(self._saved)
+            except Exception as e:
+                print(f"[WARNING] 批量导入会话恢复失败，丢弃该连接: {e}")
+                self.db.close(discard=True)
+
 
 class MySQLUtil:
-    def __init__(self, host: str, port: int, user: str, password: str, database: str, charset: str = 'utf8mb4'):
+    # 全局连接池，设为None即退回到每次新建连接的模式
+    pool: Optional[MySQLConnectionPool] = MySQLConnectionPool()
+
+    def __init__(self, host: str, port: int, user: str, password: str, database: str, charset: str = 'utf8mb4',
+                 pooled: bool = True, local_infile: bool = False):
         self.host = host
         self.port = port
         self.user = user
         self.password = password
         self.database = database
         self.charset = charset
+        self.pooled = pooled
+        self.local_infile = local_infile  # 是否允许 LOAD DATA LOCAL INFILE
+        self._max_packet: Optional[int] = None
         self.conn: Optional[pymysql.connections.Connection] = None
         self.cursor: Optional[pymysql.cursors.Cursor] = None
+        self._pool: Optional[MySQLConnectionPool] = None
+        self._finalizer = None
 
-    def connect(self):
-        self.conn = pymysql.connect(
+    @classmethod
+    def configure_pool(cls, max_size: int = 10, idle_timeout: float = 300, ping_interval: float = 30,
+                       acquire_timeout: float = 30) -> MySQLConnectionPool:
+        """
+        重新配置全局连接池（旧池中的空闲连接会被关闭）
+        """
+        if cls.pool:
+            cls.pool.clear()
+        cls.pool = MySQLConnectionPool(max_size, idle_timeout, ping_interval, acquire_timeout)
+        return cls.pool
+
+    @classmethod
+    def disable_pool(cls) -> None:
+        """
+        关闭全局连接池，之后的连接都直接新建、用完即关
+        """
+        if cls.pool:
+            cls.pool.clear()
+        cls.pool = None
+
+    def _pool_key(self) -> Tuple:
+        return (self.host, int(self.port), self.user, self.password, self.database, self.charset, self.local_infile)
+
+    def _new_connection(self) -> pymysql.connections.Connection:
+        return pymysql.connect(
             host=self.host,
             port=self.port,
             user=self.user,
             password=self.password,
             database=self.database,
-            charset=self.charset
+            charset=self.charset,
+            local_infile=self.local_infile
         )
+
+    def connect(self):
+        if self.conn:
+            self.close()
+        pool = MySQLUtil.pool if self.pooled else None
+        if pool:
+            key = self._pool_key()
+            self.conn = pool.acquire(key, self._new_connection)
+            self._pool = pool
+            # 调用方异常时常常不会走到close()，对象被回收时丢弃连接并释放名额
+            self._finalizer = weakref.finalize(self, pool.discard, key, self.conn)
+        else:
+            self.conn = self._new_connection()
         self.cursor = self.conn.cursor(pymysql.cursors.DictCursor)
 
-    def close(self):
+    def close(self, discard: bool = False):
+        """
+        关闭连接：池化连接默认归还连接池，discard=True 时直接关闭并释放名额（连接状态不可信时使用）
+        """
         if self.cursor:
-            self.cursor.close()
+            try:
+                self.cursor.close()
+            except Exception:
+                pass
         if self.conn:
-            self.conn.close()
+            if self._pool:
+                self._finalizer.detach()
+                if discard:
+                    self._pool.discard(self._pool_key(), self.conn)
+                else:
+                    self._pool.release(self._pool_key(), self.conn)
+            else:
+                self.conn.close()
+        self.cursor = None
+        self.conn = None
+        self._pool = None
+        self._finalizer = None
 
     def query(self, sql: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         if not self.conn:
@@ -39,6 +380,32 @@ class MySQLUtil:
         self.cursor.execute(sql, params)
         return self.cursor.fetchall()
 
+    def iter_query(self, sql: str, params: Optional[tuple] = None, fetch_size: int = 1000,
+                   as_dict: bool = True) -> Iterator[Any]:
+        """
+        流式查询，基于非缓冲游标（SSCursor）逐批拉取，内存占用与结果集大小无关
+        注意：遍历结束（或生成器关闭）前，同一连接上不能再执行其他SQL
+        :param sql: 查询语句
+        :param params: 参数
+        :param fetch_size: 每次从服务端拉取的行数
+        :param as_dict: True返回dict，False返回tuple（更省内存）
+        :return: 行生成器
+        """
+        if not self.conn:
+            self.connect()
+        cursor_cls = pymysql.cursors.SSDictCursor if as_dict else pymysql.cursors.SSCursor
+        cursor = self.conn.cursor(cursor_cls)
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            # 提前退出时close会读完剩余结果，保证连接可继续使用
+            cursor.close()
+
     def execute(self, sql: str, params: Optional[tuple] = None) -> int:
         if not self.conn:
             self.connect()
@@ -46,6 +413,168 @@ class MySQLUtil:
         self.conn.commit()
         return result
 
+    def get_max_packet(self) -> int:
+        """
+        获取单条SQL可用的最大字节数（max_allowed_packet 留出余量，最多64MB），按连接缓存
+        """
+        if self._max_packet is None:
+            if not self.conn:
+                self.connect()
+            self.cursor.execute('SELECT @@max_allowed_packet AS max_packet')
+            server_max = int(self.cursor.fetchone()['max_packet'])
+            self._max_packet = int(min(server_max, BULK_MAX_PACKET) * 0.9)
+        return self._max_packet
+
+    def shrink_max_packet(self, ratio: float = 0.5, floor: int = 1024 * 1024) -> int:
+        """服务端拒绝过大的包时调小本实例的单条SQL字节上限，返回新上限"""
+        self._max_packet = max(floor, int(self.get_max_packet() * ratio))
+        return self._max_packet
+
+    @staticmethod
+    def _insert_prefix(table: str, fields: List[str], mode: str) -> str:
+        if mode not in BULK_INSERT_MODES:
+            raise ValueError(f"不支持的插入模式: {mode}")
+        verb = 'INSERT IGNORE' if mode == 'ignore' else 'INSERT'
+        columns = ','.join(f'`{f}`' for f in fields)
+        return f"{verb} INTO `{table}` ({columns}) VALUES "
+
+    @staticmethod
+    def _upsert_suffix(fields: List[str], mode: str, update_fields: Optional[List[str]]) -> str:
+        if mode != 'upsert':
+            return ''
+        cols = update_fields or fields
+        return ' ON DUPLICATE KEY UPDATE ' + ','.join(f'`{c}`=VALUES(`{c}`)' for c in cols)
+
+    @staticmethod
+    def render_insert_sqls(table: str, fields: List[str], rows: Iterable[tuple], max_packet: int,
+                           mode: str = 'insert', update_fields: Optional[List[str]] = None,
+                           escape=None, charset: str = 'utf8mb4') -> Iterator[str]:
+        """
+        把多行渲染成若干条完整的多行INSERT语句，每条不超过 max_packet 字节
+        不需要数据库连接，可以在造数子进程里提前拼好SQL
+        :param escape: 单值转义函数，默认使用 pymysql.converters.escape_item
+        """
+        prefix = MySQLUtil._insert_prefix(table, fields, mode)
+        suffix = MySQLUtil._upsert_suffix(fields, mode, update_fields)
+        limit = max_packet - len(prefix.encode('utf-8')) - len(suffix.encode('utf-8'))
+        if escape is None:
+            escape_item = pymysql.converters.escape_item
+            escape = lambda v: escape_item(v, charset)
+        values: List[str] = []
+        size = 0
+        for row in rows:
+            value = '(' + ','.join([escape(v) for v in row]) + ')'
+            value_size = len(value.encode('utf-8')) + 1
+            if values and size + value_size > limit:
+                yield prefix + ','.join(values) + suffix
+                values, size = [], 0
+            values.append(value)
+            size += value_size
+        if values:
+            yield prefix + ','.join(values) + suffix
+
+    def bulk_insert(self, table: str, fields: List[str], rows: Iterable[tuple], mode: str = 'insert',
+                    update_fields: Optional[List[str]] = None, commit: bool = True) -> int:
+        """
+        批量插入：把多行拼成一条 INSERT ... VALUES (...),(...)，单条SQL大小按 max_allowed_packet 自动切分
+        :param table: 表名
+        :param fields: 字段名列表
+        :param rows: 行数据（tuple，顺序与fields一致），可以是生成器，边生成边写入
+        :param mode: insert 普通插入 / ignore 使用INSERT IGNORE / upsert 使用ON DUPLICATE KEY UPDATE
+        :param update_fields: upsert模式下需要更新的字段，默认全部字段
+        :param commit: 是否每条SQL执行后提交；False时由调用方自行提交
+        :return: 影响行数
+        """
+        if not self.conn:
+            self.connect()
+        affected = 0
+        for sql in self.render_insert_sqls(table, fields, rows, self.get_max_packet(), mode, update_fields,
+                                           escape=self.conn.escape):
+            affected += self.execute_sql(sql, commit)
+        return affected
+
+    def execute_sql(self, sql: str, commit: bool = True) -> int:
+        """执行已拼好的SQL（不做参数替换）"""
+        if not self.conn:
+            self.connect()
+        result = self.cursor.execute(sql)
+        if commit:
+            self.conn.commit()
+        return result
+
+    def bulk_load(self, table: Optional[str] = None, commit_rows: int = BULK_COMMIT_ROWS) -> BulkLoadSession:
+        """
+        进入批量导入模式，配合 bulk_insert(..., commit=False) 使用，详见 BulkLoadSession
+        """
+        return BulkLoadSession(self, table, commit_rows)
+
+    def get_table_engine(self, table: str) -> Optional[str]:
+        rows = self.query(
+            "SELECT ENGINE AS engine FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        return rows[0]['engine'] if rows else None
+
+    def disable_keys(self, table: str) -> bool:
+        """
+        暂停非唯一索引维护（仅MyISAM支持），返回是否生效
+        """
+        if (self.get_table_engine(table) or '').upper() != 'MYISAM':
+            return False
+        self.execute_sql(f"ALTER TABLE `{table}` DISABLE KEYS", commit=False)
+        return True
+
+    def enable_keys(self, table: str) -> None:
+        """恢复索引维护并重建 disable_keys 期间缺失的索引"""
+        self.execute_sql(f"ALTER TABLE `{table}` ENABLE KEYS", commit=False)
+
+    def load_data_infile(self, table: str, fields: List[str], rows: Iterable[tuple], mode: str = 'insert',
+                         chunk_rows: int = 500000) -> int:
+        """
+        LOAD DATA LOCAL INFILE 批量导入：行数据先流式写入临时文件，再由服务端一次性导入，适合百万级数据
+        需要服务端开启 local_infile；当前实例未开启 local_infile 时会单独建立一个开启了的连接
+        :param table: 表名
+        :param fields: 字段名列表
+        :param rows: 行数据（tuple），可以是生成器
+        :param mode: insert 普通导入 / ignore 重复键跳过 / replace 重复键覆盖
+        :param chunk_rows: 每个临时文件的行数，导入完一个文件提交一次
+        :return: 导入行数
+        """
+        if mode not in ('insert', 'ignore', 'replace'):
+            raise ValueError(f"不支持的导入模式: {mode}")
+        if not self.local_infile:
+            db = MySQLUtil(self.host, self.port, self.user, self.password, self.database, self.charset,
+                           pooled=self.pooled, local_infile=True)
+            db.connect()
+            try:
+                return db.load_data_infile(table, fields, rows, mode, chunk_rows)
+            finally:
+                db.close()
+        if not self.conn:
+            self.connect()
+        option = {'insert': '', 'ignore': 'IGNORE ', 'replace': 'REPLACE '}[mode]
+        columns = ','.join(f'`{f}`' for f in fields)
+        sql = (f"LOAD DATA LOCAL INFILE %s {option}INTO TABLE `{table}` CHARACTER SET utf8mb4 "
+               f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns})")
+        loaded = 0
+        it = iter(rows)
+        while True:
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.tsv', delete=False) as f:
+                path = f.name
+                written = 0
+                for row in itertools.islice(it, chunk_rows):
+                    f.write('\t'.join([_infile_value(v) for v in row]))
+                    f.write('\n')
+                    written += 1
+            try:
+                if written:
+                    loaded += self.cursor.execute(sql, (path,))
+                    self.conn.commit()
+            finally:
+                os.remove(path)
+            if written < chunk_rows:
+                return loaded
+
     @staticmethod
     def get_databases(config: dict) -> List[str]:
         db = MySQLUtil(**config)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 表结构元数据缓存
+# 一次 information_schema 查询加载整个库的字段、主键和外键，按TTL过期，支持手动失效
+# 返回的字段结构与 SHOW FULL COLUMNS 的字段名保持一致，便于替换原有调用
+# -------------------------------------------------------------
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple
+from common.mysql_util import MySQLUtil
+
+# 一次性加载整个库的字段信息，主键顺序取自 KEY_COLUMN_USAGE
+SCHEMA_COLUMNS_SQL = """
+SELECT c.TABLE_NAME AS table_name,
+       c.COLUMN_NAME AS column_name,
+       c.COLUMN_TYPE AS column_type,
+       c.COLLATION_NAME AS collation_name,
+       c.IS_NULLABLE AS is_nullable,
+       c.COLUMN_KEY AS column_key,
+       c.COLUMN_DEFAULT AS column_default,
+       c.EXTRA AS extra,
+       c.COLUMN_COMMENT AS column_comment,
+       c.CHARACTER_MAXIMUM_LENGTH AS max_length,
+       k.ORDINAL_POSITION AS pk_position
+FROM information_schema.COLUMNS c
+LEFT JOIN information_schema.KEY_COLUMN_USAGE k
+       ON k.TABLE_SCHEMA = c.TABLE_SCHEMA
+      AND k.TABLE_NAME = c.TABLE_NAME
+      AND k.COLUMN_NAME = c.COLUMN_NAME
+      AND k.CONSTRAINT_NAME = 'PRIMARY'
+WHERE c.TABLE_SCHEMA = %s
+ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+# 库内外键（只取引用同一个库中表的外键）
+SCHEMA_FOREIGN_KEYS_SQL = """
+SELECT TABLE_NAME AS table_name,
+       COLUMN_NAME AS column_name,
+       REFERENCED_TABLE_NAME AS ref_table,
+       REFERENCED_COLUMN_NAME AS ref_column,
+       CONSTRAINT_NAME AS constraint_name
+FROM information_schema.KEY_COLUMN_USAGE
+WHERE TABLE_SCHEMA = %s
+  AND REFERENCED_TABLE_SCHEMA = TABLE_SCHEMA
+  AND REFERENCED_TABLE_NAME IS NOT NULL
+ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+"""
+
+
+class SchemaCache:
+    """
+    表结构元数据缓存，按 (host, port, database) 分库缓存
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl  # 缓存有效期（秒）
+        self._lock = threading.Lock()
+        self._schemas: Dict[Tuple, Dict[str, Any]] = {}  # {key: {'loaded_at': ts, 'tables': {表名: {...}}}}
+
+    @staticmethod
+    def _key(config: dict, database: str) -> Tuple:
+        return config.get('host'), int(config.get('port', 3306)), database
+
+    def _load(self, config: dict, database: str) -> Dict[str, Dict[str, Any]]:
+        """
+        从 information_schema 一次性加载整个库的字段、主键和外键
+        :return: {表名: {'fields': [...], 'primary_keys': [...], 'foreign_keys': [...]}}
+        """
+        db = MySQLUtil(**config)
+        db.connect()
+        try:
+            rows = db.query(SCHEMA_COLUMNS_SQL, (database,))
+            fk_rows = db.query(SCHEMA_FOREIGN_KEYS_SQL, (database,))
+        finally:
+            db.close()
+        tables: Dict[str, Dict[str, Any]] = {}
+        pk_positions: Dict[str, List[Tuple[int, str]]] = {}
+        for row in rows:
+            table = row['table_name']
+            info = tables.setdefault(table, {'fields': [], 'primary_keys': [], 'foreign_keys': []})
+            info['fields'].append({
+                'Field': row['column_name'],
+                'Type': row['column_type'],
+                'Collation': row['collation_name'],
+                'Null': row['is_nullable'],
+                'Key': row['column_key'],
+                'Default': row['column_default'],
+                'Extra': row['extra'] or '',
+                'Comment': row['column_comment'] or '',
+                'MaxLength': row['max_length'],
+            })
+            if row['pk_position'] is not None:
+                pk_positions.setdefault(table, []).append((row['pk_position'], row['column_name']))
+        for table, positions in pk_positions.items():
+            tables[table]['primary_keys'] = [name for _, name in sorted(positions)]
+        for row in fk_rows:
+            if row['table_name'] in tables:
+                tables[row['table_name']]['foreign_keys'].append({
+                    'column': row['column_name'],
+                    'ref_table': row['ref_table'],
+                    'ref_column': row['ref_column'],
+                    'constraint': row['constraint_name'],
+                })
+        return tables
+
+    def _get_schema(self, config: dict, database: str) -> Dict[str, Dict[str, Any]]:
+        key = self._key(config, database)
+        with self._lock:
+            entry = self._schemas.get(key)
+            if entry and time.monotonic() - entry['loaded_at'] < self.ttl:
+                return entry['tables']
+        # 加载放在锁外，避免慢查询阻塞其他库的读取
+        conf = config.copy()
+        conf['database'] = database
+        tables = self._load(conf, database)
+        with self._lock:
+            self._schemas[key] = {'loaded_at': time.monotonic(), 'tables': tables}
+        return tables
+
+    def get_tables(self, config: dict, database: str) -> List[str]:
+        """
+        获取库中所有表名（含视图）
+        """
+        return list(self._get_schema(config, database).keys())
+
+    def get_table_fields(self, config: dict, database: str, table: str) -> List[Dict[str, Any]]:
+        """
+        获取表字段信息，字段名与 SHOW FULL COLUMNS 一致，另含 MaxLength（字符类型最大长度）
+        缓存中找不到该表时（如新建表）会失效该库并重新加载一次
+        """
+        tables = self._get_schema(config, database)
+        if table not in tables:
+            self.invalidate(config, database)
+            tables = self._get_schema(config, database)
+        return [dict(f) for f in tables.get(table, {}).get('fields', [])]
+
+    def get_table_primary_keys(self, config: dict, database: str, table: str) -> List[str]:
+        """
+        获取表主键字段名列表（按主键定义顺序）
+        """
+        tables = self._get_schema(config, database)
+        return list(tables.get(table, {}).get('primary_keys', []))
+
+    def get_table_foreign_keys(self, config: dict, database: str, table: str) -> List[Dict[str, str]]:
+        """
+        获取表的外键列表：[{'column', 'ref_table', 'ref_column', 'constraint'}]
+        """
+        tables = self._get_schema(config, database)
+        return [dict(fk) for fk in tables.get(table, {}).get('foreign_keys', [])]
+
+    def invalidate(self, config: Optional[dict] = None, database: Optional[str] = None) -> None:
+        """
+        使缓存失效：不传参数清空全部；只传config清空该实例下所有库；同时传database只清空该库
+        """
+        with self._lock:
+            if config is None:
+                self._schemas.clear()
+                return
+            host, port, _ = self._key(config, database)
+            for key in list(self._schemas):
+                if key[0] == host and key[1] == port and (database is None or key[2] == database):
+                    del self._schemas[key]
+
+
+# 全局默认缓存实例
+schema_cache = SchemaCache()
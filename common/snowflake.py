@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 雪花ID生成器
+# 64位ID = 41位毫秒时间戳 + 10位机器号 + 12位序列号，同一机器号内严格递增
+# 线程安全；进程感知：fork出的子进程会按新pid重新取机器号，避免与父进程撞号
+# 多进程批量造数时建议给每个进程显式分配不同的 worker_id
+# -------------------------------------------------------------
+import os
+import socket
+import threading
+import time
+import zlib
+from typing import List, Optional
+
+SNOWFLAKE_EPOCH = 1577836800000  # 起始时间 2020-01-01 00:00:00 UTC（毫秒）
+WORKER_ID_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_ID_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+WORKER_ID_SHIFT = SEQUENCE_BITS
+TIMESTAMP_SHIFT = SEQUENCE_BITS + WORKER_ID_BITS
+MAX_CLOCK_BACKWARD_MS = 5000  # 时钟回拨超过该值直接报错，否则等待追上
+
+
+def default_worker_id() -> int:
+    """
+    默认机器号：优先取环境变量 SNOWFLAKE_WORKER_ID，否则由主机名和pid推算
+    """
+    env = os.environ.get('SNOWFLAKE_WORKER_ID')
+    if env is not None:
+        return int(env) & MAX_WORKER_ID
+    host_hash = zlib.crc32(socket.gethostname().encode('utf-8'))
+    return (host_hash ^ os.getpid()) & MAX_WORKER_ID
+
+
+class SnowflakeGenerator:
+    """
+    雪花ID生成器，同一毫秒内序列号用完时等待下一毫秒
+    """
+
+    def __init__(self, worker_id: Optional[int] = None, epoch: int = SNOWFLAKE_EPOCH):
+        if worker_id is not None and not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id 取值范围 0~{MAX_WORKER_ID}，实际为 {worker_id}")
+        self._fixed_worker_id = worker_id  # 显式指定的机器号，fork后保持不变
+        self.epoch = epoch
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.worker_id = self._fixed_worker_id if self._fixed_worker_id is not None else default_worker_id()
+        self._pid = os.getpid()
+        self._last_ts = -1
+        self._sequence = 0
+
+    def _now(self) -> int:
+        return int(time.time() * 1000) - self.epoch
+
+    def _next_timestamp(self) -> int:
+        """取当前毫秒，处理时钟回拨，调用方需持有锁"""
+        if os.getpid() != self._pid:
+            self._reset()
+        ts = self._now()
+        if ts < self._last_ts:
+            backward = self._last_ts - ts
+            if backward > MAX_CLOCK_BACKWARD_MS:
+                raise Exception(f"系统时钟回拨{backward}ms，拒绝生成雪花ID")
+            while ts < self._last_ts:
+                time.sleep(backward / 1000)
+                ts = self._now()
+        return ts
+
+    def _wait_next_ms(self, last_ts: int) -> int:
+        ts = self._now()
+        while ts <= last_ts:
+            ts = self._now()
+        return ts
+
+    def next_id(self) -> int:
+        """生成一个ID"""
+        with self._lock:
+            ts = self._next_timestamp()
+            if ts == self._last_ts:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # 本毫秒序列号用完，等下一毫秒
+                    ts = self._wait_next_ms(ts)
+            else:
+                self._sequence = 0
+            self._last_ts = ts
+            return (ts << TIMESTAMP_SHIFT) | (self.worker_id << WORKER_ID_SHIFT) | self._sequence
+
+    def next_ids(self, n: int) -> List[int]:
+        """批量生成n个ID（一次加锁，按毫秒成段分配序列号），结果递增"""
+        ids: List[int] = []
+        with self._lock:
+            while len(ids) < n:
+                ts = self._next_timestamp()
+                if ts == self._last_ts:
+                    start = self._sequence + 1
+                    if start > MAX_SEQUENCE:
+                        ts = self._wait_next_ms(ts)
+                        start = 0
+                else:
+                    start = 0
+                end = min(MAX_SEQUENCE, start + n - len(ids) - 1)
+                base = (ts << TIMESTAMP_SHIFT) | (self.worker_id << WORKER_ID_SHIFT)
+                ids.extend(range(base | start, (base | end) + 1))
+                self._last_ts = ts
+                self._sequence = end
+        return ids
+
+    def parse(self, snowflake_id: int) -> dict:
+        """拆解ID，便于排查"""
+        return {
+            'timestamp_ms': (snowflake_id >> TIMESTAMP_SHIFT) + self.epoch,
+            'worker_id': (snowflake_id >> WORKER_ID_SHIFT) & MAX_WORKER_ID,
+            'sequence': snowflake_id & MAX_SEQUENCE,
+        }
+
+
+_default_generator: Optional[SnowflakeGenerator] = None
+_default_lock = threading.Lock()
+
+
+def get_snowflake_generator() -> SnowflakeGenerator:
+    """进程内共享的默认生成器"""
+    global _default_generator
+    if _default_generator is None:
+        with _default_lock:
+            if _default_generator is None:
+                _default_generator = SnowflakeGenerator()
+    return _default_generator
+
+
+def set_default_worker_id(worker_id: int) -> SnowflakeGenerator:
+    """替换进程内默认生成器的机器号，多进程造数时由各子进程在启动时调用"""
+    global _default_generator
+    with _default_lock:
+        _default_generator = SnowflakeGenerator(worker_id)
+    return _default_generator
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 已存在值索引：把库里已用过的车牌号、设备号等一次性流式加载到内存，
+# 之后按 CREATE_TIME 水位增量刷新，生成随机值时先查索引，保证只产出未被占用的值
+# 索引由业务方在启动时注册（如ETC申办的 CoreService.register_value_indexes），
+# 生成时由调用方显式传入 DataFactory，不同模块之间不会互相影响
+# 数据量很大时可改用布隆过滤器，内存固定，误判只会导致多重试一次
+# -------------------------------------------------------------
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+
+class BloomFilter:
+    """
+    简单布隆过滤器：只会误报（判定存在但实际不存在），不会漏报
+    """
+
+    def __init__(self, expected_items: int = 1000000, error_rate: float = 0.001):
+        expected_items = max(1, expected_items)
+        self.size = max(8, int(-expected_items * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str) -> None:
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class ExistingValueIndex:
+    """
+    单列已存在值索引
+    - 首次使用时用流式查询全量加载 column，同时记录 time_column 的最大值作为水位
+    - 超过 refresh_interval 秒后，只增量拉取 time_column >= 水位 的新行
+    - 本进程产出的新值通过 add() 预占，避免并发流程间互相撞号
+    """
+
+    def __init__(self, config_getter: Callable[[], dict], table: str, column: str,
+                 time_column: Optional[str] = 'CREATE_TIME', refresh_interval: float = 60,
+                 use_bloom: bool = False, expected_items: int = 1000000):
+        self.config_getter = config_getter      # 返回MySQL连接配置的函数（延迟读取配置）
+        self.table = table
+        self.column = column
+        self.time_column = time_column          # 增量刷新用的时间列，为None时每次全量刷新
+        self.refresh_interval = refresh_interval
+        self.use_bloom = use_bloom
+        self.expected_items = expected_items
+        self._values = None                     # set 或 BloomFilter
+        self._watermark = None
+        self._refreshed_at = 0.0
+        self._failed_at = None                  # 最近一次加载失败的时间，失败后冷却一个刷新周期再重试
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _new_container(self):
+        return BloomFilter(self.expected_items) if self.use_bloom else set()
+
+    def _stream(self, where: str = '', params: Optional[tuple] = None) -> Iterable[tuple]:
+        columns = f"`{self.column}`" + (f", `{self.time_column}`" if self.time_column else '')
+        sql = f"SELECT {columns} FROM `{self.table}` WHERE `{self.column}` IS NOT NULL{where}"
+        from common.mysql_util import MySQLUtil
+        db = MySQLUtil(**self.config_getter())
+        db.connect()
+        try:
+            yield from db.iter_query(sql, params, fetch_size=10000, as_dict=False)
+        finally:
+            db.close()
+
+    def _load_into(self, container, where: str = '', params: Optional[tuple] = None):
+        """把查询结果灌入容器，返回本次看到的最大时间"""
+        watermark = None
+        for row in self._stream(where, params):
+            container.add(str(row[0]))
+            if self.time_column and row[1] is not None and (watermark is None or row[1] > watermark):
+                watermark = row[1]
+        return watermark
+
+    def load(self) -> None:
+        """全量加载"""
+        container = self._new_container()
+        watermark = self._load_into(container)
+        with self._lock:
+            # 加载期间本进程预占的值不能丢
+            if self._values is not None and not self.use_bloom:
+                container |= self._values
+            self._values = container
+            self._watermark = watermark
+            self._refreshed_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """增量刷新：只拉取水位之后的新行（含水位同一时刻，避免同秒写入漏掉）"""
+        if self._values is None or not self.time_column or self._watermark is None:
+            self.load()
+            return
+        with self._lock:
+            watermark = self._watermark
+        new_values = set()
+        latest = self._load_into(new_values, f" AND `{self.time_column}` >= %s", (watermark,))
+        with self._lock:
+            for value in new_values:
+                self._values.add(value)
+            if latest is not None and latest > self._watermark:
+                self._watermark = latest
+            self._refreshed_at = time.monotonic()
+
+    def _needs_refresh(self, now: float) -> bool:
+        return self._values is None or now - self._refreshed_at > self.refresh_interval
+
+    def _ensure_fresh(self) -> None:
+        now = time.monotonic()
+        if not self._needs_refresh(now):
+            return
+        # 同一时间只允许一个线程加载，其余线程等加载完直接使用结果
+        with self._load_lock:
+            if not self._needs_refresh(now):
+                return
+            if self._failed_at is not None and now - self._failed_at < self.refresh_interval:
+                if self._values is None:
+                    raise Exception(f"{self.table}.{self.column} 索引加载失败，冷却中")
+                return
+            try:
+                if self._values is None:
+                    self.load()
+                else:
+                    self.refresh()
+                self._failed_at = None
+            except Exception:
+                self._failed_at = now
+                # 已有数据时继续使用旧数据，首次加载失败才向上抛出
+                if self._values is None:
+                    raise
+
+    def contains(self, value: str) -> bool:
+        """值是否已被占用（库中已存在或本进程已产出）"""
+        self._ensure_fresh()
+        with self._lock:
+            return str(value) in self._values
+
+    def add(self, value: str) -> None:
+        """预占一个值"""
+        self._ensure_fresh()
+        with self._lock:
+            self._values.add(str(value))
+
+    def reserve(self, value: str) -> bool:
+        """值未被占用时预占并返回True，已被占用返回False（检查和预占是原子的）"""
+        self._ensure_fresh()
+        value = str(value)
+        with self._lock:
+            if value in self._values:
+                return False
+            self._values.add(value)
+            return True
+
+
+# ==================== 全局索引注册表 ====================
+# 约定名称：'car_num' 车牌号，'device_no' 设备号（ETC/OBU内部编号）
+
+CAR_NUM_INDEX = 'car_num'
+DEVICE_NO_INDEX = 'device_no'
+
+_indexes: Dict[str, ExistingValueIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def register_value_index(name: str, index: ExistingValueIndex, replace: bool = False) -> ExistingValueIndex:
+    """注册索引，已注册且不要求替换时返回已有索引"""
+    with _registry_lock:
+        if name in _indexes and not replace:
+            return _indexes[name]
+        _indexes[name] = index
+        return index
+
+
+def get_value_index(name: str) -> Optional[ExistingValueIndex]:
+    return _indexes.get(name)
+
+
+def unique_value(index: Optional[ExistingValueIndex], generate: Callable[[], str], max_tries: int = 100) -> str:
+    """
+    反复生成直到得到未被占用的值并预占；未传入索引时直接返回生成值
+    索引加载失败（如数据库不可达）时退回普通随机值，不阻断业务流程
+    """
+    if index is None:
+        return generate()
+    name = f"{index.table}.{index.column}"
+    try:
+        for _ in range(max_tries):
+            value = generate()
+            if index.reserve(value):
+                return value
+    except Exception as e:
+        print(f"[WARNING] 已存在值索引 {name} 不可用，退回随机生成: {e}")
+        return generate()
+    raise Exception(f"连续{max_tries}次生成的值都已被占用（{name}），请检查号段是否耗尽")
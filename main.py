@@ -6,6 +6,7 @@
 # -------------------------------------------------------------
 import sys
 import os
+import multiprocessing
 from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget
 from PyQt5.QtGui import QIcon
 from apps.data_generator.ui.data_gen_widget import DataGenWidget
@@ -53,6 +54,7 @@ class MainWin(QMainWindow):
 
 if __name__ == '__main__':
     # 程序入口，启动主窗口
+    multiprocessing.freeze_support()  # 打包EXE后并行造数的子进程需要
     app = QApplication(sys.argv)
     win = MainWin()
     win.show()
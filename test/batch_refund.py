@@ -1,10 +1,11 @@
-import requests
 import json
 import os
 from datetime import datetime
+from common import http_transport
 
 
 #批量退款脚本
+# 用法：python -m test.batch_refund（请求走 common.http_transport 的共享连接池）
 
 def get_api_base_url():
     """从配置文件读取API基础URL"""
@@ -84,7 +85,7 @@ def login():
     print(f"登录请求头: {json.dumps(headers, ensure_ascii=False)}")
     
     # 发送登录请求
-    response = requests.post(LOGIN_URL, headers=headers, json=login_data, verify=False)
+    response = http_transport.post(LOGIN_URL, headers=headers, json=login_data, verify=False)
     print(f"登录响应状态码: {response.status_code}")
     print(f"登录响应内容: {response.text}")
     
@@ -116,7 +117,7 @@ def get_payment_list(page_num=1, page_size=10):
     }
     
     try:
-        response = requests.get(url, headers=headers, params=params, verify=False)
+        response = http_transport.get(url, headers=headers, params=params, verify=False)
         print(f"获取订单列表响应状态码: {response.status_code}")
         print(f"获取订单列表响应内容: {response.text}")
         
@@ -155,7 +156,7 @@ def process_refund(order):
     print(f"退款请求数据: {json.dumps(data, ensure_ascii=False)}")
     print(f"退款请求头: {json.dumps(refund_headers, ensure_ascii=False)}")
     
-    response = requests.post(url, headers=refund_headers, json=data, verify=False)
+    response = http_transport.post(url, headers=refund_headers, json=data, verify=False)
     print(f"退款响应状态码: {response.status_code}")
     print(f"退款响应内容: {response.text}")
     
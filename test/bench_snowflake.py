@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 雪花ID多进程基准：各进程使用不同worker_id并发生成，校验全局唯一、进程内递增并统计吞吐
+# 用法：python -m test.bench_snowflake [进程数] [每进程数量]
+# -------------------------------------------------------------
+import sys
+import time
+from multiprocessing import Pool
+from common.snowflake import SnowflakeGenerator
+
+
+def generate(args):
+    """单个进程：一半逐个next_id，一半next_ids批量"""
+    worker_id, count = args
+    gen = SnowflakeGenerator(worker_id=worker_id)
+    start = time.perf_counter()
+    ids = [gen.next_id() for _ in range(count // 2)]
+    ids.extend(gen.next_ids(count - count // 2))
+    elapsed = time.perf_counter() - start
+    monotonic = all(a < b for a, b in zip(ids, ids[1:]))
+    return ids, elapsed, monotonic
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    start = time.perf_counter()
+    with Pool(processes) as pool:
+        results = pool.map(generate, [(i, count) for i in range(processes)])
+    wall = time.perf_counter() - start
+    all_ids = set()
+    total = 0
+    for worker_id, (ids, elapsed, monotonic) in enumerate(results):
+        total += len(ids)
+        all_ids.update(ids)
+        print(f"worker {worker_id}: {len(ids)}个, {len(ids) / elapsed:,.0f} 个/秒, 递增: {monotonic}")
+    print(f"合计: {total}个, 去重后: {len(all_ids)}个, 唯一: {total == len(all_ids)}")
+    print(f"整体吞吐: {total / wall:,.0f} 个/秒（含进程启动）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------
+# 数据画像造数校验：按已知分布构造样本并画像，再按画像生成，
+# 检查高频值的生成占比与画像中的占比一致（不需要连接数据库）
+# 用法：python -m test.check_data_profile [生成行数]
+# -------------------------------------------------------------
+import random
+import sys
+from collections import Counter
+from apps.data_generator.services.data_profile import _ColumnStats, compile_profile_column, TOP_K, HISTOGRAM_BINS
+
+TOLERANCE = 0.02   # 占比允许的绝对误差
+
+
+def _sample_columns(rng, count):
+    """构造样本列：(列名, 类型, 值列表)"""
+    ints = [0 if rng.random() < 0.6 else rng.randint(1, 100000) for _ in range(count)]
+    strings = ['A' if rng.random() < 0.5 else ''.join(rng.choices('ABCDEFGH', k=rng.randint(1, 6)))
+               for _ in range(count)]
+    status = [rng.choice('0001123') if rng.random() < 0.9 else None for _ in range(count)]
+    return [('INT_60PCT_ZERO', 'int', ints), ('STR_50PCT_A', 'string', strings), ('STATUS', 'string', status)]
+
+
+def check_column(name, kind, values, rows, rng):
+    stats = _ColumnStats(kind)
+    for value in values:
+        stats.add(value)
+    col = stats.to_profile(TOP_K, HISTOGRAM_BINS)
+    gen = compile_profile_column(col, rng)
+    generated = Counter(gen() for _ in range(rows))
+    non_null = rows - generated.pop(None, 0)
+    ok = True
+    for value, share in col['top'][:5]:
+        actual = generated.get(value, 0) / non_null if non_null else 0.0
+        flag = abs(actual - share) <= TOLERANCE
+        ok = ok and flag
+        print(f"  {name} {value!r}: 画像 {share:.1%}, 生成 {actual:.1%} {'OK' if flag else '偏差过大'}")
+    return ok
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(1)
+    ok = True
+    for name, kind, values in _sample_columns(rng, 50000):
+        ok = check_column(name, kind, values, rows, rng) and ok
+    print('校验通过' if ok else '校验失败')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,10 @@ import os
 import paramiko
 import random
 import datetime
-import requests
 import pymysql
 import time
 import json
+from common.http_transport import new_session
 
 # 流程配置
 PROCESS_CONFIG = {
@@ -95,7 +95,7 @@ class RoadFeeCreator:
     def __init__(self, operator='TXB'):
         self.operator = operator
         self.config = OPERATOR_CONFIGS[operator]
-        self.session = requests.Session()
+        self.session = new_session()
         self.token = None
         self.uuid = None
         self.captcha_code = None
@@ -19,6 +19,7 @@ from common.log_util import get_logger
 from web_backend.api import create_api_blueprint
 from web_backend.services.web_etc_service import WebETCService
 from web_backend.services.web_truck_service import WebTruckService
+from apps.etc_apply.services.rtx.core_service import CoreService
 
 # 创建Flask应用
 app = Flask(__name__)
@@ -30,6 +31,9 @@ CORS(app, supports_credentials=True)
 # 配置日志
 logger = get_logger("web_backend")
 
+# 注册车牌号/设备号查重索引（首次查重时才加载）
+CoreService.register_value_indexes()
+
 # 注册API蓝图
 api_bp = create_api_blueprint()
 app.register_blueprint(api_bp, url_prefix='/api')
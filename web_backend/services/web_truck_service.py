@@ -122,6 +122,7 @@ class WebTruckService:
                 'message': '货车ETC申办流程启动成功，请确认验证码',
                 'data': {
                     'apply_id': f'TRUCK_{int(time.time())}',
+                    'run_id': worker.run_id,  # 申办流程检查点ID，可用 TruckCore.resume 继续
                     'status': 'waiting_verify',
                     'order_id': worker.state.order_id,
                     'sign_order_id': verify_result.get('sign_order_id'),